@@ -0,0 +1,7 @@
+from ansible_collections.bbcrd.vault.plugins.module_utils.vault_action import (
+    VaultModuleActionBase,
+)
+
+
+class ActionModule(VaultModuleActionBase):
+    pass
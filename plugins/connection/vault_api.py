@@ -0,0 +1,171 @@
+DOCUMENTATION = r"""
+name: vault_api
+short_description: A persistent connection to the Vault API for the bbcrd.vault modules
+description:
+  - A persistent connection which keeps connections to the Vault API open for
+    the duration of a play, shared by every task using it.
+  - The Vault API modules in this collection (C(bbcrd.vault.vault_*)) send
+    their requests via this connection when it is in use. This means that
+    keep-alive connections to Vault (and so TLS sessions), the loaded CA
+    bundle and the discovered cluster leader (see C(vault_leader_routing))
+    are set up once per play rather than once per task.
+  - Modules are run on the control node, so the Vault API must be reachable
+    from the control node and C(vault_ca_path), if given, must refer to a
+    file on the control node.
+  - The Vault server, token and other settings are still taken from each
+    module's own C(vault_*) arguments. A single connection may be used with
+    any number of Vault servers and tokens.
+  - This connection can only run the Vault API modules in this collection.
+    Other tasks should use a different connection.
+options:
+  persistent_connect_timeout:
+    type: int
+    description:
+      - Configures, in seconds, the amount of time to wait when trying to
+        initially establish a persistent connection.
+    default: 30
+    ini:
+      - section: persistent_connection
+        key: connect_timeout
+    env:
+      - name: ANSIBLE_PERSISTENT_CONNECT_TIMEOUT
+    vars:
+      - name: ansible_connect_timeout
+  persistent_command_timeout:
+    type: int
+    description:
+      - Configures, in seconds, the amount of time to wait for a batch of
+        Vault API requests to complete before timing out. Note that a
+        module's concurrent requests (see vault_api_request_many) are sent as
+        a single batch.
+    default: 300
+    ini:
+      - section: persistent_connection
+        key: command_timeout
+    env:
+      - name: ANSIBLE_PERSISTENT_COMMAND_TIMEOUT
+    vars:
+      - name: ansible_command_timeout
+  persistent_log_messages:
+    type: boolean
+    description:
+      - Log the method and path of every Vault API request sent via this
+        connection to the Ansible log file (request and response bodies are
+        not logged).
+    default: False
+    ini:
+      - section: persistent_connection
+        key: log_messages
+    env:
+      - name: ANSIBLE_PERSISTENT_LOG_MESSAGES
+    vars:
+      - name: ansible_persistent_log_messages
+"""
+
+EXAMPLES = r"""
+- name: Provision Vault using a single persistent connection
+  hosts: vault_cluster
+  run_once: true
+  connection: bbcrd.vault.vault_api
+  tasks:
+    - import_role:
+        name: bbcrd.vault.configure_kv_secrets_engine
+    - import_role:
+        name: bbcrd.vault.system_policies
+"""
+
+import threading
+
+from ansible.plugins.connection import NetworkConnectionBase
+
+from ansible_collections.bbcrd.vault.plugins.module_utils.vault import (
+    VaultClient,
+    VaultApiError,
+)
+
+
+class Connection(NetworkConnectionBase):
+    """
+    A persistent connection which sends Vault API requests on behalf of
+    modules using PersistentVaultClient.
+    """
+
+    transport = "bbcrd.vault.vault_api"
+    has_pipelining = False
+
+    def __init__(self, play_context, *args, **kwargs):
+        super().__init__(play_context, *args, **kwargs)
+
+        # VaultClients by (vault_url, vault_ca_path, leader_routing,
+        # retry_timeout). NB: Tokens and namespaces are passed with each
+        # request so need not be part of the key.
+        self._vault_clients = {}
+        self._vault_clients_lock = threading.Lock()
+
+    def _connect(self):
+        # NB: Connections to Vault are opened on demand by the VaultClients
+        self._connected = True
+
+    def close(self):
+        with self._vault_clients_lock:
+            vault_clients = list(self._vault_clients.values())
+            self._vault_clients.clear()
+        for client in vault_clients:
+            client.close()
+        super().close()
+
+    def vault_send_many(
+        self,
+        vault_url,
+        vault_ca_path,
+        leader_routing,
+        retry_timeout,
+        requests,
+        concurrency,
+    ):
+        """
+        Send a series of (method, api_path, body, headers, expected_status)
+        requests, where body is a string (or None), with at most
+        'concurrency' in flight at once.
+
+        Returns a list of (response, latency) tuples in the same order as the
+        requests. Each response is either a tuple of _Response fields or, if
+        the request could not be made, a dict with the error message under
+        'msg'.
+        """
+        key = (vault_url, vault_ca_path, leader_routing, retry_timeout)
+        with self._vault_clients_lock:
+            if key not in self._vault_clients:
+                self._vault_clients[key] = VaultClient(
+                    vault_url,
+                    vault_ca_path=vault_ca_path,
+                    leader_routing=leader_routing,
+                    retry_timeout=retry_timeout,
+                )
+            client = self._vault_clients[key]
+
+        for method, api_path, *_ in requests:
+            self._log_messages(f"{method} {vault_url}{api_path}")
+
+        sent = client._send_many(
+            [
+                (
+                    method,
+                    api_path,
+                    body.encode("utf-8") if body is not None else None,
+                    headers,
+                    tuple(expected_status),
+                )
+                for method, api_path, body, headers, expected_status in requests
+            ],
+            concurrency,
+        )
+        return [
+            (
+                {"msg": response.msg}
+                if isinstance(response, VaultApiError)
+                else tuple(response),
+                latency,
+            )
+            for response, latency in sent
+        ]
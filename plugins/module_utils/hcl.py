@@ -0,0 +1,14 @@
+def normalise_hcl(text: str) -> str:
+    """
+    Normalise insignificant whitespace in an HCL document (e.g. a Vault
+    policy) so that two documents may be compared.
+    
+    Line endings are normalised, trailing whitespace is removed from every
+    line and blank lines are removed. Leading indentation is left alone since
+    it may be significant within a heredoc string.
+    """
+    return "\n".join(
+        line.rstrip()
+        for line in text.replace("\r\n", "\n").split("\n")
+        if line.strip()
+    )
@@ -1,10 +1,1294 @@
-from typing import Tuple, Any
+from typing import Tuple, Any, Optional, Dict, List, Iterable, Union, Callable, NamedTuple
+import io
 import json
-from pathlib import Path
-from subprocess import run
+import codecs
+import ssl
+import os
+import re
+import threading
+import time
+import random
+import select
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection, HTTPSConnection, HTTPException
+from urllib.parse import urlsplit
+from email.utils import parsedate_to_datetime
+from urllib.request import getproxies, proxy_bypass
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible.module_utils.urls import fetch_url
+from ansible.module_utils.connection import (
+    Connection as _PersistentConnection,
+    ConnectionError as _PersistentConnectionError,
+)
+
+try:
+    # Optional faster JSON decoder
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+
+DEFAULT_TIMEOUT = 10
+"""
+Default socket timeout (seconds) for Vault API requests. (Matches the default
+used by Ansible's fetch_url.)
+"""
+
+DEFAULT_CONCURRENCY = 8
+"""
+Default maximum number of concurrent requests made by vault_api_request_many.
+"""
+
+DEFAULT_RETRY_TIMEOUT = 60
+"""
+Default total time (seconds) within which failed requests may be retried.
+"""
+
+IDEMPOTENT_METHODS = ("GET", "LIST", "HEAD", "PUT", "DELETE")
+"""
+Request methods which are always safe to retry.
+"""
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+"""
+Response statuses which indicate a (probably) transient failure.
+"""
+
+REJECTED_STATUSES = (429, 503)
+"""
+Response statuses for which Vault does not process the request (rate limited,
+sealed or standby) and so which are safe to retry even for non-idempotent
+requests.
+"""
+
+TRACE_FILE_ENVIRONMENT_VARIABLE = "BBCRD_VAULT_API_TRACE_FILE"
+"""
+If this environment variable is set, a JSON object describing every Vault API
+request made will be appended to the named file (one per line).
+"""
+
+# Patterns used by get_api_path_template to replace the variable parts of API
+# paths (mount points, names and IDs) with placeholders.
+_API_PATH_TEMPLATES = [
+    (re.compile(pattern), template)
+    for pattern, template in [
+        (r"^/v1/sys/(auth|mounts|audit)/.+?(/tune)?$", r"/v1/sys/\1/{path}\2"),
+        (r"^/v1/sys/policy/[^/]+$", r"/v1/sys/policy/{name}"),
+        (r"^/v1/sys/policies/acl/[^/]+$", r"/v1/sys/policies/acl/{name}"),
+        (r"^/v1/sys/namespaces/.+$", r"/v1/sys/namespaces/{path}"),
+        (r"^/v1/.+?/sys/namespaces$", r"/v1/{namespace}/sys/namespaces"),
+        (r"^/v1/.+?/sys/namespaces/.+$", r"/v1/{namespace}/sys/namespaces/{path}"),
+        (
+            r"^/v1/identity/(entity|group|entity-alias)/(name|id)/[^/]+$",
+            r"/v1/identity/\1/\2/{\2}",
+        ),
+        (
+            r"^/v1/auth/.+?/role/[^/]+/(role-id|secret-id|custom-secret-id|secret-id-accessor/[^/]+)$",
+            r"/v1/auth/{mount}/role/{name}/\1",
+        ),
+        (r"^/v1/auth/(?!token/).+?/role/[^/]+$", r"/v1/auth/{mount}/role/{name}"),
+        (r"^/v1/auth/(?!token/).+?/(role|config|login)$", r"/v1/auth/{mount}/\1"),
+        (r"^/v1/(?!sys/|identity/|auth/).+?/config/ca$", r"/v1/{mount}/config/ca"),
+        (r"^/v1/(?!sys/|identity/|auth/).+?/roles/[^/]+$", r"/v1/{mount}/roles/{name}"),
+        (r"^/v1/(?!sys/|identity/|auth/).+?/roles$", r"/v1/{mount}/roles"),
+    ]
+]
+_ID_SEGMENT = re.compile(
+    r"(?<=/)([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|[0-9a-f]{16,})(?=/|$)",
+    re.IGNORECASE,
+)
+
+
+class VaultApiError(Exception):
+    """
+    Raised by VaultClient when a request could not be made or when a response
+    with an unexpected status code is received.
+    """
+
+    def __init__(
+        self,
+        msg: str,
+        method: str,
+        api_path: str,
+        data: Any = None,
+        status: Optional[int] = None,
+        response_body: Any = None,
+    ) -> None:
+        super().__init__(msg)
+        self.msg = msg
+        self.method = method
+        self.api_path = api_path
+        self.data = data
+        self.status = status
+        self.response_body = response_body
+
+    def fail_json_kwargs(self) -> dict:
+        """
+        Return the arguments to pass to AnsibleModule.fail_json to report this
+        error.
+        """
+        response_body = self.response_body
+        if isinstance(response_body, bytes):
+            response_body = response_body.decode("utf-8", errors="replace")
+        return dict(
+            msg=self.msg,
+            method=self.method,
+            api_path=self.api_path,
+            data=self.data,
+            response_body=response_body,
+        )
+
+
+class _Response(NamedTuple):
+    status: int
+    headers: Dict[str, str]  # NB: Lower-case names
+    body: bytes
+    reused: bool = False  # Was sent on a reused keep-alive connection?
+    body_size: int = 0  # Bytes received (including any streamed body)
+    decoded: Any = None  # The body, if decoded whilst streaming (see send)
+
+    @property
+    def content_type(self) -> str:
+        return self.headers.get("content-type", "").split(";")[0].strip()
+
+
+_JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_JSON_NUMBER_CHARS = "0123456789.eE+-"
+
+
+class _StreamingJsonDecoder:
+    """
+    An incremental JSON decoder which reads a document a chunk at a time and
+    can filter the entries of selected objects (or arrays) within it as they
+    are decoded. Unwanted entries are discarded as soon as they have been
+    decoded so the whole document is never held in memory at once.
+
+    Filters are given as a dictionary mapping paths (tuples of object keys,
+    e.g. ("data", "key_info")) to a function taking the key (or array index)
+    and value of each entry and returning True iff it should be kept.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, read: Callable[[int], bytes]) -> None:
+        self._read = read
+        self._utf8_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json_decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        self.bytes_read = 0
+
+    def _fill(self, size: int) -> None:
+        """Read (up to) another size bytes into the buffer."""
+        chunk = self._read(size)
+        self.bytes_read += len(chunk)
+        self._eof = not chunk
+        self._buffer = self._buffer[self._pos :] + self._utf8_decoder.decode(
+            chunk, final=self._eof
+        )
+        self._pos = 0
+
+    def _peek(self) -> str:
+        """
+        Skip whitespace and return the next character (or an empty string at
+        the end of the document).
+        """
+        while True:
+            self._pos = _JSON_WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer) or self._eof:
+                return self._buffer[self._pos : self._pos + 1]
+            self._fill(self.CHUNK_SIZE)
+
+    def _expect(self, chars: str) -> str:
+        """Consume and return the next character, which must be in chars."""
+        char = self._peek()
+        if not char or char not in chars:
+            raise ValueError(f"Expected one of {chars!r}, got {char!r}")
+        self._pos += 1
+        return char
+
+    def _decode_value(self) -> Any:
+        """Decode the next complete JSON value."""
+        self._peek()
+        while True:
+            try:
+                value, end = self._json_decoder.raw_decode(self._buffer, self._pos)
+                # NB: A number running up to the end of the buffer (or
+                # decoded up to a '.', 'e' etc. which starts a fraction or
+                # exponent cut off by it, e.g. "-2." of "-2.5e10") may be
+                # incomplete
+                if self._eof or (
+                    end < len(self._buffer)
+                    and self._buffer[end] not in _JSON_NUMBER_CHARS
+                ):
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            # The value continues beyond the buffer: read (at least) as much
+            # again to keep decoding of large values linear in time
+            self._fill(max(self.CHUNK_SIZE, len(self._buffer) - self._pos))
+
+    def _decode_filtered(
+        self,
+        path: Tuple[str, ...],
+        filters: Dict[Tuple[str, ...], Callable[[Any, Any], bool]],
+    ) -> Any:
+        """Decode the next value, found at the given path in the document."""
+        keep = filters.get(path)
+        within_filtered = any(f[: len(path)] == path for f in filters if f != path)
+        char = self._peek()
+        if char == "{" and (keep is not None or within_filtered):
+            self._pos += 1
+            value = {}
+            if self._peek() == "}":
+                self._pos += 1
+                return value
+            while True:
+                if self._peek() != '"':
+                    raise ValueError("Expected object key")
+                key = self._decode_value()
+                self._expect(":")
+                if keep is not None:
+                    entry = self._decode_value()
+                    if keep(key, entry):
+                        value[key] = entry
+                else:
+                    value[key] = self._decode_filtered(path + (key,), filters)
+                if self._expect(",}") == "}":
+                    return value
+        elif char == "[" and keep is not None:
+            self._pos += 1
+            value = []
+            if self._peek() == "]":
+                self._pos += 1
+                return value
+            index = 0
+            while True:
+                entry = self._decode_value()
+                if keep(index, entry):
+                    value.append(entry)
+                index += 1
+                if self._expect(",]") == "]":
+                    return value
+        else:
+            return self._decode_value()
+
+    def decode(
+        self, filters: Dict[Tuple[str, ...], Callable[[Any, Any], bool]]
+    ) -> Any:
+        """Decode the whole document, applying the given filters."""
+        value = self._decode_filtered((), filters)
+        if self._peek():
+            raise ValueError("Extra data after JSON document")
+        return value
+
+
+class _ConnectionPool:
+    """
+    A pool of HTTP/1.1 keep-alive connections to a single server.
+
+    Idle connections are kept in the pool and reused by subsequent requests.
+    Proxies configured in the environment are honoured (using CONNECT
+    tunnelling for HTTPS).
+    """
+
+    def __init__(
+        self,
+        url: str,
+        get_ssl_context: Callable[[], ssl.SSLContext],
+        timeout: float,
+    ) -> None:
+        url = urlsplit(url)
+        self.scheme = url.scheme
+        self.host = url.hostname
+        self.port = url.port or (443 if url.scheme == "https" else 80)
+        self.base_path = url.path.rstrip("/")
+        self._get_ssl_context = get_ssl_context
+        self._timeout = timeout
+
+        # Proxy (if any) to tunnel requests through, as (host, port)
+        self._proxy = None
+        proxy_url = getproxies().get(self.scheme)
+        if proxy_url and not proxy_bypass(self.host):
+            proxy = urlsplit(proxy_url if "://" in proxy_url else f"http://{proxy_url}")
+            self._proxy = (proxy.hostname, proxy.port or 80)
+
+        self._idle_connections = []
+        self._lock = threading.Lock()
+
+    def _new_connection(self) -> HTTPConnection:
+        """Open a new connection to the server (or its proxy)."""
+        host, port = self._proxy or (self.host, self.port)
+        if self.scheme == "https":
+            connection = HTTPSConnection(
+                host,
+                port,
+                timeout=self._timeout,
+                context=self._get_ssl_context(),
+            )
+            if self._proxy is not None:
+                connection.set_tunnel(self.host, self.port)
+        else:
+            connection = HTTPConnection(host, port, timeout=self._timeout)
+        return connection
+
+    def _acquire_connection(self) -> Tuple[HTTPConnection, bool]:
+        """
+        Get a connection from the pool (or a new connection if none are idle).
+        Returns the connection and a bool which is True iff the connection is
+        being reused.
+        """
+        with self._lock:
+            if self._idle_connections:
+                return (self._idle_connections.pop(), True)
+        return (self._new_connection(), False)
+
+    @staticmethod
+    def _connection_dropped(connection: HTTPConnection) -> bool:
+        """
+        Test whether an idle connection has been closed by the server (or
+        is otherwise unusable). An idle HTTP connection should never become
+        readable: if it has, the server has closed it (or sent something
+        unexpected).
+        """
+        if connection.sock is None:
+            return True
+        try:
+            return bool(select.select([connection.sock], [], [], 0)[0])
+        except (OSError, ValueError):
+            return True
+
+    def _release_connection(self, connection: HTTPConnection) -> None:
+        """Return a (still open) connection to the pool."""
+        with self._lock:
+            self._idle_connections.append(connection)
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        with self._lock:
+            idle_connections = self._idle_connections
+            self._idle_connections = []
+        for connection in idle_connections:
+            connection.close()
+
+    def send(
+        self,
+        method: str,
+        path: str,
+        body: Optional[bytes],
+        headers: Dict[str, str],
+        json_filters: Optional[Dict[Tuple[str, ...], Callable]] = None,
+    ) -> _Response:
+        """
+        Send a request for the given path (relative to the pool's base URL).
+
+        Reused keep-alive connections which the server has since closed are
+        discarded before sending. If a reused connection fails anyway, the
+        request is retried on a fresh connection only if it is idempotent or
+        failed before it was fully written (otherwise the server may have
+        processed it and the failure is left to the caller's retry rules).
+
+        If json_filters is given, successful (200) JSON responses are decoded
+        incrementally as they are received, using _StreamingJsonDecoder with
+        those filters, and the result placed in the response's 'decoded'
+        field (with an empty body).
+
+        Raises OSError, HTTPException or (for invalid streamed JSON)
+        ValueError on failure.
+        """
+        if self.scheme == "http" and self._proxy is not None:
+            target = f"http://{self.host}:{self.port}{self.base_path}{path}"
+        else:
+            target = f"{self.base_path}{path}"
+
+        while True:
+            connection, reused = self._acquire_connection()
+            if reused and self._connection_dropped(connection):
+                connection.close()
+                continue
+            try:
+                connection.request(method, target, body=body, headers=headers)
+            except (ConnectionError, HTTPException):
+                connection.close()
+                if reused:
+                    # Stale keep-alive connection (and the request wasn't
+                    # fully sent): try again on a fresh one
+                    continue
+                raise
+            except OSError:
+                connection.close()
+                raise
+            try:
+                response = connection.getresponse()
+                response_headers = {
+                    name.lower(): value for name, value in response.getheaders()
+                }
+                decoded = None
+                body_size = 0
+                if (
+                    json_filters is not None
+                    and response.status == 200
+                    and response_headers.get("content-type", "").split(";")[0].strip()
+                    == "application/json"
+                ):
+                    decoder = _StreamingJsonDecoder(response.read)
+                    decoded = decoder.decode(json_filters)
+                    body_size = decoder.bytes_read
+                response_body = response.read()
+                body_size += len(response_body)
+            except (ConnectionError, HTTPException):
+                connection.close()
+                if reused and method in IDEMPOTENT_METHODS:
+                    # Stale keep-alive connection: try again on a fresh one
+                    continue
+                raise
+            except (OSError, ValueError):
+                connection.close()
+                raise
+
+            if response.will_close:
+                connection.close()
+            else:
+                self._release_connection(connection)
+
+            return _Response(
+                response.status,
+                response_headers,
+                response_body,
+                reused,
+                body_size,
+                decoded,
+            )
+
+
+class VaultClient:
+    """
+    A minimal Vault API client which keeps HTTP/1.1 connections to the Vault
+    server alive between requests.
+
+    Idle connections are kept in a pool and reused by subsequent requests,
+    avoiding a fresh TCP connection and TLS handshake for every API call. The
+    SSLContext (and so the loaded CA bundle) is created once per client.
+
+    If leader_routing is True, write requests (i.e. anything other than GET
+    or LIST) are sent directly to the active node of the cluster, as
+    discovered via the sys/leader endpoint, rather than to vault_url (which
+    may be a standby). The discovered leader is cached for
+    LEADER_CACHE_TIMEOUT seconds and rediscovered early if a write receives
+    a 307 (redirect) or 503 (standby/sealed) response.
+
+    Requests which fail due to a transient problem (e.g. a 429, 5xx or
+    connection failure) are retried with exponential backoff (with jitter),
+    honouring any Retry-After header, until retry_timeout seconds after the
+    first attempt. Only idempotent requests are retried, except when Vault
+    indicates the request was rejected without being processed (429 or 503).
+    Set retry_timeout to zero to disable retries.
+
+    This class is thread safe: each connection in the pool is only ever used
+    by one request at a time.
+    """
+
+    LEADER_CACHE_TIMEOUT = 30
+    MAX_REDIRECTS = 5
+
+    RETRY_INITIAL_DELAY = 0.5
+    RETRY_MAX_DELAY = 10.0
+
+    def __init__(
+        self,
+        vault_url: str = "https://localhost:8200",
+        vault_namespace: str = "",
+        vault_token: Optional[str] = None,
+        vault_ca_path: Optional[str] = None,
+        leader_routing: bool = False,
+        retry_timeout: float = DEFAULT_RETRY_TIMEOUT,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> None:
+        self.vault_url = vault_url
+        self.vault_namespace = vault_namespace
+        self.vault_token = vault_token
+        self.vault_ca_path = vault_ca_path
+        self.leader_routing = leader_routing
+        self.retry_timeout = retry_timeout
+        self.timeout = timeout
+
+        self._ssl_context = None
+        self._lock = threading.Lock()
+
+        # Connection pools by (scheme, netloc, path)
+        self._pools: Dict[tuple, _ConnectionPool] = {}
+        self._pool = self._get_pool(vault_url)
+
+        # The pool for the current leader and the time.monotonic() it was
+        # discovered (see _get_leader_pool)
+        self._leader_pool = None
+        self._leader_discovered = 0.0
+        self._leader_lock = threading.Lock()
+
+        # Cached _Response for GET and LIST requests, keyed by (method,
+        # normalised api_path). The generation counter is incremented on every
+        # write so that reads which were in flight during a write are not
+        # cached.
+        self._cache = {}
+        self._cache_generation = 0
+
+        # The module this client is currently being used on behalf of (see
+        # get_vault_client)
+        self.module = None
+
+        # Request statistics {(method, path_template): {...}} (see get_stats)
+        self._stats = {}
+        self._trace_file = os.environ.get(TRACE_FILE_ENVIRONMENT_VARIABLE)
+
+    def _get_ssl_context(self) -> ssl.SSLContext:
+        """Get (creating the first time) the SSLContext to use."""
+        with self._lock:
+            if self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context(
+                    cafile=self.vault_ca_path
+                )
+            return self._ssl_context
+
+    def _get_pool(self, url: str) -> _ConnectionPool:
+        """Get (creating if necessary) the connection pool for a base URL."""
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc, parts.path.rstrip("/"))
+        with self._lock:
+            if key not in self._pools:
+                self._pools[key] = _ConnectionPool(
+                    url,
+                    self._get_ssl_context,
+                    self.timeout,
+                )
+            return self._pools[key]
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        with self._lock:
+            pools = list(self._pools.values())
+        for pool in pools:
+            pool.close()
+
+    def _get_leader_pool(self) -> _ConnectionPool:
+        """
+        Get the connection pool for the cluster's active node, (re)discovering
+        it if the cached value has expired or been forgotten. Falls back on
+        vault_url if the leader cannot be determined.
+        """
+        with self._leader_lock:
+            now = time.monotonic()
+            if (
+                self._leader_pool is None
+                or now - self._leader_discovered > self.LEADER_CACHE_TIMEOUT
+            ):
+                self._leader_pool = self._pool
+                self._leader_discovered = now
+                try:
+                    response = self._pool.send("GET", "/v1/sys/leader", None, {})
+                    leader = json.loads(response.body) if response.status == 200 else {}
+                except (OSError, HTTPException, ValueError):
+                    leader = {}
+                if (
+                    leader.get("ha_enabled")
+                    and not leader.get("is_self")
+                    and leader.get("leader_address")
+                ):
+                    self._leader_pool = self._get_pool(leader["leader_address"])
+            return self._leader_pool
+
+    def _forget_leader(self) -> None:
+        """Force the leader to be rediscovered before the next write."""
+        with self._leader_lock:
+            self._leader_pool = None
+
+    def _send(
+        self,
+        method: str,
+        api_path: str,
+        body: Optional[bytes],
+        headers: Dict[str, str],
+        json_filters: Optional[Dict[Tuple[str, ...], Callable]] = None,
+    ) -> _Response:
+        """
+        Send a request, routing it to the leader and following redirects as
+        appropriate. See _ConnectionPool.send for json_filters.
+
+        Raises VaultApiError if the request could not be made.
+        """
+        write = method not in ("GET", "LIST")
+        route_to_leader = self.leader_routing and write
+        pool = self._get_leader_pool() if route_to_leader else self._pool
+        path = api_path
+        redirects = 0
+        while True:
+            try:
+                response = pool.send(method, path, body, headers, json_filters)
+            except (OSError, HTTPException, ValueError) as exc:
+                if route_to_leader and pool is not self._pool:
+                    self._forget_leader()
+                    if isinstance(exc, ConnectionRefusedError):
+                        # The request was never received: retry via a newly
+                        # discovered leader
+                        route_to_leader = False
+                        pool = self._get_leader_pool()
+                        continue
+                raise VaultApiError(
+                    f"Request failed: {exc}",
+                    method=method,
+                    api_path=api_path,
+                ) from exc
+
+            if route_to_leader and response.status in (307, 503):
+                # Leadership may have changed: rediscover and try (once) more
+                self._forget_leader()
+                route_to_leader = False
+                new_pool = self._get_leader_pool()
+                if new_pool is not pool:
+                    pool = new_pool
+                    path = api_path
+                    continue
+
+            # Follow redirects (as fetch_url would for GET requests; Vault
+            # standbys may redirect any request when leader routing is used)
+            location = response.headers.get("location")
+            if (
+                response.status in (307, 308)
+                and location
+                and (method == "GET" or self.leader_routing)
+                and redirects < self.MAX_REDIRECTS
+            ):
+                redirects += 1
+                location = urlsplit(location)
+                if location.netloc:
+                    pool = self._get_pool(f"{location.scheme}://{location.netloc}")
+                    path = location.path
+                else:
+                    path = location.path[len(pool.base_path) :]
+                if location.query:
+                    path += f"?{location.query}"
+                continue
+
+            return response
+
+    def _send_with_retries(
+        self,
+        method: str,
+        api_path: str,
+        body: Optional[bytes],
+        headers: Dict[str, str],
+        expected_status: Tuple[int],
+        json_filters: Optional[Dict[Tuple[str, ...], Callable]] = None,
+    ) -> _Response:
+        """
+        Send a request (as _send), retrying transient failures as described
+        in the class docstring.
+        """
+        deadline = time.monotonic() + self.retry_timeout
+        attempt = 0
+        while True:
+            retry_after = None
+            error = None
+            try:
+                response = self._send(method, api_path, body, headers, json_filters)
+                if (
+                    response.status in expected_status
+                    or response.status not in RETRY_STATUSES
+                    or (
+                        method not in IDEMPOTENT_METHODS
+                        and response.status not in REJECTED_STATUSES
+                    )
+                ):
+                    return response
+                retry_after = _parse_retry_after(response.headers.get("retry-after"))
+            except VaultApiError as exc:
+                # NB: Connection failures are only retried for idempotent
+                # requests (or where the connection was refused) since we
+                # can't know if the request was processed.
+                if method not in IDEMPOTENT_METHODS and not isinstance(
+                    exc.__cause__, ConnectionRefusedError
+                ):
+                    raise
+                error = exc
+
+            # Exponential backoff with 'full' jitter
+            delay = random.uniform(
+                0,
+                min(self.RETRY_MAX_DELAY, self.RETRY_INITIAL_DELAY * (2 ** attempt)),
+            )
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            attempt += 1
+
+            if time.monotonic() + delay > deadline:
+                if error is not None:
+                    raise error
+                return response
+
+            time.sleep(delay)
+
+    def _invalidate_cache(self, api_path: str) -> None:
+        """
+        Discard cached responses which may be affected by a write to api_path:
+        those for the path itself, any of its parents (e.g. listings) and any
+        of its children.
+        """
+        written = _normalise_api_path(api_path)
+        with self._lock:
+            self._cache_generation += 1
+            for key in list(self._cache):
+                cached = key[1]
+                if (
+                    cached == written
+                    or written.startswith(cached + "/")
+                    or cached.startswith(written + "/")
+                ):
+                    del self._cache[key]
+
+    def clear_cache(self) -> None:
+        """Discard all cached responses."""
+        with self._lock:
+            self._cache_generation += 1
+            self._cache.clear()
+
+    def _record(
+        self,
+        method: str,
+        api_path: str,
+        bytes_out: int,
+        response: Optional[_Response],
+        cached: bool,
+        latency: float,
+    ) -> None:
+        """
+        Record the outcome of a request in the aggregate statistics (and trace
+        file, if enabled).
+        """
+        template = get_api_path_template(api_path)
+        status = response.status if response is not None else None
+        bytes_in = response.body_size if response is not None else 0
+        reused = response.reused if response is not None else False
+
+        with self._lock:
+            stats = self._stats.setdefault(
+                (method, template),
+                {
+                    "method": method,
+                    "path": template,
+                    "count": 0,
+                    "cached": 0,
+                    "errors": 0,
+                    "reused_connections": 0,
+                    "bytes_in": 0,
+                    "bytes_out": 0,
+                    "total_time": 0.0,
+                    "max_time": 0.0,
+                    "statuses": {},
+                },
+            )
+            stats["count"] += 1
+            stats["cached"] += int(cached)
+            stats["errors"] += int(status is None)
+            stats["reused_connections"] += int(reused)
+            stats["bytes_in"] += bytes_in
+            stats["bytes_out"] += bytes_out
+            stats["total_time"] += latency
+            stats["max_time"] = max(stats["max_time"], latency)
+            stats["statuses"][str(status)] = stats["statuses"].get(str(status), 0) + 1
+
+            if self._trace_file:
+                event = {
+                    "time": time.time(),
+                    "pid": os.getpid(),
+                    "module": getattr(self.module, "_name", None),
+                    "method": method,
+                    "path": template,
+                    "status": status,
+                    "bytes_in": bytes_in,
+                    "bytes_out": bytes_out,
+                    "reused_connection": reused,
+                    "cached": cached,
+                    "latency": latency,
+                }
+                with open(self._trace_file, "a") as f:
+                    f.write(json.dumps(event) + "\n")
+
+    def get_stats(self) -> dict:
+        """
+        Return a summary of the requests made by this client, with per-endpoint
+        (method and path template) statistics. Times are in seconds.
+        """
+        with self._lock:
+            endpoints = [dict(stats) for stats in self._stats.values()]
+        for stats in endpoints:
+            stats["mean_time"] = stats["total_time"] / stats["count"]
+        return {
+            "requests": sum(stats["count"] for stats in endpoints),
+            "cached": sum(stats["cached"] for stats in endpoints),
+            "errors": sum(stats["errors"] for stats in endpoints),
+            "reused_connections": sum(s["reused_connections"] for s in endpoints),
+            "bytes_in": sum(stats["bytes_in"] for stats in endpoints),
+            "bytes_out": sum(stats["bytes_out"] for stats in endpoints),
+            "total_time": sum(stats["total_time"] for stats in endpoints),
+            "endpoints": sorted(endpoints, key=lambda s: (s["path"], s["method"])),
+        }
+
+    def reset_stats(self) -> None:
+        """Discard all recorded request statistics."""
+        with self._lock:
+            self._stats.clear()
+
+    def _send_many(
+        self,
+        requests: List[tuple],
+        concurrency: int,
+        json_filters: Optional[Dict[Tuple[str, ...], Callable]] = None,
+    ) -> List[Tuple[Union[_Response, VaultApiError], float]]:
+        """
+        Send a series of (method, api_path, body, headers, expected_status)
+        requests (as _send_with_retries) with at most 'concurrency' in flight
+        at once.
+
+        Returns a list of (response, latency) tuples in the same order as the
+        requests, where response is a VaultApiError if the request could not
+        be made.
+        """
+
+        def send(request: tuple) -> Tuple[Union[_Response, VaultApiError], float]:
+            start = time.monotonic()
+            try:
+                response = self._send_with_retries(*request, json_filters)
+            except VaultApiError as exc:
+                response = exc
+            return (response, time.monotonic() - start)
+
+        if len(requests) <= 1 or concurrency <= 1:
+            return [send(request) for request in requests]
+
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(requests))) as pool:
+            return list(pool.map(send, requests))
+
+    def _request_many(
+        self,
+        requests: List[tuple],
+        concurrency: int,
+        cache: bool,
+        json_filters: Optional[Dict[Tuple[str, ...], Callable]] = None,
+    ) -> List[Union[Any, VaultApiError]]:
+        """
+        Implements request and request_many: makes a series of (method,
+        api_path, data, expected_status) requests, serving GET and LIST
+        requests from the cache where possible and sending the remainder
+        using _send_many.
+        """
+        headers = {}
+        if self.vault_token:
+            headers["X-Vault-Token"] = self.vault_token
+        if self.vault_namespace:
+            headers["X-Vault-Namespace"] = self.vault_namespace
+
+        # Look up cached responses and encode request bodies. Each entry is
+        # a (method, api_path, data, expected_status, body, cached, generation)
+        # tuple where data is the JSON encoded payload (if any).
+        prepared = []
+        for method, api_path, data, expected_status in requests:
+            cached = None
+            generation = None
+            if method in ("GET", "LIST"):
+                if cache:
+                    with self._lock:
+                        cached = self._cache.get(
+                            (method, _normalise_api_path(api_path))
+                        )
+                        generation = self._cache_generation
+            else:
+                self._invalidate_cache(api_path)
+
+            request_headers = headers
+            body = None
+            if data is not None:
+                data = json.dumps(data)
+                body = data.encode("utf-8")
+                request_headers = dict(headers)
+                if method != "PATCH":
+                    request_headers["Content-Type"] = "application/json"
+                else:
+                    request_headers["Content-Type"] = "application/merge-patch+json"
+
+            prepared.append(
+                (
+                    method,
+                    api_path,
+                    data,
+                    expected_status,
+                    (method, api_path, body, request_headers, expected_status),
+                    cached,
+                    generation,
+                )
+            )
+
+        sent = iter(
+            self._send_many(
+                [request[4] for request in prepared if request[5] is None],
+                concurrency,
+                json_filters,
+            )
+        )
+
+        results = []
+        for method, api_path, data, expected_status, send, cached, generation in prepared:
+            if cached is None:
+                response, latency = next(sent)
+                if method not in ("GET", "LIST"):
+                    # Invalidate again to catch reads made while the write was
+                    # in flight
+                    self._invalidate_cache(api_path)
+            else:
+                response, latency = (cached, 0.0)
+
+            failed = isinstance(response, VaultApiError)
+            self._record(
+                method,
+                api_path,
+                len(send[2] or b""),
+                None if failed else response,
+                cached is not None,
+                latency,
+            )
+            if failed:
+                results.append(response)
+                continue
+
+            try:
+                results.append(
+                    self._unpack_response(
+                        method, api_path, data, expected_status, response
+                    )
+                )
+            except VaultApiError as exc:
+                results.append(exc)
+                continue
+
+            if generation is not None and cached is None:
+                with self._lock:
+                    if generation == self._cache_generation:
+                        self._cache[(method, _normalise_api_path(api_path))] = response
+
+        return results
+
+    def _unpack_response(
+        self,
+        method: str,
+        api_path: str,
+        data: Optional[str],
+        expected_status: Tuple[int],
+        response: _Response,
+    ) -> Any:
+        """
+        Check a response's status and decode its body (see request).
+        """
+        # Check status code
+        if response.status not in expected_status:
+            raise VaultApiError(
+                f"Got {response.status} status, expected {expected_status}",
+                method=method,
+                api_path=api_path,
+                data=data,
+                status=response.status,
+                response_body=response.body,
+            )
+
+        # Unpack JSON response (if JSON)
+        if response.status == 204:
+            return None
+        elif response.decoded is not None:
+            data = response.decoded.get("data") or {}
+            if "keys" in data and "key_info" in data:
+                # In case 'keys' preceded 'key_info' (see _key_info_json_filters)
+                data["keys"] = [key for key in data["keys"] if key in data["key_info"]]
+            return response.decoded
+        elif response.body and response.content_type == "application/json":
+            return _json_loads(response.body)
+        else:
+            return response.body
+
+    def request(
+        self,
+        api_path: str,
+        method: str = "GET",
+        data: Any = None,
+        expected_status: Tuple[int] = (200, 204),
+        cache: bool = False,
+        key_info_filter: Optional[Callable[[str, Any], bool]] = None,
+    ) -> Any:
+        """
+        Make a Vault API request. See vault_api_request for details of the
+        arguments and return value.
+
+        If cache is True and this is a GET or LIST request, a previously
+        cached response will be returned if available, otherwise the response
+        will be cached. Any other request invalidates cached responses for the
+        same path, its parents and its children.
+
+        If key_info_filter is given, the response is decoded as it streams in
+        and only the 'key_info' entries for which key_info_filter(key, info)
+        returns True (and the matching 'keys') are retained. Such responses
+        are never cached.
+
+        Raises VaultApiError on connection failures or when the response status
+        is not one of expected_status.
+        """
+        json_filters = None
+        if key_info_filter is not None:
+            cache = False
+            json_filters = _key_info_json_filters(key_info_filter)
+
+        (response,) = self._request_many(
+            [(method, api_path, data, expected_status)], 1, cache, json_filters
+        )
+        if isinstance(response, VaultApiError):
+            raise response
+        return response
+
+    def request_many(
+        self,
+        requests: Iterable[tuple],
+        concurrency: int = DEFAULT_CONCURRENCY,
+        cache: bool = False,
+    ) -> List[Union[Any, VaultApiError]]:
+        """
+        Make a series of independent Vault API requests concurrently.
+
+        Each request is a (method, api_path, data, expected_status) tuple.
+        Trailing values may be omitted, in which case data defaults to None
+        and expected_status to (200, 204).
+
+        At most 'concurrency' requests will be in flight at once. Returns a
+        list of responses in the same order as the requests. Requests which
+        fail have a VaultApiError in place of their response.
+
+        The cache argument applies to every request, as for request().
+        Requests are served from the cache as it was before any of the
+        requests were made.
+        """
+        requests = [_expand_request_tuple(request) for request in requests]
+        return self._request_many(requests, concurrency, cache)
+
+
+class PersistentVaultClient(VaultClient):
+    """
+    A VaultClient which sends its requests via a persistent
+    'bbcrd.vault.vault_api' connection (identified by socket_path) rather than
+    connecting to Vault itself.
+
+    The connection's process keeps its own VaultClient alive for the whole
+    play, so its keep-alive connections (and so TLS sessions), loaded CA
+    bundle and discovered leader are shared by every task using the
+    connection. Caching, request statistics and response decoding are still
+    handled by this client, as usual.
+
+    Each call to request_many is forwarded to the connection in a single
+    round trip and sent concurrently from there. (Filtered responses, see
+    request's key_info_filter, are transferred in full and filtered here.)
+    """
+
+    def __init__(self, socket_path: str, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._connection = _PersistentConnection(socket_path)
+
+    def _send_many(
+        self,
+        requests: List[tuple],
+        concurrency: int,
+        json_filters: Optional[Dict[Tuple[str, ...], Callable]] = None,
+    ) -> List[Tuple[Union[_Response, VaultApiError], float]]:
+        if not requests:
+            return []
+
+        try:
+            sent = self._connection.vault_send_many(
+                self.vault_url,
+                self.vault_ca_path,
+                self.leader_routing,
+                self.retry_timeout,
+                [
+                    (
+                        method,
+                        api_path,
+                        body.decode("utf-8") if body is not None else None,
+                        headers,
+                        list(expected_status),
+                    )
+                    for method, api_path, body, headers, expected_status in requests
+                ],
+                concurrency,
+            )
+        except _PersistentConnectionError as exc:
+            return [
+                (
+                    VaultApiError(
+                        f"Persistent connection request failed: {exc}",
+                        method=method,
+                        api_path=api_path,
+                    ),
+                    0.0,
+                )
+                for method, api_path, *_ in requests
+            ]
+
+        responses = []
+        for (method, api_path, *_), (response, latency) in zip(requests, sent):
+            if isinstance(response, dict):
+                # NB: Errors are returned as a dict (see the connection plugin)
+                response = VaultApiError(
+                    response["msg"], method=method, api_path=api_path
+                )
+            else:
+                response = _Response(*response)
+                if (
+                    json_filters is not None
+                    and response.status == 200
+                    and response.content_type == "application/json"
+                ):
+                    try:
+                        decoded = _StreamingJsonDecoder(
+                            io.BytesIO(response.body).read
+                        ).decode(json_filters)
+                    except ValueError as exc:
+                        response = VaultApiError(
+                            f"Request failed: {exc}",
+                            method=method,
+                            api_path=api_path,
+                        )
+                    else:
+                        response = response._replace(body=b"", decoded=decoded)
+            responses.append((response, latency))
+        return responses
+
+
+def _expand_request_tuple(request: tuple) -> tuple:
+    """
+    Expand a (method, api_path[, data[, expected_status]]) tuple into a full
+    four-tuple.
+    """
+    method, api_path, data, expected_status = tuple(request) + (
+        None,
+        (200, 204),
+    )[len(request) - 2 :]
+    return (method, api_path, data, expected_status)
+
+
+def _key_info_json_filters(
+    key_info_filter: Callable[[str, Any], bool]
+) -> Dict[Tuple[str, ...], Callable[[Any, Any], bool]]:
+    """
+    Produce a set of _StreamingJsonDecoder filters for a LIST response which
+    keep only the 'key_info' entries accepted by key_info_filter, and the
+    corresponding 'keys'.
+    """
+    key_info_seen = False
+    kept_keys = set()
+
+    def keep_key_info(key: str, info: Any) -> bool:
+        nonlocal key_info_seen
+        key_info_seen = True
+        if key_info_filter(key, info):
+            kept_keys.add(key)
+            return True
+        return False
+
+    def keep_key(index: int, key: str) -> bool:
+        # NB: Vault sorts object keys so key_info normally comes first. If it
+        # doesn't, all keys are kept here and filtered afterwards.
+        return key in kept_keys or not key_info_seen
+
+    return {("data", "key_info"): keep_key_info, ("data", "keys"): keep_key}
+
+
+def get_api_path_template(api_path: str) -> str:
+    """
+    Return a version of an API path with variable components (mount points,
+    names and IDs) replaced with placeholders, e.g.
+    "/v1/identity/entity/name/{name}". Intended for grouping requests by
+    endpoint and avoiding recording potentially sensitive names.
+    """
+    api_path = api_path.partition("?")[0]
+    for pattern, template in _API_PATH_TEMPLATES:
+        if pattern.match(api_path):
+            return pattern.sub(template, api_path)
+    return _ID_SEGMENT.sub("{id}", api_path)
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header value (either a number of seconds or an HTTP
+    date) into a number of seconds. Returns None if absent or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _normalise_api_path(api_path: str) -> str:
+    """
+    Normalise an API path for use as a cache key: the query string and any
+    trailing slash are removed.
+    """
+    return api_path.partition("?")[0].rstrip("/")
+
+
+_vault_clients: Dict[tuple, VaultClient] = {}
+_vault_clients_lock = threading.Lock()
+
+
+def get_vault_client(module: AnsibleModule) -> VaultClient:
+    """
+    Get the (shared) VaultClient for the Vault server, namespace and
+    credentials given in the module's arguments.
+
+    The client (and its pool of keep-alive connections) persists for the
+    lifetime of the module's process, so every vault_api_request call made by
+    the module shares the same connections.
+
+    Cached responses (see vault_api_request's cache argument) and request
+    statistics are only retained for as long as the client is used with the
+    same module instance.
+
+    If the task is using a persistent 'bbcrd.vault.vault_api' connection, a
+    PersistentVaultClient which sends requests via that connection is
+    returned instead.
+    """
+    socket_path = getattr(module, "_socket_path", None)
+    key = (
+        socket_path,
+        module.params["vault_url"],
+        module.params["vault_namespace"],
+        module.params["vault_token"],
+        module.params["vault_ca_path"],
+        module.params["vault_leader_routing"],
+        module.params["vault_retry_timeout"],
+    )
+    with _vault_clients_lock:
+        if key not in _vault_clients:
+            if socket_path:
+                _vault_clients[key] = PersistentVaultClient(*key)
+            else:
+                _vault_clients[key] = VaultClient(*key[1:])
+        client = _vault_clients[key]
+        if client.module is not module:
+            client.clear_cache()
+            client.reset_stats()
+            client.module = module
+        return client
 
 
 def get_vault_api_request_argument_spec() -> dict:
@@ -17,6 +1301,11 @@ def get_vault_api_request_argument_spec() -> dict:
         vault_namespace=dict(type="str", required=False, default=""),
         vault_token=dict(type="str", required=False),
         vault_ca_path=dict(type="str", required=False),
+        vault_leader_routing=dict(type="bool", required=False, default=False),
+        vault_retry_timeout=dict(
+            type="float", required=False, default=DEFAULT_RETRY_TIMEOUT
+        ),
+        vault_request_stats=dict(type="bool", required=False, default=False),
     )
 
 
@@ -26,6 +1315,8 @@ def vault_api_request(
     method: str = "GET",
     data: Any = None,
     expected_status: Tuple[int] = (200, 204),
+    cache: bool = False,
+    key_info_filter: Optional[Callable[[str, Any], bool]] = None,
 ) -> Any:
     """
     Make a vault API request using the base URL, CA certificate and vault token
@@ -40,53 +1331,80 @@ def vault_api_request(
     was returned.
 
     Status codes outside expected_status will be treated as a fatal error.
-    """
-    vault_url = module.params["vault_url"]
-    vault_namespace = module.params["vault_namespace"]
-    vault_token = module.params["vault_token"]
-    vault_ca_path = module.params["vault_ca_path"]
-
-    headers = {}
-    if vault_token:
-        headers["X-Vault-Token"] = vault_token
-    if vault_namespace:
-        headers["X-Vault-Namespace"] = vault_namespace
-
-    if data is not None:
-        data = json.dumps(data)
-        if method != "PATCH":
-            headers["Content-Type"] = "application/json"
-        else:
-            headers["Content-Type"] = "application/merge-patch+json"
-
-    response, info = fetch_url(
-        module,
-        f"{vault_url}{api_path}",
-        method=method,
-        data=data,
-        headers=headers,
-        ca_path=vault_ca_path,
-    )
-    if response is None:
-        module.fail_json(info)
 
-    # Retrieve response
-    response_body = response.read() if info["status"] < 400 else info["body"]
+    If cache is True, GET and LIST responses are cached and reused by later
+    cached requests for the same path. Cached responses are discarded when any
+    other request is made to the same path, one of its parents or one of its
+    children.
+
+    If key_info_filter is given (typically for LIST requests), the response
+    is decoded incrementally as it is received and only the entries of
+    data.key_info for which key_info_filter(key, info) returns True (and the
+    corresponding data.keys) are kept. This keeps memory usage down when only
+    a few entries of a very large listing are required. Filtered responses
+    are not cached.
 
-    # Check status code
-    if info["status"] not in expected_status:
-        module.fail_json(
-            msg=f"Got {info['status']} status, expected {expected_status}",
+    Requests are made via a shared VaultClient (see get_vault_client) so that
+    connections to the Vault server are reused between calls.
+    """
+    try:
+        return get_vault_client(module).request(
+            api_path,
             method=method,
-            api_path=api_path,
             data=data,
-            response_body=response_body,
+            expected_status=expected_status,
+            cache=cache,
+            key_info_filter=key_info_filter,
         )
+    except VaultApiError as exc:
+        module.fail_json(**exc.fail_json_kwargs())
+
+
+def vault_api_request_many(
+    module: AnsibleModule,
+    requests: Iterable[tuple],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    ignore_errors: bool = False,
+    cache: bool = False,
+) -> List[Any]:
+    """
+    Make a series of independent Vault API requests concurrently using the
+    Vault server details supplied to the module.
 
-    # Unpack JSON response (if JSON)
-    if info["status"] == 204:
-        response_body = None
-    elif response_body and info.get("content-type") == "application/json":
-        response_body = json.loads(response_body)
+    Each request is a (method, api_path, data, expected_status) tuple whose
+    values have the same meaning as the corresponding vault_api_request
+    arguments. The data and expected_status values may be omitted.
 
-    return response_body
+    At most 'concurrency' requests will be made at once. The responses are
+    returned in a list in the same order as the requests.
+
+    If any request fails, the first failure (in request order) is treated as
+    a fatal error. If ignore_errors is True, failed requests instead have a
+    VaultApiError in place of their response in the returned list.
+
+    The cache argument applies to all requests, as for vault_api_request.
+    """
+    responses = get_vault_client(module).request_many(requests, concurrency, cache)
+
+    if not ignore_errors:
+        for response in responses:
+            if isinstance(response, VaultApiError):
+                module.fail_json(**response.fail_json_kwargs())
+
+    return responses
+
+
+def vault_api_request_stats(module: AnsibleModule) -> dict:
+    """
+    Return the statistics for the Vault API requests made by this module, if
+    the module's vault_request_stats argument is true, in a dictionary to be
+    merged into the module's result. For example::
+
+        module.exit_json(**result, **vault_api_request_stats(module))
+
+    The statistics are returned under the 'vault_request_stats' key. If
+    statistics weren't requested, an empty dictionary is returned.
+    """
+    if not module.params["vault_request_stats"]:
+        return {}
+    return {"vault_request_stats": get_vault_client(module).get_stats()}
@@ -0,0 +1,93 @@
+"""
+Support for running the Vault API modules in this collection directly on the
+control node (as action plugins) rather than on the managed host.
+"""
+
+from typing import Iterator
+
+import io
+import json
+import importlib
+from contextlib import contextmanager, redirect_stdout
+
+from ansible.module_utils import basic
+from ansible.module_utils.parsing.convert_bool import boolean
+from ansible.plugins.action import ActionBase
+
+
+RUN_ON_CONTROLLER_VARIABLE = "bbcrd_vault_run_on_controller"
+"""
+The variable which, when true, causes the Vault API modules to be run
+in-process on the control node.
+"""
+
+
+@contextmanager
+def _module_args(args: dict) -> Iterator[None]:
+    """
+    Make the given arguments available to AnsibleModule instances created
+    within this context.
+    """
+    try:
+        # ansible-core >= 2.19
+        from ansible.module_utils.testing import patch_module_args
+    except ImportError:
+        patch_module_args = None
+
+    if patch_module_args is not None:
+        with patch_module_args(args):
+            yield
+    else:
+        old_args = basic._ANSIBLE_ARGS
+        basic._ANSIBLE_ARGS = json.dumps({"ANSIBLE_MODULE_ARGS": args}).encode()
+        try:
+            yield
+        finally:
+            basic._ANSIBLE_ARGS = old_args
+
+
+class VaultModuleActionBase(ActionBase):
+    """
+    Base class for action plugins which accompany the Vault API modules of the
+    same name.
+
+    By default, the module is executed on the managed host as usual. When the
+    'bbcrd_vault_run_on_controller' variable is true, the module's code is
+    instead run in-process on the control node, avoiding the overhead of
+    packaging the module, copying it to the managed host and starting a fresh
+    Python interpreter. (Since these modules only make Vault API requests,
+    this is only appropriate when Vault is reachable from the control node
+    and vault_ca_path, if given, refers to a file on the control node.)
+
+    Vault API connections are shared with any other modules run in the same
+    worker process (see get_vault_client).
+    """
+
+    def run(self, tmp=None, task_vars=None):
+        result = super().run(tmp, task_vars)
+        task_vars = task_vars or {}
+
+        run_on_controller = boolean(
+            self._templar.template(task_vars.get(RUN_ON_CONTROLLER_VARIABLE, False)),
+            strict=False,
+        )
+        if not run_on_controller or self._task.async_val:
+            result.update(self._execute_module(task_vars=task_vars))
+            return result
+
+        module_name = (self._task.resolved_action or self._task.action).split(".")[-1]
+        module_args = self._task.args.copy()
+        self._update_module_args(module_name, module_args, task_vars)
+        module_args.pop("_ansible_tmpdir", None)
+
+        module = importlib.import_module(
+            f"ansible_collections.bbcrd.vault.plugins.modules.{module_name}"
+        )
+        stdout = io.StringIO()
+        with _module_args(module_args), redirect_stdout(stdout):
+            try:
+                module.main()
+            except SystemExit:
+                pass
+        result.update(json.loads(stdout.getvalue()))
+        return result
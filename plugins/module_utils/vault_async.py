@@ -0,0 +1,415 @@
+"""
+An asyncio-native Vault API client.
+
+This is the asyncio counterpart to the blocking VaultClient in the vault
+module_utils, intended for tools (rather than Ansible modules) which need to
+make large numbers of concurrent Vault API requests. It takes the same
+vault_url, vault_namespace, vault_token and vault_ca_path arguments as
+vault_api_request.
+
+This module is self-contained: it uses only the Python standard library (and
+does not import Ansible or the rest of this collection) so that standalone
+scripts (such as those in utils/) can load it directly from its file.
+
+Basic usage::
+
+    async with AsyncVaultClient(vault_url, vault_token=token) as client:
+        policies = await client.list("/v1/sys/policies/acl")
+        responses = await client.gather(
+            ("GET", f"/v1/sys/policies/acl/{name}")
+            for name in policies["data"]["keys"]
+        )
+
+Requests are pipelined: several requests may be written to a single HTTP/1.1
+keep-alive connection before their responses arrive (which are then read back
+in order), spread over a small pool of connections.
+"""
+
+from typing import Any, Optional, Tuple, List, Iterable, Union, Dict
+
+import ssl
+import json
+import asyncio
+from collections import deque
+from urllib.parse import urlsplit
+
+try:
+    # Optional faster JSON decoder
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+
+# NB: The following mirror their counterparts in the vault module_utils
+
+DEFAULT_TIMEOUT = 10
+"""
+Default timeout (seconds) for connecting and for each Vault API request.
+"""
+
+DEFAULT_CONCURRENCY = 8
+"""
+Default maximum number of concurrent requests made by
+AsyncVaultClient.gather.
+"""
+
+DEFAULT_MAX_CONNECTIONS = 4
+"""
+Default maximum number of connections an AsyncVaultClient will open.
+"""
+
+
+class VaultApiError(Exception):
+    """
+    Raised by AsyncVaultClient when a request could not be made or when a
+    response with an unexpected status code is received.
+    """
+
+    def __init__(
+        self,
+        msg: str,
+        method: str,
+        api_path: str,
+        data: Any = None,
+        status: Optional[int] = None,
+        response_body: Any = None,
+    ) -> None:
+        super().__init__(msg)
+        self.msg = msg
+        self.method = method
+        self.api_path = api_path
+        self.data = data
+        self.status = status
+        self.response_body = response_body
+
+
+def _expand_request_tuple(request: tuple) -> tuple:
+    """
+    Expand a (method, api_path[, data[, expected_status]]) tuple into a full
+    four-tuple.
+    """
+    method, api_path, data, expected_status = tuple(request) + (
+        None,
+        (200, 204),
+    )[len(request) - 2 :]
+    return (method, api_path, data, expected_status)
+
+
+class _AsyncConnection:
+    """
+    A single HTTP/1.1 connection supporting request pipelining.
+
+    Requests are written in the order send() is called and a background task
+    reads back the responses in the same order, resolving the corresponding
+    futures.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self._pending = deque()
+        self._reader_task = None
+        self.closed = False
+
+    @property
+    def num_pending(self) -> int:
+        return len(self._pending)
+
+    def is_usable(self) -> bool:
+        """True if this connection can accept another request."""
+        return not self.closed and not self._reader.at_eof()
+
+    def send(self, request: bytes) -> asyncio.Future:
+        """
+        Write a fully encoded request to the connection. Returns a future
+        which will be resolved with the (status, headers, body) of the
+        response, with header names in lower case.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(future)
+        self._writer.write(request)
+        if self._reader_task is None or self._reader_task.done():
+            self._reader_task = asyncio.ensure_future(self._read_responses())
+        return future
+
+    async def drain(self) -> None:
+        await self._writer.drain()
+
+    async def _read_responses(self) -> None:
+        """Read responses for all pending requests, in order."""
+        try:
+            while self._pending:
+                response = await self._read_response()
+                future = self._pending.popleft()
+                if not future.done():  # i.e. not timed out
+                    future.set_result(response)
+                if response[1].get("connection", "").lower() == "close":
+                    self.closed = True
+                    break
+        except Exception as exc:
+            self.closed = True
+            if self._pending:
+                future = self._pending.popleft()
+                if not future.done():
+                    future.set_exception(exc)
+        finally:
+            # Anything still pending will never get a response
+            while self._pending:
+                future = self._pending.popleft()
+                if not future.done():
+                    future.set_exception(
+                        ConnectionError("Connection closed by server")
+                    )
+            if self.closed:
+                self._writer.close()
+
+    async def _read_response(self) -> Tuple[int, Dict[str, str], bytes]:
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise ConnectionError("Connection closed by server")
+        status = int(status_line.split()[1])
+
+        headers = {}
+        while (line := await self._reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if status == 204 or status == 304 or 100 <= status < 200:
+            body = b""
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await self._reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    # Skip trailers
+                    while (await self._reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                chunks.append(await self._reader.readexactly(size))
+                await self._reader.readline()
+            body = b"".join(chunks)
+        elif "content-length" in headers:
+            body = await self._reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await self._reader.read()
+            headers["connection"] = "close"
+
+        return (status, headers, body)
+
+    def close(self) -> None:
+        self.closed = True
+        self._writer.close()
+
+
+class AsyncVaultClient:
+    """
+    An asyncio Vault API client with a pool of pipelining keep-alive
+    connections.
+
+    The vault_url, vault_namespace, vault_token and vault_ca_path arguments
+    have the same meaning as the module arguments used by vault_api_request.
+    At most max_connections connections will be opened; when all are busy,
+    further requests are pipelined onto the least busy connection.
+    """
+
+    def __init__(
+        self,
+        vault_url: str = "https://localhost:8200",
+        vault_namespace: str = "",
+        vault_token: Optional[str] = None,
+        vault_ca_path: Optional[str] = None,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> None:
+        self.vault_url = vault_url
+        self.vault_namespace = vault_namespace
+        self.vault_token = vault_token
+        self.vault_ca_path = vault_ca_path
+        self.max_connections = max_connections
+        self.timeout = timeout
+
+        url = urlsplit(vault_url)
+        self._scheme = url.scheme
+        self._host = url.hostname
+        self._port = url.port or (443 if url.scheme == "https" else 80)
+        self._base_path = url.path.rstrip("/")
+
+        self._ssl_context = None
+        self._connections: List[_AsyncConnection] = []
+        self._connect_lock = None
+
+    async def __aenter__(self) -> "AsyncVaultClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Close all open connections."""
+        connections = self._connections
+        self._connections = []
+        for connection in connections:
+            connection.close()
+
+    async def _get_connection(self) -> _AsyncConnection:
+        """
+        Pick the connection to send the next request on, opening a new one if
+        all existing connections are busy and max_connections allows.
+        """
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+
+        async with self._connect_lock:
+            self._connections = [c for c in self._connections if c.is_usable()]
+            idle = [c for c in self._connections if c.num_pending == 0]
+            if idle:
+                return idle[0]
+            if len(self._connections) < self.max_connections:
+                if self._scheme == "https" and self._ssl_context is None:
+                    self._ssl_context = ssl.create_default_context(
+                        cafile=self.vault_ca_path
+                    )
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(
+                        self._host,
+                        self._port,
+                        ssl=self._ssl_context if self._scheme == "https" else None,
+                    ),
+                    self.timeout,
+                )
+                connection = _AsyncConnection(reader, writer)
+                self._connections.append(connection)
+                return connection
+            return min(self._connections, key=lambda c: c.num_pending)
+
+    def _encode_request(
+        self,
+        method: str,
+        api_path: str,
+        body: Optional[bytes],
+        content_type: Optional[str],
+    ) -> bytes:
+        host = self._host if self._port in (80, 443) else f"{self._host}:{self._port}"
+        lines = [
+            f"{method} {self._base_path}{api_path} HTTP/1.1",
+            f"Host: {host}",
+            "Accept: application/json",
+        ]
+        if self.vault_token:
+            lines.append(f"X-Vault-Token: {self.vault_token}")
+        if self.vault_namespace:
+            lines.append(f"X-Vault-Namespace: {self.vault_namespace}")
+        if content_type is not None:
+            lines.append(f"Content-Type: {content_type}")
+        lines.append(f"Content-Length: {len(body or b'')}")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("utf-8") + (body or b"")
+
+    async def request(
+        self,
+        api_path: str,
+        method: str = "GET",
+        data: Any = None,
+        expected_status: Tuple[int] = (200, 204),
+    ) -> Any:
+        """
+        Make a Vault API request. The arguments and return value have the
+        same meaning as for vault_api_request.
+
+        Raises VaultApiError on connection failures or when the response status
+        is not one of expected_status.
+        """
+        body = None
+        content_type = None
+        if data is not None:
+            data = json.dumps(data)
+            body = data.encode("utf-8")
+            if method != "PATCH":
+                content_type = "application/json"
+            else:
+                content_type = "application/merge-patch+json"
+
+        request = self._encode_request(method, api_path, body, content_type)
+        try:
+            connection = await self._get_connection()
+            response = connection.send(request)
+            await connection.drain()
+            status, headers, response_body = await asyncio.wait_for(
+                response,
+                self.timeout,
+            )
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as exc:
+            raise VaultApiError(
+                f"Request failed: {exc!r}",
+                method=method,
+                api_path=api_path,
+            ) from exc
+
+        if status not in expected_status:
+            raise VaultApiError(
+                f"Got {status} status, expected {expected_status}",
+                method=method,
+                api_path=api_path,
+                data=data,
+                status=status,
+                response_body=response_body,
+            )
+
+        if status == 204:
+            return None
+        elif (
+            response_body
+            and headers.get("content-type", "").split(";")[0].strip()
+            == "application/json"
+        ):
+            return _json_loads(response_body)
+        else:
+            return response_body
+
+    async def get(self, api_path: str, expected_status: Tuple[int] = (200,)) -> Any:
+        return await self.request(api_path, "GET", expected_status=expected_status)
+
+    async def list(self, api_path: str, expected_status: Tuple[int] = (200,)) -> Any:
+        return await self.request(api_path, "LIST", expected_status=expected_status)
+
+    async def post(
+        self,
+        api_path: str,
+        data: Any = None,
+        expected_status: Tuple[int] = (200, 204),
+    ) -> Any:
+        return await self.request(api_path, "POST", data, expected_status)
+
+    async def delete(
+        self,
+        api_path: str,
+        expected_status: Tuple[int] = (200, 204),
+    ) -> Any:
+        return await self.request(api_path, "DELETE", expected_status=expected_status)
+
+    async def gather(
+        self,
+        requests: Iterable[tuple],
+        concurrency: int = DEFAULT_CONCURRENCY,
+        return_exceptions: bool = False,
+    ) -> List[Union[Any, VaultApiError]]:
+        """
+        Make a series of Vault API requests concurrently, with at most
+        'concurrency' requests in flight at once.
+
+        Each request is a (method, api_path, data, expected_status) tuple, as
+        accepted by vault_api_request_many. Returns the responses in request
+        order. If return_exceptions is True, failed requests have their
+        VaultApiError in place of a response, otherwise the first failure is
+        raised.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def make_request(request: tuple) -> Any:
+            method, api_path, data, expected_status = _expand_request_tuple(request)
+            async with semaphore:
+                return await self.request(api_path, method, data, expected_status)
+
+        return await asyncio.gather(
+            *(make_request(request) for request in requests),
+            return_exceptions=return_exceptions,
+        )
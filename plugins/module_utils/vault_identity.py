@@ -0,0 +1,118 @@
+"""
+Helpers for resolving Vault identity entity and group names to IDs in bulk.
+"""
+
+from typing import Dict, Iterable, Optional
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.bbcrd.vault.plugins.module_utils.vault import (
+    vault_api_request,
+    vault_api_request_many,
+)
+
+
+def match_names(ids_by_name: Dict[str, str], names: Iterable[str]) -> Dict[str, str]:
+    """
+    Given a {name: id, ...} dictionary (e.g. as listed by Vault), return a
+    {name: id, ...} dictionary for those of the given names which appear in
+    it, keyed by the names given.
+
+    NB: Vault identity names are case-insensitive so names are matched
+    regardless of case.
+    """
+    ids_by_lower_name = {
+        name.lower(): object_id for name, object_id in ids_by_name.items()
+    }
+    return {
+        name: ids_by_lower_name[name.lower()]
+        for name in names
+        if name.lower() in ids_by_lower_name
+    }
+
+
+def _list_ids_by_name(
+    module: AnsibleModule, api_path: str, names: Optional[Iterable[str]]
+) -> Dict[str, str]:
+    """
+    LIST the identity objects at api_path returning a {name: id, ...}
+    dictionary. If names is given, only objects with those names (matched
+    case-insensitively, see match_names) are included, keyed by the names
+    given. Otherwise all objects are included, keyed by their names as listed.
+    """
+    key_info_filter = None
+    if names is not None:
+        names = list(names)
+        lower_names = {name.lower() for name in names}
+        key_info_filter = lambda object_id, params: (
+            params["name"].lower() in lower_names
+        )
+
+    ids_by_name = {
+        params["name"]: object_id
+        for object_id, params in vault_api_request(
+            module,
+            api_path,
+            method="LIST",
+            expected_status=[200, 404],
+            key_info_filter=key_info_filter,
+        )
+        .get("data", {})
+        .get("key_info", {})
+        .items()
+    }
+    if names is not None:
+        ids_by_name = match_names(ids_by_name, names)
+    return ids_by_name
+
+
+def list_entity_ids(
+    module: AnsibleModule, names: Optional[Iterable[str]] = None
+) -> Dict[str, str]:
+    """
+    Return a {name: id, ...} dictionary for all entities (or only those named,
+    see _list_ids_by_name) using a single LIST request.
+    """
+    return _list_ids_by_name(module, "/v1/identity/entity/id", names)
+
+
+def list_group_ids(
+    module: AnsibleModule, names: Optional[Iterable[str]] = None
+) -> Dict[str, str]:
+    """
+    Return a {name: id, ...} dictionary for all groups (or only those named,
+    see _list_ids_by_name) using a single LIST request.
+    """
+    return _list_ids_by_name(module, "/v1/identity/group/id", names)
+
+
+def create_entities(module: AnsibleModule, names: Iterable[str]) -> Dict[str, str]:
+    """
+    Create (concurrently) entities with the given names, returning a {name:
+    id, ...} dictionary.
+    """
+    names = list(dict.fromkeys(names))
+    entity_ids = {}
+
+    responses = vault_api_request_many(
+        module,
+        [("POST", f"/v1/identity/entity/name/{name}") for name in names],
+    )
+
+    # NB: If an entity already existed after all (e.g. due to a difference in
+    # case, or its concurrent creation) Vault will return no data and we must
+    # look it up.
+    unresolved_names = []
+    for name, response in zip(names, responses):
+        if response is None:
+            unresolved_names.append(name)
+        else:
+            entity_ids[name] = response["data"]["id"]
+
+    responses = vault_api_request_many(
+        module,
+        [("GET", f"/v1/identity/entity/name/{name}") for name in unresolved_names],
+    )
+    for name, response in zip(unresolved_names, responses):
+        entity_ids[name] = response["data"]["id"]
+
+    return entity_ids
@@ -3,7 +3,8 @@ import json
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.bbcrd.vault.plugins.module_utils.vault import (
     get_vault_api_request_argument_spec,
-    vault_api_request,
+    vault_api_request_many,
+    vault_api_request_stats,
 )
 from ansible_collections.bbcrd.vault.plugins.module_utils.dict_compare import (
     dict_issubset,
@@ -18,13 +19,23 @@ short_description: Manage an AppRole's secret_ids.
 options:
     approle_name:
         description: |-
-            Name of the role.
-        required: true
+            Name of the role. Exactly one of approle_name or approle_names
+            must be given.
+        required: false
         type: str
+    approle_names:
+        description: |-
+            A list of role names to manage the secret IDs of in bulk, as if
+            this module were run for each role in turn (with the same
+            arguments). The roles are processed concurrently and the new
+            secret IDs are returned in 'secrets'.
+        required: false
+        type: list
     secret_id:
         description: |-
             If given, specifies the secret to be set. If omitted, a secret ID
-            will be generated automatically by vault.
+            will be generated automatically by vault. (When approle_names is
+            used, the same secret is set for every role.)
         required: false
         type: str
     parameters:
@@ -84,6 +95,34 @@ options:
         default: none
         type: str
         default: null
+    vault_leader_routing:
+        description: |-
+            If true, discover the active node of the Vault cluster (using the
+            sys/leader endpoint) and send write requests directly to it rather
+            than to vault_url, which may be a standby node. The active node's
+            advertised API address must be reachable from the host running
+            this module.
+        required: false
+        default: false
+        type: bool
+    vault_retry_timeout:
+        description: |-
+            Requests which fail due to transient errors (e.g. rate limiting,
+            a sealed node or a leadership election) are retried with
+            exponential backoff for up to this many seconds. Only requests
+            which are safe to repeat are retried. Set to zero to disable
+            retries.
+        required: false
+        default: 60
+        type: float
+    vault_request_stats:
+        description: |-
+            If true, return a summary of the Vault API requests made by this
+            module (counts, bytes transferred and timings per endpoint) under
+            the 'vault_request_stats' key of the result.
+        type: bool
+        required: false
+        default: false
 """
 
 RETURN = r"""
@@ -97,6 +136,12 @@ secret_id_accessor:
         The secret ID accessor.
     type: str
     returned: unless state = "absent"
+secrets:
+    description: |-
+        A mapping from role names to dictionaries containing the new
+        'secret_id' and 'secret_id_accessor' for that role.
+    type: dict
+    returned: when approle_names is used, unless state = "absent"
 """
 
 EXAMPLES = r"""
@@ -107,13 +152,21 @@ EXAMPLES = r"""
       metadata:
         host: foobar.example.com
     state: "replaced"
+
+- name: Create (or replace) the secrets for many roles at once
+  bbcrd.vault.vault_approle_secret:
+    approle_names:
+      - foo.example.com
+      - bar.example.com
+  register: secrets
 """
 
 
 def run_module():
     # define available arguments/parameters a user can pass to the module
     module_args = dict(
-        approle_name=dict(type="str", required=True),
+        approle_name=dict(type="str", required=False),
+        approle_names=dict(type="list", elements="str", required=False),
         secret_id=dict(type="str", default=None),
         parameters=dict(type="dict", default={}),
         state=dict(
@@ -129,10 +182,18 @@ def run_module():
         **get_vault_api_request_argument_spec(),
     )
 
-    module = AnsibleModule(argument_spec=module_args)
+    module = AnsibleModule(
+        argument_spec=module_args,
+        mutually_exclusive=[("approle_name", "approle_names")],
+        required_one_of=[("approle_name", "approle_names")],
+    )
     result = {"changed": False}
 
     approle_name = module.params["approle_name"]
+    if approle_name is not None:
+        approle_names = [approle_name]
+    else:
+        approle_names = list(dict.fromkeys(module.params["approle_names"]))
     secret_id = module.params["secret_id"]
     state = module.params["state"]
     mount = module.params["mount"]
@@ -140,20 +201,25 @@ def run_module():
 
     # Remove existing secrets
     if state in ["absent", "singular"]:
-        secret_id_accessors = vault_api_request(
+        listings = vault_api_request_many(
             module,
-            f"/v1/auth/{mount}/role/{approle_name}/secret-id",
-            method="LIST",
-            expected_status=[200, 404],
-        ).get("data", {}).get("keys", [])
-        for secret_id_accessor in secret_id_accessors:
-            result["changed"] = True
-            vault_api_request(
-                module,
-                f"/v1/auth/{mount}/role/{approle_name}/secret-id-accessor/destroy",
-                method="POST",
-                data={"secret_id_accessor": secret_id_accessor},
+            [
+                ("LIST", f"/v1/auth/{mount}/role/{name}/secret-id", None, [200, 404])
+                for name in approle_names
+            ],
+        )
+        destroy_requests = [
+            (
+                "POST",
+                f"/v1/auth/{mount}/role/{name}/secret-id-accessor/destroy",
+                {"secret_id_accessor": secret_id_accessor},
             )
+            for name, listing in zip(approle_names, listings)
+            for secret_id_accessor in listing.get("data", {}).get("keys", [])
+        ]
+        if destroy_requests:
+            result["changed"] = True
+            vault_api_request_many(module, destroy_requests)
 
     # Generate new secret
     if state != "absent":
@@ -163,25 +229,35 @@ def run_module():
             parameters["metadata"] = json.dumps(parameters["metadata"])
         
         if secret_id is None:
-            response = vault_api_request(
-                module,
-                f"/v1/auth/{mount}/role/{approle_name}/secret-id",
-                method="POST",
-                data=parameters,
-            )
+            requests = [
+                ("POST", f"/v1/auth/{mount}/role/{name}/secret-id", parameters)
+                for name in approle_names
+            ]
         else:
-            response = vault_api_request(
-                module,
-                f"/v1/auth/{mount}/role/{approle_name}/custom-secret-id",
-                method="POST",
-                data=dict(parameters, secret_id=secret_id),
-            )
+            requests = [
+                (
+                    "POST",
+                    f"/v1/auth/{mount}/role/{name}/custom-secret-id",
+                    dict(parameters, secret_id=secret_id),
+                )
+                for name in approle_names
+            ]
+        responses = vault_api_request_many(module, requests)
 
         result["changed"] = True
-        result["secret_id"] = response["data"]["secret_id"]
-        result["secret_id_accessor"] = response["data"]["secret_id_accessor"]
+        secrets = {
+            name: {
+                "secret_id": response["data"]["secret_id"],
+                "secret_id_accessor": response["data"]["secret_id_accessor"],
+            }
+            for name, response in zip(approle_names, responses)
+        }
+        if approle_name is not None:
+            result.update(secrets[approle_name])
+        else:
+            result["secrets"] = secrets
 
-    module.exit_json(**result)
+    module.exit_json(**result, **vault_api_request_stats(module))
 
 
 def main():
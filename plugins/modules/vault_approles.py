@@ -3,6 +3,8 @@ from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.bbcrd.vault.plugins.module_utils.vault import (
     get_vault_api_request_argument_spec,
     vault_api_request,
+    vault_api_request_many,
+    vault_api_request_stats,
 )
 from ansible_collections.bbcrd.vault.plugins.module_utils.dict_compare import (
     dict_issubset,
@@ -32,6 +34,17 @@ options:
         required: false
         type: str
         default: "approle"
+    known_role_ids:
+        description: |-
+            An optional mapping from role names to their (already known) role
+            IDs, for example the 'role_ids' returned by a previous run of this
+            module. The role IDs of existing roles listed here are not
+            re-read from Vault, saving a request per role. (Role IDs only
+            change when a role is recreated or its role ID is explicitly
+            changed, in which case the new role ID is read.)
+        required: false
+        type: dict
+        default: {}
     vault_url:
         description: |-
           the base url of the vault server.
@@ -58,6 +71,34 @@ options:
         default: none
         type: str
         default: null
+    vault_leader_routing:
+        description: |-
+            If true, discover the active node of the Vault cluster (using the
+            sys/leader endpoint) and send write requests directly to it rather
+            than to vault_url, which may be a standby node. The active node's
+            advertised API address must be reachable from the host running
+            this module.
+        required: false
+        default: false
+        type: bool
+    vault_retry_timeout:
+        description: |-
+            Requests which fail due to transient errors (e.g. rate limiting,
+            a sealed node or a leadership election) are retried with
+            exponential backoff for up to this many seconds. Only requests
+            which are safe to repeat are retried. Set to zero to disable
+            retries.
+        required: false
+        default: 60
+        type: float
+    vault_request_stats:
+        description: |-
+            If true, return a summary of the Vault API requests made by this
+            module (counts, bytes transferred and timings per endpoint) under
+            the 'vault_request_stats' key of the result.
+        type: bool
+        required: false
+        default: false
 """
 
 RETURN = r"""
@@ -84,6 +125,7 @@ def run_module():
     module_args = dict(
         approles=dict(type="dict", required=True),
         mount=dict(type="str", default="approle"),
+        known_role_ids=dict(type="dict", default={}),
         **get_vault_api_request_argument_spec(),
     )
 
@@ -92,6 +134,7 @@ def run_module():
     
     approles = module.params["approles"]
     mount = module.params["mount"]
+    known_role_ids = module.params["known_role_ids"]
 
     existing_approle_names = vault_api_request(
         module,
@@ -101,42 +144,74 @@ def run_module():
     ).get("data", {}).get("keys", [])
 
     # Delete extra approles
-    for name in set(existing_approle_names) - set(approles):
+    delete_names = sorted(set(existing_approle_names) - set(approles))
+    if delete_names:
         result["changed"] = True
-        vault_api_request(module, f"/v1/auth/{mount}/role/{name}", method="DELETE")
+        vault_api_request_many(
+            module,
+            [("DELETE", f"/v1/auth/{mount}/role/{name}") for name in delete_names],
+        )
+
+    # To allow lazy YAML specification
+    approles = {name: parameters or {} for name, parameters in approles.items()}
+
+    # Read existing approles
+    read_names = [name for name in approles if name in existing_approle_names]
+    existing_parameters = {
+        name: response.get("data")
+        for name, response in zip(
+            read_names,
+            vault_api_request_many(
+                module,
+                [
+                    ("GET", f"/v1/auth/{mount}/role/{name}", None, (200, 404))
+                    for name in read_names
+                ],
+            ),
+        )
+    }
 
     # Create or update approles
-    for name, parameters in approles.items():
-        # To allow lazy YAML specification
-        if parameters is None:
-            parameters = {}
-        
-        existing_parameters = vault_api_request(
+    write_names = [
+        name
+        for name, parameters in approles.items()
+        if existing_parameters.get(name) is None
+        or any(
+            key not in existing_parameters[name]
+            or existing_parameters[name][key] != value
+            for key, value in parameters.items()
+        )
+    ]
+    if write_names:
+        result["changed"] = True
+        vault_api_request_many(
             module,
-            f"/v1/auth/{mount}/role/{name}",
-            expected_status=(200, 404),
-        ).get("data")
+            [
+                ("POST", f"/v1/auth/{mount}/role/{name}", approles[name])
+                for name in write_names
+            ],
+        )
+
+    # Lookup approle IDs (unless already known and unchanged)
+    for name in approles:
         if (
-            existing_parameters is None
-            or any(
-                key not in existing_parameters or existing_parameters[key] != value
-                for key, value in parameters.items()
-            )
+            existing_parameters.get(name) is not None
+            and name in known_role_ids
+            and "role_id" not in approles[name]
         ):
-            result["changed"] = True
-            vault_api_request(
-                module,
-                f"/v1/auth/{mount}/role/{name}",
-                method="POST",
-                data=parameters,
-            )
-        
-        # Lookup approle ID
-        result["role_ids"][name] = vault_api_request(
-            module, f"/v1/auth/{mount}/role/{name}/role-id"
-        )["data"]["role_id"]
-
-    module.exit_json(**result)
+            result["role_ids"][name] = known_role_ids[name]
+    lookup_names = [name for name in approles if name not in result["role_ids"]]
+    for name, response in zip(
+        lookup_names,
+        vault_api_request_many(
+            module,
+            [("GET", f"/v1/auth/{mount}/role/{name}/role-id") for name in lookup_names],
+        ),
+    ):
+        result["role_ids"][name] = response["data"]["role_id"]
+    result["role_ids"] = {name: result["role_ids"][name] for name in approles}
+
+    module.exit_json(**result, **vault_api_request_stats(module))
 
 
 def main():
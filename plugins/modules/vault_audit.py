@@ -4,6 +4,8 @@ from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.bbcrd.vault.plugins.module_utils.vault import (
     get_vault_api_request_argument_spec,
     vault_api_request,
+    vault_api_request_many,
+    vault_api_request_stats,
 )
 
 
@@ -21,13 +23,14 @@ options:
     mount: str
         description: |-
             The mount point of the audit device (without the trailing slash).
+            Required unless 'devices' is given.
         type: str
-        required: true
+        required: false
     type: str
         description: |-
-            The audit device type.
+            The audit device type. Required unless state is 'absent'.
         type: str
-        required: true
+        required: false
     description: str
         description: |-
             Human-readable description.
@@ -42,6 +45,35 @@ options:
     state:
         description: |-
             One of 'present' or 'absent'.
+    devices:
+        description: |-
+            Configure several audit devices at once. A dictionary from mount
+            points (without the trailing slash) to dictionaries with the keys
+            'type' (required unless state is 'absent'), 'description',
+            'options' and 'state' which have the same meaning as the
+            equivalent options of this module.
+            
+            All devices are reconciled against a single read of the existing
+            audit devices. New audit devices are enabled before any are
+            disabled so that replacing one audit device with another leaves
+            no gap in auditing. The exception is a device whose configuration
+            has changed: this must be recreated (disabled and then re-enabled
+            at the same mount point) and so misses any requests made in
+            between. If it is the only audit device enabled, those requests
+            are not audited at all.
+            
+            Mutually exclusive with 'mount', 'type', 'description', 'options'
+            and 'state'.
+        type: dict
+        required: false
+    prune:
+        description: |-
+            If true, any audit devices not enumerated in 'devices' will be
+            disabled (after all other changes have been made). Only valid with
+            'devices'.
+        type: bool
+        required: false
+        default: false
     vault_url:
         description: |-
           the base url of the vault server.
@@ -68,6 +100,34 @@ options:
         default: none
         type: str
         default: null
+    vault_leader_routing:
+        description: |-
+            If true, discover the active node of the Vault cluster (using the
+            sys/leader endpoint) and send write requests directly to it rather
+            than to vault_url, which may be a standby node. The active node's
+            advertised API address must be reachable from the host running
+            this module.
+        required: false
+        default: false
+        type: bool
+    vault_retry_timeout:
+        description: |-
+            Requests which fail due to transient errors (e.g. rate limiting,
+            a sealed node or a leadership election) are retried with
+            exponential backoff for up to this many seconds. Only requests
+            which are safe to repeat are retried. Set to zero to disable
+            retries.
+        required: false
+        default: 60
+        type: float
+    vault_request_stats:
+        description: |-
+            If true, return a summary of the Vault API requests made by this
+            module (counts, bytes transferred and timings per endpoint) under
+            the 'vault_request_stats' key of the result.
+        type: bool
+        required: false
+        default: false
 """
 
 EXAMPLES = r"""
@@ -77,12 +137,43 @@ EXAMPLES = r"""
     type: file
     options:
       file_path: stdout
+
+- name: Replace the stdout audit device with file and syslog devices
+  bbcrd.vault.vault_audit
+    devices:
+      file:
+        type: file
+        options:
+          file_path: /var/log/vault/audit.log
+      syslog:
+        type: syslog
+        options:
+          tag: vault
+    prune: true
 """
 
+DEVICE_PARAMETERS = ("type", "description", "options", "state")
+
+
+def device_differs(existing_device: dict, device: dict) -> bool:
+    """
+    Test whether an existing audit device's configuration differs from the
+    desired configuration (and so must be recreated).
+    """
+    return (
+        existing_device["type"] != device["type"]
+        or existing_device["description"] != device["description"]
+        or any(
+            key not in existing_device["options"] or existing_device["options"][key] != value
+            for key, value in device["options"].items()
+        )
+    )
+
+
 def run_module():
     module_args = dict(
-        mount=dict(type="str", required=True),
-        type=dict(type="str", required=True),
+        mount=dict(type="str", required=False),
+        type=dict(type="str", required=False),
         description=dict(type="str", default=""),
         options=dict(type="dict", default={}),
         state=dict(
@@ -90,66 +181,120 @@ def run_module():
             choices=["present", "absent"],
             default="present",
         ),
+        devices=dict(type="dict", required=False),
+        prune=dict(type="bool", required=False, default=False),
         **get_vault_api_request_argument_spec(),
     )
 
-    module = AnsibleModule(argument_spec=module_args)
+    module = AnsibleModule(
+        argument_spec=module_args,
+        mutually_exclusive=[
+            ("devices", "mount"),
+            ("devices", "type"),
+            ("devices", "description"),
+            ("devices", "options"),
+            ("devices", "state"),
+            ("mount", "prune"),
+        ],
+        required_one_of=[("mount", "devices")],
+    )
     result = {"changed": False}
 
-    mount = module.params["mount"]
-    type = module.params["type"]
-    description = module.params["description"]
-    options = module.params["options"]
-    state = module.params["state"]
-    
-    # Delete any audit device with the wrong config at this mount point
-    audit_devices = vault_api_request(module, f"/v1/sys/audit").get("data", {})
-    existing_device = audit_devices.get(f"{mount}/")
-    if (
-        existing_device is not None
-        and (
-            existing_device["type"] != type
-            or existing_device["description"] != description
-            or any(
-                key not in existing_device["options"] or existing_device["options"][key] != value
-                for key, value in options.items()
+    if module.params["devices"] is None:
+        device_parameters = {
+            module.params["mount"]: {
+                "type": module.params["type"],
+                "description": module.params["description"],
+                "options": module.params["options"],
+                "state": module.params["state"],
+            }
+        }
+    else:
+        device_parameters = module.params["devices"]
+
+    devices = {}
+    for mount, parameters in device_parameters.items():
+        mount = mount.rstrip("/")
+        # To allow lazy YAML specification
+        parameters = parameters or {}
+        unknown = set(parameters) - set(DEVICE_PARAMETERS)
+        if unknown:
+            module.fail_json(
+                msg=f"Unsupported parameters for audit device {mount}: {', '.join(sorted(unknown))}"
+            )
+        state = parameters.get("state") or "present"
+        if state not in ("present", "absent"):
+            module.fail_json(
+                msg=f"state for audit device {mount} must be one of: present, absent"
             )
+        if state == "present" and not parameters.get("type"):
+            module.fail_json(msg=f"'type' must be specified for audit device {mount}.")
+        devices[mount] = {
+            "type": parameters.get("type"),
+            "description": parameters.get("description") or "",
+            "options": parameters.get("options") or {},
+            "state": state,
+        }
+
+    audit_devices = {
+        mount.rstrip("/"): device
+        for mount, device in vault_api_request(module, f"/v1/sys/audit")
+        .get("data", {})
+        .items()
+    }
+
+    enable_mounts = []
+    recreate_mounts = []
+    disable_mounts = []
+    for mount, device in devices.items():
+        existing_device = audit_devices.get(mount)
+        if device["state"] == "present":
+            if existing_device is None:
+                enable_mounts.append(mount)
+            elif device_differs(existing_device, device):
+                recreate_mounts.append(mount)
+            # NB: Otherwise, its config is correct so no need to do anything
+        elif device["state"] == "absent":
+            if existing_device is not None:
+                disable_mounts.append(mount)
+    if module.params["prune"]:
+        disable_mounts.extend(
+            sorted(mount for mount in audit_devices if mount not in devices)
         )
-    ):
+
+    if enable_mounts or recreate_mounts or disable_mounts:
         result["changed"] = True
-        vault_api_request(
-            module,
+
+    def enable_request(mount: str) -> tuple:
+        return (
+            "POST",
             f"/v1/sys/audit/{mount}",
-            method="DELETE",
+            {
+                "type": devices[mount]["type"],
+                "description": devices[mount]["description"],
+                "options": devices[mount]["options"],
+            },
         )
-        existing_device = None
-    
-    # Enable/disable audit device as needed
-    if state == "present":
-        # NB: If it still exists, its config is correct so no need to do
-        # anything
-        if existing_device is None:
-            result["changed"] = True
-            vault_api_request(
-                module,
-                f"/v1/sys/audit/{mount}",
-                method="POST",
-                data={
-                    "type": type,
-                    "description": description,
-                    "options": options,
-                },
-            )
-    elif state == "absent":
-        if existing_device is not None:
-            result["changed"] = True
-            vault_api_request(
-                module,
-                f"/v1/sys/audit/{mount}",
-                method="DELETE",
-            )
 
-    module.exit_json(**result)
+    # NB: To minimise gaps in auditing, new audit devices are enabled first,
+    # then those which must be recreated are replaced one at a time and only
+    # then are old audit devices disabled. A device being recreated misses
+    # any requests made whilst it is disabled. (Vault only refuses requests
+    # when the enabled audit devices cannot be written to: with no device
+    # enabled, requests are served without being audited.)
+    vault_api_request_many(module, [enable_request(mount) for mount in enable_mounts])
+
+    for mount in recreate_mounts:
+        vault_api_request(module, f"/v1/sys/audit/{mount}", method="DELETE")
+        method, api_path, data = enable_request(mount)
+        vault_api_request(module, api_path, method=method, data=data)
+
+    vault_api_request_many(
+        module,
+        [("DELETE", f"/v1/sys/audit/{mount}") for mount in disable_mounts],
+    )
+
+    module.exit_json(**result, **vault_api_request_stats(module))
 
 
 def main():
@@ -4,6 +4,7 @@ from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.bbcrd.vault.plugins.module_utils.vault import (
     get_vault_api_request_argument_spec,
     vault_api_request,
+    vault_api_request_stats,
 )
 
 
@@ -66,6 +67,34 @@ options:
         default: none
         type: str
         default: null
+    vault_leader_routing:
+        description: |-
+            If true, discover the active node of the Vault cluster (using the
+            sys/leader endpoint) and send write requests directly to it rather
+            than to vault_url, which may be a standby node. The active node's
+            advertised API address must be reachable from the host running
+            this module.
+        required: false
+        default: false
+        type: bool
+    vault_retry_timeout:
+        description: |-
+            Requests which fail due to transient errors (e.g. rate limiting,
+            a sealed node or a leadership election) are retried with
+            exponential backoff for up to this many seconds. Only requests
+            which are safe to repeat are retried. Set to zero to disable
+            retries.
+        required: false
+        default: 60
+        type: float
+    vault_request_stats:
+        description: |-
+            If true, return a summary of the Vault API requests made by this
+            module (counts, bytes transferred and timings per endpoint) under
+            the 'vault_request_stats' key of the result.
+        type: bool
+        required: false
+        default: false
 """
 
 RETURN = r"""
@@ -121,6 +150,7 @@ def run_module():
     actual = vault_api_request(
         module,
         f"/v1/sys/auth",
+        cache=True,
     )["data"].get(f"{mount}/")
 
     if state == "present":
@@ -163,11 +193,13 @@ def run_module():
                     data=dict(config, description=description),
                 )
         
-        # Add the accessor to the response
+        # Add the accessor to the response. (NB: The listing is only re-read if
+        # the auth method was changed above.)
         result["accessor"] = vault_api_request(
             module,
-            f"/v1/sys/auth/{mount}",
-        )["data"]["accessor"]
+            f"/v1/sys/auth",
+            cache=True,
+        )["data"][f"{mount}/"]["accessor"]
     elif state == "absent":
         if actual is not None:
             result["changed"] = True
@@ -177,7 +209,7 @@ def run_module():
                 method="DELETE",
             )
 
-    module.exit_json(**result)
+    module.exit_json(**result, **vault_api_request_stats(module))
 
 
 def main():
@@ -3,6 +3,12 @@ from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.bbcrd.vault.plugins.module_utils.vault import (
     get_vault_api_request_argument_spec,
     vault_api_request,
+    vault_api_request_many,
+    vault_api_request_stats,
+)
+from ansible_collections.bbcrd.vault.plugins.module_utils.vault_identity import (
+    create_entities,
+    list_entity_ids,
 )
 
 
@@ -19,9 +25,16 @@ options:
     mount:
         description: |-
             The mountpoint of the auth method (without a trailing slash). For
-            example 'userpass'.
+            example 'userpass'. Required unless 'mount_accessor' is given.
         type: str
-        required: true
+        required: false
+    mount_accessor:
+        description: |-
+            The accessor of the auth method. If given, this is used rather
+            than looking up the accessor of 'mount' (e.g. when it has already
+            been obtained from bbcrd.vault.vault_auth_methods).
+        type: str
+        required: false
     entity_aliases:
         description: |-
             A dictionary mapping from entity alias names to strings or dictionaries.
@@ -68,6 +81,34 @@ options:
         default: none
         type: str
         default: null
+    vault_leader_routing:
+        description: |-
+            If true, discover the active node of the Vault cluster (using the
+            sys/leader endpoint) and send write requests directly to it rather
+            than to vault_url, which may be a standby node. The active node's
+            advertised API address must be reachable from the host running
+            this module.
+        required: false
+        default: false
+        type: bool
+    vault_retry_timeout:
+        description: |-
+            Requests which fail due to transient errors (e.g. rate limiting,
+            a sealed node or a leadership election) are retried with
+            exponential backoff for up to this many seconds. Only requests
+            which are safe to repeat are retried. Set to zero to disable
+            retries.
+        required: false
+        default: 60
+        type: float
+    vault_request_stats:
+        description: |-
+            If true, return a summary of the Vault API requests made by this
+            module (counts, bytes transferred and timings per endpoint) under
+            the 'vault_request_stats' key of the result.
+        type: bool
+        required: false
+        default: false
 """
 
 EXAMPLES = r"""
@@ -90,104 +131,117 @@ EXAMPLES = r"""
 
 def run_module():
     module_args = dict(
-        mount=dict(type="str", required=True),
+        mount=dict(type="str", required=False),
+        mount_accessor=dict(type="str", required=False),
         entity_aliases=dict(type="dict", required=True),
         **get_vault_api_request_argument_spec(),
     )
 
-    module = AnsibleModule(argument_spec=module_args)
+    module = AnsibleModule(
+        argument_spec=module_args,
+        required_one_of=[("mount", "mount_accessor")],
+    )
     mount = module.params["mount"]
     entity_aliases = module.params["entity_aliases"]
 
     result = {"changed": False}
 
-    # Lookup auth accessor
-    mount_accessor = vault_api_request(module, "/v1/sys/auth")["data"][f"{mount}/"][
-        "accessor"
-    ]
-
-    # Get a list of current entity aliases for this auth method
-    existing_entity_aliases = {
-        entity_alias_id: params
-        for entity_alias_id, params in vault_api_request(
+    # Lookup auth accessor (unless given)
+    mount_accessor = module.params["mount_accessor"]
+    if mount_accessor is None:
+        mount_accessor = vault_api_request(module, "/v1/sys/auth")["data"][
+            f"{mount}/"
+        ]["accessor"]
+
+    # Get a list of current entity aliases for this auth method. (NB: Aliases
+    # for other auth methods are discarded as the listing is received.)
+    existing_entity_aliases = (
+        vault_api_request(
             module,
             "/v1/identity/entity-alias/id",
             method="LIST",
             expected_status=[200, 404],
+            key_info_filter=lambda entity_alias_id, params: (
+                params["mount_accessor"] == mount_accessor
+            ),
         )
         .get("data", {})
         .get("key_info", {})
-        .items()
-        if params["mount_accessor"] == mount_accessor
+    )
+
+    # Index existing aliases by name
+    existing_entity_aliases_by_name = {
+        params["name"]: dict(params, id=entity_alias_id)
+        for entity_alias_id, params in existing_entity_aliases.items()
     }
 
     # Delete any aliases not listed
-    for entity_alias_id, params in existing_entity_aliases.items():
-        if params["name"] not in entity_aliases:
-            result["changed"] = True
-            vault_api_request(
-                module,
-                f"/v1/identity/entity-alias/id/{entity_alias_id}",
-                method="DELETE",
-            )
+    delete_entity_alias_ids = [
+        params["id"]
+        for name, params in existing_entity_aliases_by_name.items()
+        if name not in entity_aliases
+    ]
+    if delete_entity_alias_ids:
+        result["changed"] = True
+        vault_api_request_many(
+            module,
+            [
+                ("DELETE", f"/v1/identity/entity-alias/id/{entity_alias_id}")
+                for entity_alias_id in delete_entity_alias_ids
+            ],
+        )
 
-    # Add/update the rest where required
+    # Normalise the alias specifications into {name: (entity_name, params)}
+    specs = {}
     for entity_alias_name, spec in entity_aliases.items():
         if isinstance(spec, str):
             entity_name = spec
             params = {}
         else:
-            entity_name = spec.pop("entity_name")
-            params = spec
+            params = dict(spec)
+            entity_name = params.pop("entity_name")
         params.setdefault("custom_metadata", None)
+        specs[entity_alias_name] = (entity_name, params)
 
-        # Make sure entity exists and get its ID
-        entity = vault_api_request(
-            module,
-            f"/v1/identity/entity/name/{entity_name}",
-            expected_status=[200, 404],
-        ).get("data")
-        if entity is None:
-            result["changed"] = True
-            entity = vault_api_request(
-                module,
-                f"/v1/identity/entity/name/{entity_name}",
-                method="POST",
-                expected_status=[200, 404],
-            )["data"]
-        entity_id = entity["id"]
-
-        matching_existing_entity_aliases = [
-            existing_params
-            for existing_entity_alias_id, existing_params in existing_entity_aliases.items()
-            if existing_params["name"] == entity_alias_name
-        ]
-        assert len(matching_existing_entity_aliases) in [0, 1]
+    # Make sure entities exist and get their IDs
+    entity_names = [entity_name for entity_name, _params in specs.values()]
+    entity_ids = list_entity_ids(module, entity_names)
+    missing_entity_names = [
+        entity_name for entity_name in entity_names if entity_name not in entity_ids
+    ]
+    if missing_entity_names:
+        result["changed"] = True
+        entity_ids.update(create_entities(module, missing_entity_names))
 
+    # Add/update the rest where required
+    writes = []
+    for entity_alias_name, (entity_name, params) in specs.items():
+        entity_id = entity_ids[entity_name]
+        existing_params = existing_entity_aliases_by_name.get(entity_alias_name)
         if (
             # New
-            matching_existing_entity_aliases == []
+            existing_params is None
             # Needs updating
-            or entity_id != matching_existing_entity_aliases[0]["canonical_id"]
-            or any(
-                v != matching_existing_entity_aliases[0].get(k)
-                for k, v in params.items()
-            )
+            or entity_id != existing_params["canonical_id"]
+            or any(v != existing_params.get(k) for k, v in params.items())
         ):
-            result["changed"] = True
-            vault_api_request(
-                module,
-                f"/v1/identity/entity-alias",
-                method="POST",
-                data=dict(
-                    canonical_id=entity_id,
-                    name=entity_alias_name,
-                    mount_accessor=mount_accessor,
-                    **params,
-                ),
+            writes.append(
+                (
+                    "POST",
+                    "/v1/identity/entity-alias",
+                    dict(
+                        canonical_id=entity_id,
+                        name=entity_alias_name,
+                        mount_accessor=mount_accessor,
+                        **params,
+                    ),
+                )
             )
+    if writes:
+        result["changed"] = True
+        vault_api_request_many(module, writes)
 
-    module.exit_json(**result)
+    module.exit_json(**result, **vault_api_request_stats(module))
 
 
 def main():
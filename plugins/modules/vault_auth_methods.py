@@ -0,0 +1,284 @@
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.bbcrd.vault.plugins.module_utils.vault import (
+    get_vault_api_request_argument_spec,
+    vault_api_request,
+    vault_api_request_many,
+    vault_api_request_stats,
+)
+
+
+DOCUMENTATION = r"""
+module: bbcrd.vault.vault_auth_methods
+
+short_description: Enable (or disable) many Vault authentication methods at once.
+
+description: |-
+    Declaratively control a collection of auth methods in one go. This is
+    equivalent to (but much faster than) using bbcrd.vault.vault_auth_method
+    for each auth method in turn.
+
+    All existing auth methods are read using a single listing and any
+    necessary changes are then made concurrently. The accessors of all of
+    the auth methods are returned, e.g. for use with
+    bbcrd.vault.vault_auth_method_entity_aliases.
+
+options:
+    auth_methods:
+        description: |-
+            A dictionary from mount points (without the trailing slash) to
+            auth method parameters. Each auth method's parameters may contain
+            the following (all optional) keys which have the same meaning as
+            the equivalent bbcrd.vault.vault_auth_method options: 'type'
+            (defaults to the mount point), 'description', 'config' and
+            'state'.
+        required: true
+        type: dict
+    prune:
+        description: |-
+            If true, any auth methods not enumerated in 'auth_methods' will be
+            disabled. The built-in 'token' auth method is never disabled.
+        required: false
+        type: bool
+        default: false
+    vault_url:
+        description: |-
+          the base url of the vault server.
+        required: false
+        default: https://localhost:8200
+        type: str
+    vault_namespace:
+        description: |-
+          the vault namespace to issue the command to.
+        required: false
+        default: ""
+        type: str
+    vault_token:
+        description: |-
+          token to use for vault api calls.
+        required: false
+        default: ""
+        type: str
+    vault_ca_path:
+        description: |-
+            the filename of the ca pem file to use. set to none to use the
+            built in certificate store.
+        required: false
+        default: none
+        type: str
+        default: null
+    vault_leader_routing:
+        description: |-
+            If true, discover the active node of the Vault cluster (using the
+            sys/leader endpoint) and send write requests directly to it rather
+            than to vault_url, which may be a standby node. The active node's
+            advertised API address must be reachable from the host running
+            this module.
+        required: false
+        default: false
+        type: bool
+    vault_retry_timeout:
+        description: |-
+            Requests which fail due to transient errors (e.g. rate limiting,
+            a sealed node or a leadership election) are retried with
+            exponential backoff for up to this many seconds. Only requests
+            which are safe to repeat are retried. Set to zero to disable
+            retries.
+        required: false
+        default: 60
+        type: float
+    vault_request_stats:
+        description: |-
+            If true, return a summary of the Vault API requests made by this
+            module (counts, bytes transferred and timings per endpoint) under
+            the 'vault_request_stats' key of the result.
+        type: bool
+        required: false
+        default: false
+"""
+
+RETURN = r"""
+accessors:
+    description: |-
+        A mapping from mount points (as given in 'auth_methods') to the
+        accessors of the auth methods (excluding those with state 'absent').
+    type: dict
+    returned: always
+"""
+
+EXAMPLES = r"""
+- name: Configure all auth methods
+  bbcrd.vault.vault_auth_methods:
+    auth_methods:
+      oidc:
+      userpass:
+        config:
+          default_lease_ttl: 3600
+      team-a-approle:
+        type: approle
+        description: "Machines belonging to team A"
+      team-b-approle:
+        type: approle
+        description: "Machines belonging to team B"
+    prune: true
+  register: auth_methods
+
+- name: Configure OIDC entity aliases
+  bbcrd.vault.vault_auth_method_entity_aliases:
+    mount_accessor: "{{ auth_methods.accessors.oidc }}"
+    entity_aliases:
+      jonathan@example.com: jonathan
+"""
+
+
+AUTH_METHOD_PARAMETERS = ("type", "description", "config", "state")
+
+BUILTIN_MOUNTS = ("token",)
+"""
+Mount points of the built-in auth methods which cannot be disabled.
+"""
+
+
+def needs_tuning(existing_auth_method: dict, auth_method: dict) -> bool:
+    """
+    Test whether an existing auth method's description or config differ from
+    the desired values.
+    """
+    existing_config = existing_auth_method.get("config") or {}
+    return (
+        existing_auth_method.get("description", "") != auth_method["description"]
+        or any(
+            key not in existing_config or existing_config[key] != value
+            for key, value in auth_method["config"].items()
+        )
+    )
+
+
+def run_module():
+    module_args = dict(
+        auth_methods=dict(type="dict", required=True),
+        prune=dict(type="bool", required=False, default=False),
+        **get_vault_api_request_argument_spec(),
+    )
+
+    module = AnsibleModule(argument_spec=module_args)
+    prune = module.params["prune"]
+
+    result = {"changed": False, "accessors": {}}
+
+    auth_methods = {}
+    for mount, parameters in module.params["auth_methods"].items():
+        mount = mount.rstrip("/")
+        # To allow lazy YAML specification
+        parameters = parameters or {}
+        unknown = set(parameters) - set(AUTH_METHOD_PARAMETERS)
+        if unknown:
+            module.fail_json(
+                msg=f"Unsupported parameters for auth method {mount}: {', '.join(sorted(unknown))}"
+            )
+        state = parameters.get("state") or "present"
+        if state not in ("present", "absent"):
+            module.fail_json(
+                msg=f"state for auth method {mount} must be one of: present, absent"
+            )
+        auth_methods[mount] = {
+            "type": parameters.get("type") or mount,
+            "description": parameters.get("description") or "",
+            "config": parameters.get("config") or {},
+            "state": state,
+        }
+
+    # Read all existing auth methods
+    existing_auth_methods = {
+        mount.rstrip("/"): auth_method
+        for mount, auth_method in vault_api_request(module, "/v1/sys/auth")
+        .get("data", {})
+        .items()
+    }
+
+    # Work out which auth methods must be disabled (including those whose
+    # type has changed and so must be recreated) and which must be enabled or
+    # tuned
+    disable_mounts = []
+    enable_mounts = []
+    tune_mounts = []
+    for mount, auth_method in auth_methods.items():
+        existing_auth_method = existing_auth_methods.get(mount)
+        if auth_method["state"] == "absent":
+            if existing_auth_method is not None:
+                disable_mounts.append(mount)
+        elif existing_auth_method is None:
+            enable_mounts.append(mount)
+        elif existing_auth_method["type"] != auth_method["type"]:
+            disable_mounts.append(mount)
+            enable_mounts.append(mount)
+        elif needs_tuning(existing_auth_method, auth_method):
+            tune_mounts.append(mount)
+    if prune:
+        disable_mounts.extend(
+            sorted(
+                mount
+                for mount in existing_auth_methods
+                if mount not in auth_methods and mount not in BUILTIN_MOUNTS
+            )
+        )
+
+    if disable_mounts or enable_mounts or tune_mounts:
+        result["changed"] = True
+
+    # NB: Disabling must complete before any auth methods being recreated
+    # are enabled again.
+    vault_api_request_many(
+        module,
+        [("DELETE", f"/v1/sys/auth/{mount}") for mount in disable_mounts],
+    )
+    vault_api_request_many(
+        module,
+        [
+            (
+                "POST",
+                f"/v1/sys/auth/{mount}",
+                {
+                    "type": auth_methods[mount]["type"],
+                    "description": auth_methods[mount]["description"],
+                    "config": auth_methods[mount]["config"],
+                },
+            )
+            for mount in enable_mounts
+        ]
+        + [
+            (
+                "POST",
+                f"/v1/sys/auth/{mount}/tune",
+                dict(
+                    auth_methods[mount]["config"],
+                    description=auth_methods[mount]["description"],
+                ),
+            )
+            for mount in tune_mounts
+        ],
+    )
+
+    # The listing only needs to be re-read to find the accessors of newly
+    # enabled auth methods
+    if enable_mounts:
+        existing_auth_methods = {
+            mount.rstrip("/"): auth_method
+            for mount, auth_method in vault_api_request(module, "/v1/sys/auth")
+            .get("data", {})
+            .items()
+        }
+    result["accessors"] = {
+        mount: existing_auth_methods[mount]["accessor"]
+        for mount, auth_method in auth_methods.items()
+        if auth_method["state"] == "present"
+    }
+
+    module.exit_json(**result, **vault_api_request_stats(module))
+
+
+def main():
+    run_module()
+
+
+if __name__ == "__main__":
+    main()
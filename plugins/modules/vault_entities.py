@@ -0,0 +1,253 @@
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.bbcrd.vault.plugins.module_utils.vault import (
+    get_vault_api_request_argument_spec,
+    vault_api_request_many,
+    vault_api_request_stats,
+)
+from ansible_collections.bbcrd.vault.plugins.module_utils.vault_identity import (
+    list_entity_ids,
+    match_names,
+)
+
+
+DOCUMENTATION = r"""
+module: bbcrd.vault.vault_entities
+
+short_description: Create, modify and delete many Vault entities at once
+
+description: |-
+    Declaratively control a collection of Vault entities in one go. This is
+    equivalent to (but much faster than) using bbcrd.vault.vault_entity for
+    each entity in turn.
+
+    Existing entities are enumerated using a single listing, changes are
+    made concurrently and pruned entities are deleted in batches.
+
+options:
+    entities:
+        description: |-
+            A dictionary from entity names to entity parameters. Each entity's
+            parameters may contain the following (all optional) keys which
+            have the same meaning as the equivalent bbcrd.vault.vault_entity
+            options: 'metadata', 'policies' and 'disabled'.
+        required: true
+        type: dict
+    prune:
+        description: |-
+            If true, any entities not enumerated in 'entities' will be
+            deleted (along with their aliases).
+        required: false
+        type: bool
+        default: false
+    vault_url:
+        description: |-
+          the base url of the vault server.
+        required: false
+        default: https://localhost:8200
+        type: str
+    vault_namespace:
+        description: |-
+          the vault namespace to issue the command to.
+        required: false
+        default: ""
+        type: str
+    vault_token:
+        description: |-
+          token to use for vault api calls.
+        required: false
+        default: ""
+        type: str
+    vault_ca_path:
+        description: |-
+            the filename of the ca pem file to use. set to none to use the
+            built in certificate store.
+        required: false
+        default: none
+        type: str
+        default: null
+    vault_leader_routing:
+        description: |-
+            If true, discover the active node of the Vault cluster (using the
+            sys/leader endpoint) and send write requests directly to it rather
+            than to vault_url, which may be a standby node. The active node's
+            advertised API address must be reachable from the host running
+            this module.
+        required: false
+        default: false
+        type: bool
+    vault_retry_timeout:
+        description: |-
+            Requests which fail due to transient errors (e.g. rate limiting,
+            a sealed node or a leadership election) are retried with
+            exponential backoff for up to this many seconds. Only requests
+            which are safe to repeat are retried. Set to zero to disable
+            retries.
+        required: false
+        default: 60
+        type: float
+    vault_request_stats:
+        description: |-
+            If true, return a summary of the Vault API requests made by this
+            module (counts, bytes transferred and timings per endpoint) under
+            the 'vault_request_stats' key of the result.
+        type: bool
+        required: false
+        default: false
+"""
+
+RETURN = r"""
+entity_ids:
+    description: |-
+        A mapping from entity names (as given in 'entities') to entity IDs.
+    type: dict
+    returned: always
+"""
+
+EXAMPLES = r"""
+- name: Manage all entities
+  bbcrd.vault.vault_entities:
+    entities:
+      jonathan:
+        metadata:
+          team: cans
+        policies:
+          - admin
+      andrew:
+      fred:
+        disabled: true
+    prune: true
+"""
+
+
+ENTITY_PARAMETERS = ("metadata", "policies", "disabled")
+
+BATCH_DELETE_SIZE = 500
+"""
+The maximum number of entities to delete with each call to the batch-delete
+endpoint.
+"""
+
+
+def entity_differs(existing_entity: dict, entity: dict) -> bool:
+    """
+    Test whether an existing entity's configuration differs from the desired
+    configuration.
+    """
+    return (
+        (existing_entity["metadata"] or {}) != entity["metadata"]
+        or sorted(existing_entity["policies"] or []) != sorted(entity["policies"])
+        or existing_entity["disabled"] != entity["disabled"]
+    )
+
+
+def run_module():
+    module_args = dict(
+        entities=dict(type="dict", required=True),
+        prune=dict(type="bool", required=False, default=False),
+        **get_vault_api_request_argument_spec(),
+    )
+
+    module = AnsibleModule(argument_spec=module_args)
+    prune = module.params["prune"]
+
+    result = {"changed": False, "entity_ids": {}}
+
+    entities = {}
+    for name, parameters in module.params["entities"].items():
+        # To allow lazy YAML specification
+        parameters = parameters or {}
+        unknown = set(parameters) - set(ENTITY_PARAMETERS)
+        if unknown:
+            module.fail_json(
+                msg=f"Unsupported parameters for entity {name}: {', '.join(sorted(unknown))}"
+            )
+        entities[name] = {
+            "metadata": parameters.get("metadata") or {},
+            "policies": parameters.get("policies") or [],
+            "disabled": bool(parameters.get("disabled", False)),
+        }
+
+    # Enumerate existing entities (all of them if pruning). NB: Entity names
+    # are case-insensitive so the listed names may differ in case from those
+    # declared.
+    listed_entity_ids = list_entity_ids(module, None if prune else entities)
+    entity_ids = match_names(listed_entity_ids, entities)
+
+    # NB: The listing doesn't include the entities' configuration so this
+    # must be read separately for each managed entity.
+    existing_names = [name for name in entities if name in entity_ids]
+    existing_entities = {
+        name: response["data"]
+        for name, response in zip(
+            existing_names,
+            vault_api_request_many(
+                module,
+                [
+                    ("GET", f"/v1/identity/entity/id/{entity_ids[name]}")
+                    for name in existing_names
+                ],
+            ),
+        )
+    }
+
+    # Create or update entities
+    write_names = [
+        name
+        for name, entity in entities.items()
+        if name not in existing_entities
+        or entity_differs(existing_entities[name], entity)
+    ]
+    if write_names:
+        result["changed"] = True
+        responses = vault_api_request_many(
+            module,
+            [
+                ("POST", f"/v1/identity/entity/name/{name}", entities[name])
+                for name in write_names
+            ],
+        )
+        # NB: Data is only returned when an entity is created. If an entity
+        # we expected to create already existed after all (e.g. due to its
+        # concurrent creation) we must look it up.
+        for name, response in zip(write_names, responses):
+            if response is not None:
+                entity_ids[name] = response["data"]["id"]
+        unresolved_names = [name for name in write_names if name not in entity_ids]
+        responses = vault_api_request_many(
+            module,
+            [("GET", f"/v1/identity/entity/name/{name}") for name in unresolved_names],
+        )
+        for name, response in zip(unresolved_names, responses):
+            entity_ids[name] = response["data"]["id"]
+
+    # Delete unlisted entities
+    if prune:
+        managed_entity_ids = {entity_ids[name] for name in entities}
+        delete_entity_ids = sorted(
+            set(listed_entity_ids.values()) - managed_entity_ids
+        )
+        if delete_entity_ids:
+            result["changed"] = True
+            vault_api_request_many(
+                module,
+                [
+                    (
+                        "POST",
+                        "/v1/identity/entity/batch-delete",
+                        {"entity_ids": delete_entity_ids[i : i + BATCH_DELETE_SIZE]},
+                    )
+                    for i in range(0, len(delete_entity_ids), BATCH_DELETE_SIZE)
+                ],
+            )
+
+    result["entity_ids"] = {name: entity_ids[name] for name in entities}
+
+    module.exit_json(**result, **vault_api_request_stats(module))
+
+
+def main():
+    run_module()
+
+
+if __name__ == "__main__":
+    main()
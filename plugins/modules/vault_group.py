@@ -3,6 +3,12 @@ from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.bbcrd.vault.plugins.module_utils.vault import (
     get_vault_api_request_argument_spec,
     vault_api_request,
+    vault_api_request_stats,
+)
+from ansible_collections.bbcrd.vault.plugins.module_utils.vault_identity import (
+    create_entities,
+    list_entity_ids,
+    list_group_ids,
 )
 
 
@@ -79,6 +85,34 @@ options:
         default: none
         type: str
         default: null
+    vault_leader_routing:
+        description: |-
+            If true, discover the active node of the Vault cluster (using the
+            sys/leader endpoint) and send write requests directly to it rather
+            than to vault_url, which may be a standby node. The active node's
+            advertised API address must be reachable from the host running
+            this module.
+        required: false
+        default: false
+        type: bool
+    vault_retry_timeout:
+        description: |-
+            Requests which fail due to transient errors (e.g. rate limiting,
+            a sealed node or a leadership election) are retried with
+            exponential backoff for up to this many seconds. Only requests
+            which are safe to repeat are retried. Set to zero to disable
+            retries.
+        required: false
+        default: 60
+        type: float
+    vault_request_stats:
+        description: |-
+            If true, return a summary of the Vault API requests made by this
+            module (counts, bytes transferred and timings per endpoint) under
+            the 'vault_request_stats' key of the result.
+        type: bool
+        required: false
+        default: false
 """
 
 EXAMPLES = r"""
@@ -129,32 +163,25 @@ def run_module():
     # Apply the change
     if state == "present":
         # Lookup (and create if non-existing) entities
-        member_entity_ids = []
-        for entity_name in members:
-            entity_id = vault_api_request(
-                module,
-                f"/v1/identity/entity/name/{entity_name}",
-                expected_status=[200, 404],
-            ).get("data", {}).get("id")
-            
-            if entity_id is None:
-                result["changed"] = True
-                entity_id = vault_api_request(
-                    module,
-                    f"/v1/identity/entity/name/{entity_name}",
-                    method="POST",
-                )["data"]["id"]
-            
-            member_entity_ids.append(entity_id)
+        entity_ids_by_name = list_entity_ids(module, members)
+        missing_entity_names = [
+            entity_name
+            for entity_name in members
+            if entity_name not in entity_ids_by_name
+        ]
+        if missing_entity_names:
+            result["changed"] = True
+            entity_ids_by_name.update(create_entities(module, missing_entity_names))
+        member_entity_ids = [entity_ids_by_name[entity_name] for entity_name in members]
 
         # Lookup member groups
-        member_group_ids = []
+        group_ids_by_name = {}
+        if member_groups:
+            group_ids_by_name = list_group_ids(module, member_groups)
         for group_name in member_groups:
-            group_id = vault_api_request(
-                module,
-                f"/v1/identity/group/name/{group_name}",
-            )["data"]["id"]
-            member_group_ids.append(group_id)
+            if group_name not in group_ids_by_name:
+                module.fail_json(msg=f"Member group {group_name} does not exist")
+        member_group_ids = [group_ids_by_name[group_name] for group_name in member_groups]
 
         if (
             existing_config is None
@@ -189,7 +216,7 @@ def run_module():
                 method="DELETE",
             )
 
-    module.exit_json(**result)
+    module.exit_json(**result, **vault_api_request_stats(module))
 
 
 def main():
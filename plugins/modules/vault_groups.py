@@ -0,0 +1,322 @@
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.bbcrd.vault.plugins.module_utils.vault import (
+    get_vault_api_request_argument_spec,
+    vault_api_request,
+    vault_api_request_many,
+    vault_api_request_stats,
+)
+from ansible_collections.bbcrd.vault.plugins.module_utils.vault_identity import (
+    create_entities,
+    list_entity_ids,
+    list_group_ids,
+    match_names,
+)
+
+
+DOCUMENTATION = r"""
+module: bbcrd.vault.vault_groups
+
+short_description: Create, manage or delete many (local) identity groups in Vault.
+
+description: |-
+    Declaratively control the complete membership and policy sets of a
+    collection of Vault groups in one go. This is equivalent to (but much
+    faster than) using bbcrd.vault.vault_group for each group in turn.
+
+    The existing groups and entities are read once up-front and all changes
+    are then made concurrently. Groups which are members of other (new)
+    groups are created before the groups which include them.
+
+options:
+    groups:
+        description: |-
+            A dictionary from group names to group parameters. Each group's
+            parameters may contain the following (all optional) keys which
+            have the same meaning as the equivalent bbcrd.vault.vault_group
+            options: 'policies', 'members', 'member_groups' and 'metadata'.
+
+            Entities listed in 'members' which don't exist will be created
+            automatically. Groups listed in 'member_groups' must either
+            already exist or be included in this dictionary.
+        required: true
+        type: dict
+    prune:
+        description: |-
+            If true, any (internal) groups not enumerated in 'groups' will be
+            deleted. External groups are never deleted.
+        required: false
+        type: bool
+        default: false
+    vault_url:
+        description: |-
+          the base url of the vault server.
+        required: false
+        default: https://localhost:8200
+        type: str
+    vault_namespace:
+        description: |-
+          the vault namespace to issue the command to.
+        required: false
+        default: ""
+        type: str
+    vault_token:
+        description: |-
+          token to use for vault api calls.
+        required: false
+        default: ""
+        type: str
+    vault_ca_path:
+        description: |-
+            the filename of the ca pem file to use. set to none to use the
+            built in certificate store.
+        required: false
+        default: none
+        type: str
+        default: null
+    vault_leader_routing:
+        description: |-
+            If true, discover the active node of the Vault cluster (using the
+            sys/leader endpoint) and send write requests directly to it rather
+            than to vault_url, which may be a standby node. The active node's
+            advertised API address must be reachable from the host running
+            this module.
+        required: false
+        default: false
+        type: bool
+    vault_retry_timeout:
+        description: |-
+            Requests which fail due to transient errors (e.g. rate limiting,
+            a sealed node or a leadership election) are retried with
+            exponential backoff for up to this many seconds. Only requests
+            which are safe to repeat are retried. Set to zero to disable
+            retries.
+        required: false
+        default: 60
+        type: float
+    vault_request_stats:
+        description: |-
+            If true, return a summary of the Vault API requests made by this
+            module (counts, bytes transferred and timings per endpoint) under
+            the 'vault_request_stats' key of the result.
+        type: bool
+        required: false
+        default: false
+"""
+
+RETURN = r"""
+group_ids:
+    description: |-
+        A mapping from group names (as given in 'groups') to group IDs.
+    type: dict
+    returned: always
+"""
+
+EXAMPLES = r"""
+- name: Manage all groups
+  bbcrd.vault.vault_groups:
+    groups:
+      administrators:
+        policies:
+          - kv_admin
+          - ssh_admin
+        members:
+          - jonathah
+          - andrewbo
+      developers:
+        policies:
+          - kv_read
+        members:
+          - stuartgr
+        member_groups:
+          - administrators
+    prune: true
+"""
+
+
+GROUP_PARAMETERS = ("policies", "members", "member_groups", "metadata")
+
+
+def group_differs(existing_config: dict, desired_config: dict) -> bool:
+    """
+    Test whether an existing group's configuration differs from the desired
+    configuration (as would be POSTed to Vault).
+    """
+    return (
+        (existing_config["metadata"] or {}) != desired_config["metadata"]
+        or sorted(existing_config["member_entity_ids"] or [])
+        != sorted(desired_config["member_entity_ids"])
+        or sorted(existing_config["member_group_ids"] or [])
+        != sorted(desired_config["member_group_ids"])
+        or sorted(existing_config["policies"] or []) != sorted(desired_config["policies"])
+    )
+
+
+def run_module():
+    module_args = dict(
+        groups=dict(type="dict", required=True),
+        prune=dict(type="bool", required=False, default=False),
+        **get_vault_api_request_argument_spec(),
+    )
+
+    module = AnsibleModule(argument_spec=module_args)
+    prune = module.params["prune"]
+
+    result = {"changed": False, "group_ids": {}}
+
+    groups = {}
+    for name, parameters in module.params["groups"].items():
+        # To allow lazy YAML specification
+        parameters = parameters or {}
+        unknown = set(parameters) - set(GROUP_PARAMETERS)
+        if unknown:
+            module.fail_json(
+                msg=f"Unsupported parameters for group {name}: {', '.join(sorted(unknown))}"
+            )
+        groups[name] = {
+            "policies": parameters.get("policies") or [],
+            "members": parameters.get("members") or [],
+            "member_groups": parameters.get("member_groups") or [],
+            "metadata": parameters.get("metadata") or {},
+        }
+
+    # NB: Group names are case-insensitive. Member groups which are also
+    # being declared are referred to by their declared names from here on.
+    declared_names = {name.lower(): name for name in groups}
+    for parameters in groups.values():
+        parameters["member_groups"] = [
+            declared_names.get(group_name.lower(), group_name)
+            for group_name in parameters["member_groups"]
+        ]
+
+    # Read the existing groups (keyed by ID)
+    listed_group_ids = list_group_ids(module)
+    group_ids = match_names(
+        listed_group_ids,
+        list(groups)
+        + [
+            group_name
+            for parameters in groups.values()
+            for group_name in parameters["member_groups"]
+        ],
+    )
+    read_group_ids = sorted(
+        set(listed_group_ids.values())
+        if prune
+        else {group_ids[name] for name in groups if name in group_ids}
+    )
+    existing_configs = {
+        group_id: response["data"]
+        for group_id, response in zip(
+            read_group_ids,
+            vault_api_request_many(
+                module,
+                [
+                    ("GET", f"/v1/identity/group/id/{group_id}")
+                    for group_id in read_group_ids
+                ],
+            ),
+        )
+    }
+
+    for name, parameters in groups.items():
+        for group_name in parameters["member_groups"]:
+            if group_name not in group_ids and group_name not in groups:
+                module.fail_json(
+                    msg=f"Member group {group_name} of {name} does not exist"
+                )
+
+    # Lookup (and create if non-existing) entities
+    member_names = [
+        entity_name
+        for parameters in groups.values()
+        for entity_name in parameters["members"]
+    ]
+    entity_ids = list_entity_ids(module, member_names)
+    missing_entity_names = [
+        entity_name for entity_name in member_names if entity_name not in entity_ids
+    ]
+    if missing_entity_names:
+        result["changed"] = True
+        entity_ids.update(create_entities(module, missing_entity_names))
+
+    def get_config(name: str) -> dict:
+        """Get the configuration to POST for a group."""
+        return {
+            "metadata": groups[name]["metadata"],
+            "member_entity_ids": [
+                entity_ids[entity_name] for entity_name in groups[name]["members"]
+            ],
+            "member_group_ids": [
+                group_ids.get(group_name) for group_name in groups[name]["member_groups"]
+            ],
+            "policies": groups[name]["policies"],
+        }
+
+    # Create or update groups. Groups are written in 'waves' such that any
+    # new groups are created before any groups which include them.
+    pending = {
+        name
+        for name in groups
+        if name not in group_ids
+        or group_differs(existing_configs[group_ids[name]], get_config(name))
+    }
+    while pending:
+        ready = sorted(
+            name
+            for name in pending
+            if all(group_name in group_ids for group_name in groups[name]["member_groups"])
+        )
+        if not ready:
+            module.fail_json(
+                msg=f"Circular member_groups between groups: {', '.join(sorted(pending))}"
+            )
+
+        result["changed"] = True
+        responses = vault_api_request_many(
+            module,
+            [
+                ("POST", f"/v1/identity/group/name/{name}", get_config(name))
+                for name in ready
+            ],
+        )
+
+        # NB: Data is only returned when a group is created
+        for name, response in zip(ready, responses):
+            if response is not None:
+                group_ids[name] = response["data"]["id"]
+            elif name not in group_ids:
+                group_ids[name] = vault_api_request(
+                    module, f"/v1/identity/group/name/{name}"
+                )["data"]["id"]
+        pending.difference_update(ready)
+
+    # Remove groups not listed
+    if prune:
+        managed_group_ids = {group_ids[name] for name in groups}
+        delete_group_ids = [
+            group_id
+            for _name, group_id in sorted(listed_group_ids.items())
+            if group_id not in managed_group_ids
+            and existing_configs[group_id]["type"] == "internal"
+        ]
+        if delete_group_ids:
+            result["changed"] = True
+            vault_api_request_many(
+                module,
+                [
+                    ("DELETE", f"/v1/identity/group/id/{group_id}")
+                    for group_id in delete_group_ids
+                ],
+            )
+
+    result["group_ids"] = {name: group_ids[name] for name in groups}
+
+    module.exit_json(**result, **vault_api_request_stats(module))
+
+
+def main():
+    run_module()
+
+
+if __name__ == "__main__":
+    main()
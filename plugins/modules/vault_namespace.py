@@ -1,8 +1,10 @@
-from typing import Dict, Iterable
+from typing import Dict, Iterable, List
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.bbcrd.vault.plugins.module_utils.vault import (
     get_vault_api_request_argument_spec,
     vault_api_request,
+    vault_api_request_many,
+    vault_api_request_stats,
 )
 
 
@@ -14,13 +16,17 @@ short_description: Create and destroy namespaces.
 description: |-
     Create and destroy namespaces.
 
+    Alternatively, a whole tree of nested namespaces may be managed at once
+    using the 'namespaces' option.
+
 options:
     name:
         description: |-
             The name of the namespace (without a trailing slash). If
             vault_namespace is set, this will create a child namespace.
+            Required unless 'namespaces' is given.
         type: str
-        required: true
+        required: false
     custom_metadata:
         description: |-
             Custom metadata to be associated with the namespace.
@@ -32,6 +38,34 @@ options:
         required: false
         type: str
         default: "present"
+    namespaces:
+        description: |-
+            A tree of namespaces to manage. A dictionary from namespace names
+            (without a trailing slash) to dictionaries with the following
+            (all optional) keys:
+            
+            * 'custom_metadata' -- As for the 'custom_metadata' option.
+            * 'namespaces' -- A dictionary of child namespaces, in the same
+              format.
+            
+            The tree is rooted at vault_namespace (if set). It is walked
+            breadth-first: the existing children of every namespace at one
+            level of the tree are listed concurrently and the namespaces at
+            that level are then created or updated concurrently. Child
+            namespaces are only created after their parent exists.
+            
+            Mutually exclusive with 'name', 'custom_metadata' and 'state'.
+        type: dict
+        required: false
+    prune:
+        description: |-
+            If true, any child namespaces of the namespaces in the tree (or of
+            its root) which are not enumerated in 'namespaces' will be deleted
+            (along with all of their descendants). Only valid with
+            'namespaces'.
+        type: bool
+        required: false
+        default: false
     vault_url:
         description: |-
           the base url of the vault server.
@@ -58,18 +92,225 @@ options:
         default: none
         type: str
         default: null
+    vault_leader_routing:
+        description: |-
+            If true, discover the active node of the Vault cluster (using the
+            sys/leader endpoint) and send write requests directly to it rather
+            than to vault_url, which may be a standby node. The active node's
+            advertised API address must be reachable from the host running
+            this module.
+        required: false
+        default: false
+        type: bool
+    vault_retry_timeout:
+        description: |-
+            Requests which fail due to transient errors (e.g. rate limiting,
+            a sealed node or a leadership election) are retried with
+            exponential backoff for up to this many seconds. Only requests
+            which are safe to repeat are retried. Set to zero to disable
+            retries.
+        required: false
+        default: 60
+        type: float
+    vault_request_stats:
+        description: |-
+            If true, return a summary of the Vault API requests made by this
+            module (counts, bytes transferred and timings per endpoint) under
+            the 'vault_request_stats' key of the result.
+        type: bool
+        required: false
+        default: false
 """
 
 EXAMPLES = r"""
 - name: Create a namespace
   bbcrd.vault.vault_namespace:
     name: ns1
+
+- name: Create a tree of namespaces
+  bbcrd.vault.vault_namespace:
+    namespaces:
+      tenant-a:
+        custom_metadata:
+          owner: team-a
+        namespaces:
+          production:
+          staging:
+      tenant-b:
+        namespaces:
+          production:
+    prune: true
 """
 
 
+NAMESPACE_PARAMETERS = ("custom_metadata", "namespaces")
+
+
+def namespace_api_path(parent: str, api_path: str) -> str:
+    """
+    Return the API path for a request to the given (path of a) namespace,
+    relative to vault_namespace.
+    """
+    if parent:
+        return f"/v1/{parent}{api_path[len('/v1'):]}"
+    else:
+        return api_path
+
+
+def list_child_namespaces(module: AnsibleModule, parents: List[str]) -> List[dict]:
+    """
+    Concurrently list the child namespaces of each of the given namespaces,
+    returning a {name: custom_metadata, ...} dictionary for each.
+    """
+    return [
+        {
+            name.rstrip("/"): info.get("custom_metadata") or {}
+            for name, info in response.get("data", {}).get("key_info", {}).items()
+        }
+        for response in vault_api_request_many(
+            module,
+            [
+                (
+                    "LIST",
+                    namespace_api_path(parent, "/v1/sys/namespaces"),
+                    None,
+                    (200, 404),
+                )
+                for parent in parents
+            ],
+        )
+    ]
+
+
+def delete_namespace_trees(module: AnsibleModule, paths: List[str]) -> None:
+    """
+    Delete the namespaces with the given paths along with all of their
+    descendants. Vault won't delete a namespace with children so the trees
+    are enumerated breadth-first and then deleted from the leaves upwards.
+    """
+    levels = []
+    while paths:
+        levels.append(paths)
+        paths = [
+            f"{parent}/{name}"
+            for parent, children in zip(paths, list_child_namespaces(module, paths))
+            for name in children
+        ]
+
+    for paths in reversed(levels):
+        requests = []
+        for path in paths:
+            parent, _, name = path.rpartition("/")
+            requests.append(
+                ("DELETE", namespace_api_path(parent, f"/v1/sys/namespaces/{name}"))
+            )
+        vault_api_request_many(module, requests)
+
+
+def check_namespace_tree(
+    module: AnsibleModule, namespaces: Dict[str, dict], parent: str = ""
+) -> None:
+    """
+    Check the parameters given for every namespace in a tree are valid
+    (before any changes are made).
+    """
+    for name, parameters in namespaces.items():
+        path = f"{parent}/{name}".lstrip("/")
+        # To allow lazy YAML specification
+        parameters = parameters or {}
+        unknown = set(parameters) - set(NAMESPACE_PARAMETERS)
+        if unknown:
+            module.fail_json(
+                msg=f"Unsupported parameters for namespace {path}: {', '.join(sorted(unknown))}"
+            )
+        check_namespace_tree(module, parameters.get("namespaces") or {}, path)
+
+
+def manage_namespace_tree(module: AnsibleModule, result: dict) -> None:
+    """
+    Create, update (and optionally prune) the tree of namespaces given in the
+    'namespaces' argument.
+    """
+    prune = module.params["prune"]
+
+    check_namespace_tree(module, module.params["namespaces"])
+
+    # Each level of the tree is a list of (parent_path, parent_existed,
+    # children) tuples where children is the dictionary of desired child
+    # namespaces.
+    level = [("", True, module.params["namespaces"])]
+    prune_paths = []
+    while level:
+        # List existing children of pre-existing parents (newly created
+        # parents won't have any)
+        listed_parents = [
+            parent for parent, parent_existed, children in level if parent_existed
+        ]
+        existing_children = dict(
+            zip(listed_parents, list_child_namespaces(module, listed_parents))
+        )
+
+        requests = []
+        next_level = []
+        for parent, parent_existed, children in level:
+            existing = existing_children.get(parent, {})
+            for name, parameters in children.items():
+                path = f"{parent}/{name}".lstrip("/")
+                # To allow lazy YAML specification
+                parameters = parameters or {}
+                custom_metadata = parameters.get("custom_metadata") or {}
+
+                if name not in existing:
+                    requests.append(
+                        (
+                            "POST",
+                            namespace_api_path(parent, f"/v1/sys/namespaces/{name}"),
+                            {"custom_metadata": custom_metadata},
+                        )
+                    )
+                elif existing[name] != custom_metadata:
+                    requests.append(
+                        (
+                            "PATCH",
+                            namespace_api_path(parent, f"/v1/sys/namespaces/{name}"),
+                            {
+                                "custom_metadata": dict(
+                                    {key: None for key in existing[name]},
+                                    **custom_metadata,
+                                )
+                            },
+                        )
+                    )
+
+                next_level.append(
+                    (
+                        path,
+                        name in existing,
+                        parameters.get("namespaces") or {},
+                    )
+                )
+
+            if prune:
+                prune_paths.extend(
+                    f"{parent}/{name}".lstrip("/")
+                    for name in sorted(existing)
+                    if name not in children
+                )
+
+        if requests:
+            result["changed"] = True
+            vault_api_request_many(module, requests)
+
+        level = next_level
+
+    if prune_paths:
+        result["changed"] = True
+        delete_namespace_trees(module, prune_paths)
+
+
 def run_module():
     module_args = dict(
-        name=dict(type="str", required=True),
+        name=dict(type="str", required=False),
         custom_metadata=dict(type="dict", required=False, default={}),
         state=dict(
             type="str",
@@ -79,16 +320,31 @@ def run_module():
             ],
             default="present",
         ),
+        namespaces=dict(type="dict", required=False),
+        prune=dict(type="bool", required=False, default=False),
         **get_vault_api_request_argument_spec(),
     )
 
-    module = AnsibleModule(argument_spec=module_args)
+    module = AnsibleModule(
+        argument_spec=module_args,
+        mutually_exclusive=[
+            ("namespaces", "name"),
+            ("namespaces", "custom_metadata"),
+            ("namespaces", "state"),
+            ("name", "prune"),
+        ],
+        required_one_of=[("name", "namespaces")],
+    )
     name = module.params["name"]
     custom_metadata = module.params["custom_metadata"]
     state = module.params["state"]
 
     result = {"changed": False}
 
+    if module.params["namespaces"] is not None:
+        manage_namespace_tree(module, result)
+        module.exit_json(**result, **vault_api_request_stats(module))
+
     # Get namespace state
     existing_namespace = vault_api_request(
         module,
@@ -130,7 +386,7 @@ def run_module():
                 method="PATCH"
             )
 
-    module.exit_json(**result)
+    module.exit_json(**result, **vault_api_request_stats(module))
 
 
 def main():
@@ -4,6 +4,8 @@ from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.bbcrd.vault.plugins.module_utils.vault import (
     get_vault_api_request_argument_spec,
     vault_api_request,
+    vault_api_request_many,
+    vault_api_request_stats,
 )
 from ansible_collections.bbcrd.vault.plugins.module_utils.dict_compare import (
     dict_issubset,
@@ -57,6 +59,34 @@ options:
         default: none
         type: str
         default: null
+    vault_leader_routing:
+        description: |-
+            If true, discover the active node of the Vault cluster (using the
+            sys/leader endpoint) and send write requests directly to it rather
+            than to vault_url, which may be a standby node. The active node's
+            advertised API address must be reachable from the host running
+            this module.
+        required: false
+        default: false
+        type: bool
+    vault_retry_timeout:
+        description: |-
+            Requests which fail due to transient errors (e.g. rate limiting,
+            a sealed node or a leadership election) are retried with
+            exponential backoff for up to this many seconds. Only requests
+            which are safe to repeat are retried. Set to zero to disable
+            retries.
+        required: false
+        default: 60
+        type: float
+    vault_request_stats:
+        description: |-
+            If true, return a summary of the Vault API requests made by this
+            module (counts, bytes transferred and timings per endpoint) under
+            the 'vault_request_stats' key of the result.
+        type: bool
+        required: false
+        default: false
 """
 
 EXAMPLES = r"""
@@ -103,24 +133,41 @@ def run_module():
         expected_status=[200, 404],
     ).get("data", {"keys": []})["keys"]
 
+    # Read existing roles
+    read_role_ids = [role_id for role_id in roles if role_id in existing_roles]
+    existing_params = {
+        role_id: response.get("data")
+        for role_id, response in zip(
+            read_role_ids,
+            vault_api_request_many(
+                module,
+                [
+                    ("GET", f"/v1/auth/{mount}/role/{role_id}", None, (200, 404))
+                    for role_id in read_role_ids
+                ],
+            ),
+        )
+    }
+
     # Delete any roles not defined in the input
-    for role_id in set(existing_roles) - set(roles):
-        result["changed"] = True
-        vault_api_request(module, f"/v1/auth/{mount}/role/{role_id}", method="DELETE")
+    requests = [
+        ("DELETE", f"/v1/auth/{mount}/role/{role_id}")
+        for role_id in sorted(set(existing_roles) - set(roles))
+    ]
 
     # Write any new/changed roles
-    for role_id, params in roles.items():
-        existing_params = vault_api_request(
-            module, f"/v1/auth/{mount}/role/{role_id}", expected_status=[200, 404]
-        ).get("data")
-
-        if existing_params is None or not dict_issubset(params, existing_params):
-            result["changed"] = True
-            vault_api_request(
-                module, f"/v1/auth/{mount}/role/{role_id}", method="POST", data=params
-            )
-
-    module.exit_json(**result)
+    requests.extend(
+        ("POST", f"/v1/auth/{mount}/role/{role_id}", params)
+        for role_id, params in roles.items()
+        if existing_params.get(role_id) is None
+        or not dict_issubset(params, existing_params[role_id])
+    )
+
+    if requests:
+        result["changed"] = True
+        vault_api_request_many(module, requests)
+
+    module.exit_json(**result, **vault_api_request_stats(module))
 
 
 def main():
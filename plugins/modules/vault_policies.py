@@ -0,0 +1,218 @@
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.bbcrd.vault.plugins.module_utils.vault import (
+    get_vault_api_request_argument_spec,
+    vault_api_request,
+    vault_api_request_many,
+    vault_api_request_stats,
+)
+from ansible_collections.bbcrd.vault.plugins.module_utils.hcl import normalise_hcl
+
+
+DOCUMENTATION = r"""
+module: bbcrd.vault.vault_policies
+
+short_description: Create, update and delete many Vault ACL policies at once
+
+description: |-
+    Declaratively control a collection of Vault ACL policies in one go. This
+    is equivalent to (but much faster than) using bbcrd.vault.vault_policy
+    for each policy in turn.
+
+    Existing policies are enumerated using a single listing and their
+    documents are read concurrently. Policy documents are compared ignoring
+    insignificant whitespace differences (e.g. trailing whitespace, blank
+    lines and trailing newlines) and only policies which actually differ are
+    (concurrently) written.
+
+options:
+    policies:
+        description: |-
+            A dictionary from policy names to HCL policy documents.
+
+            Vault policy names are case-insensitive and are always stored in
+            lowercase: names given here are lowercased accordingly (and so
+            must not differ only in case).
+        required: true
+        type: dict
+    prune:
+        description: |-
+            If true, any policies not enumerated in 'policies' will be
+            deleted. The built-in 'root' and 'default' policies are never
+            deleted.
+        required: false
+        type: bool
+        default: false
+    vault_url:
+        description: |-
+          the base url of the vault server.
+        required: false
+        default: https://localhost:8200
+        type: str
+    vault_namespace:
+        description: |-
+          the vault namespace to issue the command to.
+        required: false
+        default: ""
+        type: str
+    vault_token:
+        description: |-
+          token to use for vault api calls.
+        required: false
+        default: ""
+        type: str
+    vault_ca_path:
+        description: |-
+            the filename of the ca pem file to use. set to none to use the
+            built in certificate store.
+        required: false
+        default: none
+        type: str
+        default: null
+    vault_leader_routing:
+        description: |-
+            If true, discover the active node of the Vault cluster (using the
+            sys/leader endpoint) and send write requests directly to it rather
+            than to vault_url, which may be a standby node. The active node's
+            advertised API address must be reachable from the host running
+            this module.
+        required: false
+        default: false
+        type: bool
+    vault_retry_timeout:
+        description: |-
+            Requests which fail due to transient errors (e.g. rate limiting,
+            a sealed node or a leadership election) are retried with
+            exponential backoff for up to this many seconds. Only requests
+            which are safe to repeat are retried. Set to zero to disable
+            retries.
+        required: false
+        default: 60
+        type: float
+    vault_request_stats:
+        description: |-
+            If true, return a summary of the Vault API requests made by this
+            module (counts, bytes transferred and timings per endpoint) under
+            the 'vault_request_stats' key of the result.
+        type: bool
+        required: false
+        default: false
+"""
+
+RETURN = r"""
+changed_policies:
+    description: |-
+        The names of the policies which were created, updated or deleted.
+    type: list
+    elements: str
+    returned: always
+"""
+
+EXAMPLES = r"""
+- name: Manage all policies
+  bbcrd.vault.vault_policies:
+    policies:
+      cluster-status-reader: |-
+        path "sys/storage/raft/autopilot/state" {
+          capabilities = ["read"]
+        }
+      kv-reader: "{{ lookup('template', 'kv-reader.hcl.j2') }}"
+    prune: true
+"""
+
+
+UNDELETABLE_POLICIES = ("root", "default")
+"""
+Built-in policies which Vault does not allow to be deleted.
+"""
+
+
+def run_module():
+    module_args = dict(
+        policies=dict(type="dict", required=True),
+        prune=dict(type="bool", required=False, default=False),
+        **get_vault_api_request_argument_spec(),
+    )
+
+    module = AnsibleModule(argument_spec=module_args)
+    prune = module.params["prune"]
+
+    result = {"changed": False, "changed_policies": []}
+
+    # NB: Vault lowercases policy names so we do the same to match them up
+    # with the (lowercase) names listed by Vault
+    policies = {}
+    for name, policy in module.params["policies"].items():
+        if not isinstance(policy, str):
+            module.fail_json(msg=f"Policy {name} must be a string.")
+        if name.lower() in policies:
+            module.fail_json(msg=f"Policy {name} is specified more than once.")
+        policies[name.lower()] = policy
+
+    # Enumerate existing policies
+    existing_names = set(
+        vault_api_request(
+            module,
+            "/v1/sys/policies/acl",
+            method="LIST",
+            expected_status=(200, 404),
+        )
+        .get("data", {})
+        .get("keys", [])
+    )
+
+    # Read the managed existing policies
+    read_names = [name for name in policies if name in existing_names]
+    existing_policies = {
+        name: response.get("data", {}).get("policy")
+        for name, response in zip(
+            read_names,
+            vault_api_request_many(
+                module,
+                [
+                    ("GET", f"/v1/sys/policies/acl/{name}", None, (200, 404))
+                    for name in read_names
+                ],
+            ),
+        )
+    }
+
+    # Create or update policies
+    write_names = [
+        name
+        for name, policy in policies.items()
+        if existing_policies.get(name) is None
+        or normalise_hcl(policy) != normalise_hcl(existing_policies[name])
+    ]
+    vault_api_request_many(
+        module,
+        [
+            ("POST", f"/v1/sys/policies/acl/{name}", {"policy": policies[name]})
+            for name in write_names
+        ],
+    )
+    result["changed_policies"].extend(write_names)
+
+    # Delete unlisted policies
+    if prune:
+        delete_names = sorted(
+            name
+            for name in existing_names
+            if name not in policies and name not in UNDELETABLE_POLICIES
+        )
+        vault_api_request_many(
+            module,
+            [("DELETE", f"/v1/sys/policies/acl/{name}") for name in delete_names],
+        )
+        result["changed_policies"].extend(delete_names)
+
+    result["changed"] = bool(result["changed_policies"])
+
+    module.exit_json(**result, **vault_api_request_stats(module))
+
+
+def main():
+    run_module()
+
+
+if __name__ == "__main__":
+    main()
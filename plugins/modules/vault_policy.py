@@ -3,7 +3,9 @@ from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.bbcrd.vault.plugins.module_utils.vault import (
     get_vault_api_request_argument_spec,
     vault_api_request,
+    vault_api_request_stats,
 )
+from ansible_collections.bbcrd.vault.plugins.module_utils.hcl import normalise_hcl
 
 
 DOCUMENTATION = r"""
@@ -54,6 +56,34 @@ options:
         default: none
         type: str
         default: null
+    vault_leader_routing:
+        description: |-
+            If true, discover the active node of the Vault cluster (using the
+            sys/leader endpoint) and send write requests directly to it rather
+            than to vault_url, which may be a standby node. The active node's
+            advertised API address must be reachable from the host running
+            this module.
+        required: false
+        default: false
+        type: bool
+    vault_retry_timeout:
+        description: |-
+            Requests which fail due to transient errors (e.g. rate limiting,
+            a sealed node or a leadership election) are retried with
+            exponential backoff for up to this many seconds. Only requests
+            which are safe to repeat are retried. Set to zero to disable
+            retries.
+        required: false
+        default: 60
+        type: float
+    vault_request_stats:
+        description: |-
+            If true, return a summary of the Vault API requests made by this
+            module (counts, bytes transferred and timings per endpoint) under
+            the 'vault_request_stats' key of the result.
+        type: bool
+        required: false
+        default: false
 """
 
 EXAMPLES = r"""
@@ -96,12 +126,14 @@ def run_module():
     ).get("rules")
 
     if state == "present":
-        if "policy" not in module.params:
+        if module.params["policy"] is None:
             module.fail_json(msg="'policy' must be specified when state = present.")
         policy = module.params["policy"]
 
-        # Create-or-update
-        if policy != existing_policy:
+        # Create-or-update (ignoring insignificant whitespace differences)
+        if existing_policy is None or normalise_hcl(policy) != normalise_hcl(
+            existing_policy
+        ):
             result["changed"] = True
             vault_api_request(
                 module,
@@ -118,7 +150,7 @@ def run_module():
             result["changed"] = True
             vault_api_request(module, f"/v1/sys/policy/{name}", method="DELETE")
 
-    module.exit_json(**result)
+    module.exit_json(**result, **vault_api_request_stats(module))
 
 
 def main():
@@ -0,0 +1,293 @@
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.bbcrd.vault.plugins.module_utils.vault import (
+    get_vault_api_request_argument_spec,
+    vault_api_request,
+    vault_api_request_many,
+    vault_api_request_stats,
+)
+
+
+DOCUMENTATION = r"""
+module: bbcrd.vault.vault_secrets_engines
+
+short_description: Enable, configure (or disable) many secrets engines at once.
+
+description: |-
+    Declaratively control a collection of secrets engines in one go. This is
+    equivalent to (but much faster than) using bbcrd.vault.vault_secrets_engine
+    for each mount in turn.
+
+    All existing secrets engines are read using a single request and any
+    necessary changes are then made concurrently.
+
+options:
+    secrets_engines:
+        description: |-
+            A dictionary from mount points (without the trailing slash) to
+            secrets engine parameters. Each secrets engine's parameters may
+            contain the following keys which have the same meaning as the
+            equivalent bbcrd.vault.vault_secrets_engine options: 'type'
+            (required unless state is 'absent'), 'description', 'config',
+            'options' and 'state'.
+            
+            Warning: Changing the type or options of an existing secrets
+            engine will cause it to be destroyed and recreated!
+        required: true
+        type: dict
+    prune:
+        description: |-
+            If true, any secrets engines not enumerated in 'secrets_engines'
+            will be disabled (destroying their contents!). The built-in 'sys',
+            'cubbyhole' and 'identity' mounts are never disabled.
+        required: false
+        type: bool
+        default: false
+    vault_url:
+        description: |-
+          the base url of the vault server.
+        required: false
+        default: https://localhost:8200
+        type: str
+    vault_namespace:
+        description: |-
+          the vault namespace to issue the command to.
+        required: false
+        default: ""
+        type: str
+    vault_token:
+        description: |-
+          token to use for vault api calls.
+        required: false
+        default: ""
+        type: str
+    vault_ca_path:
+        description: |-
+            the filename of the ca pem file to use. set to none to use the
+            built in certificate store.
+        required: false
+        default: none
+        type: str
+        default: null
+    vault_leader_routing:
+        description: |-
+            If true, discover the active node of the Vault cluster (using the
+            sys/leader endpoint) and send write requests directly to it rather
+            than to vault_url, which may be a standby node. The active node's
+            advertised API address must be reachable from the host running
+            this module.
+        required: false
+        default: false
+        type: bool
+    vault_retry_timeout:
+        description: |-
+            Requests which fail due to transient errors (e.g. rate limiting,
+            a sealed node or a leadership election) are retried with
+            exponential backoff for up to this many seconds. Only requests
+            which are safe to repeat are retried. Set to zero to disable
+            retries.
+        required: false
+        default: 60
+        type: float
+    vault_request_stats:
+        description: |-
+            If true, return a summary of the Vault API requests made by this
+            module (counts, bytes transferred and timings per endpoint) under
+            the 'vault_request_stats' key of the result.
+        type: bool
+        required: false
+        default: false
+"""
+
+RETURN = r"""
+undeclared_mounts:
+    description: |-
+        The mount points (without the trailing slash) of any existing secrets
+        engines which were not enumerated in 'secrets_engines' (excluding the
+        built-in mounts). If 'prune' is true, these will have been disabled.
+    type: list
+    elements: str
+    returned: always
+"""
+
+EXAMPLES = r"""
+- name: Configure all secrets engines
+  bbcrd.vault.vault_secrets_engines:
+    secrets_engines:
+      secret:
+        type: kv
+        options:
+          version: "2"
+      team-a/kv:
+        type: kv
+        description: "Team A's secrets"
+        options:
+          version: "2"
+      ssh-client-signer:
+        type: ssh
+        config:
+          max_lease_ttl: 86400
+      obsolete:
+        state: absent
+    prune: true
+"""
+
+
+SECRETS_ENGINE_PARAMETERS = ("type", "description", "config", "options", "state")
+
+BUILTIN_MOUNTS = ("sys", "cubbyhole", "identity")
+"""
+Mount points of the built-in secrets engines which cannot be disabled.
+"""
+
+
+def needs_recreating(existing_engine: dict, engine: dict) -> bool:
+    """
+    Test whether an existing secrets engine must be destroyed and recreated
+    to match the desired type and options.
+    """
+    existing_options = existing_engine.get("options") or {}
+    return (
+        # Can't change type without recreating
+        existing_engine["type"] != engine["type"]
+        # Can't change options without recreating
+        or any(
+            key not in existing_options or existing_options[key] != value
+            for key, value in engine["options"].items()
+        )
+    )
+
+
+def needs_tuning(existing_engine: dict, engine: dict) -> bool:
+    """
+    Test whether an existing secrets engine's description or config differ
+    from the desired values.
+    """
+    existing_config = existing_engine.get("config") or {}
+    return (
+        # Description changes
+        existing_engine.get("description", "") != engine["description"]
+        # Config option changed
+        or any(
+            key not in existing_config or existing_config[key] != value
+            for key, value in engine["config"].items()
+        )
+    )
+
+
+def run_module():
+    module_args = dict(
+        secrets_engines=dict(type="dict", required=True),
+        prune=dict(type="bool", required=False, default=False),
+        **get_vault_api_request_argument_spec(),
+    )
+
+    module = AnsibleModule(argument_spec=module_args)
+    prune = module.params["prune"]
+
+    result = {"changed": False, "undeclared_mounts": []}
+
+    engines = {}
+    for mount, parameters in module.params["secrets_engines"].items():
+        mount = mount.rstrip("/")
+        # To allow lazy YAML specification
+        parameters = parameters or {}
+        unknown = set(parameters) - set(SECRETS_ENGINE_PARAMETERS)
+        if unknown:
+            module.fail_json(
+                msg=f"Unsupported parameters for secrets engine {mount}: {', '.join(sorted(unknown))}"
+            )
+        state = parameters.get("state") or "present"
+        if state not in ("present", "absent"):
+            module.fail_json(
+                msg=f"state for secrets engine {mount} must be one of: present, absent"
+            )
+        if state == "present" and not parameters.get("type"):
+            module.fail_json(msg=f"'type' must be specified for secrets engine {mount}.")
+        engines[mount] = {
+            "type": parameters.get("type"),
+            "description": parameters.get("description") or "",
+            "config": parameters.get("config") or {},
+            "options": parameters.get("options") or {},
+            "state": state,
+        }
+
+    # Read all existing secrets engines
+    existing_engines = {
+        mount.rstrip("/"): engine
+        for mount, engine in vault_api_request(module, "/v1/sys/mounts")
+        .get("data", {})
+        .items()
+    }
+
+    result["undeclared_mounts"] = sorted(
+        mount
+        for mount in existing_engines
+        if mount not in engines and mount not in BUILTIN_MOUNTS
+    )
+
+    # Work out which mounts must be disabled (including those which must be
+    # recreated) and which must be enabled or tuned
+    disable_mounts = []
+    enable_mounts = []
+    tune_mounts = []
+    for mount, engine in engines.items():
+        existing_engine = existing_engines.get(mount)
+        if engine["state"] == "absent":
+            if existing_engine is not None:
+                disable_mounts.append(mount)
+        elif existing_engine is None:
+            enable_mounts.append(mount)
+        elif needs_recreating(existing_engine, engine):
+            disable_mounts.append(mount)
+            enable_mounts.append(mount)
+        elif needs_tuning(existing_engine, engine):
+            tune_mounts.append(mount)
+    if prune:
+        disable_mounts.extend(result["undeclared_mounts"])
+
+    if disable_mounts or enable_mounts or tune_mounts:
+        result["changed"] = True
+
+    # NB: Disabling must complete before any mounts being recreated are
+    # enabled again.
+    vault_api_request_many(
+        module,
+        [("DELETE", f"/v1/sys/mounts/{mount}") for mount in disable_mounts],
+    )
+    vault_api_request_many(
+        module,
+        [
+            (
+                "POST",
+                f"/v1/sys/mounts/{mount}",
+                {
+                    "type": engines[mount]["type"],
+                    "description": engines[mount]["description"],
+                    "config": engines[mount]["config"],
+                    "options": engines[mount]["options"],
+                },
+            )
+            for mount in enable_mounts
+        ]
+        + [
+            (
+                "POST",
+                f"/v1/sys/mounts/{mount}/tune",
+                dict(
+                    engines[mount]["config"],
+                    description=engines[mount]["description"],
+                ),
+            )
+            for mount in tune_mounts
+        ],
+    )
+
+    module.exit_json(**result, **vault_api_request_stats(module))
+
+
+def main():
+    run_module()
+
+
+if __name__ == "__main__":
+    main()
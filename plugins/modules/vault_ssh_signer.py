@@ -1,9 +1,11 @@
+from typing import Dict, List, Optional
 import os
 import json
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.bbcrd.vault.plugins.module_utils.vault import (
     get_vault_api_request_argument_spec,
-    vault_api_request,
+    vault_api_request_many,
+    vault_api_request_stats,
 )
 
 
@@ -49,6 +51,19 @@ options:
         required: false
         type: str
         default: "ssh"
+    mounts:
+        description: |-
+            Configure several SSH secrets engine mounts at once. A dictionary
+            from mountpoints (without the trailing slash) to dictionaries with
+            (all optional) 'ca', 'roles' and 'state' keys which have the same
+            meaning as the equivalent options of this module.
+            
+            The existing configuration of all mounts is read concurrently and
+            any necessary changes are then made concurrently.
+            
+            Mutually exclusive with 'ca', 'roles', 'state' and 'mount'.
+        required: false
+        type: dict
     vault_url:
         description: |-
           the base url of the vault server.
@@ -75,6 +90,34 @@ options:
         default: none
         type: str
         default: null
+    vault_leader_routing:
+        description: |-
+            If true, discover the active node of the Vault cluster (using the
+            sys/leader endpoint) and send write requests directly to it rather
+            than to vault_url, which may be a standby node. The active node's
+            advertised API address must be reachable from the host running
+            this module.
+        required: false
+        default: false
+        type: bool
+    vault_retry_timeout:
+        description: |-
+            Requests which fail due to transient errors (e.g. rate limiting,
+            a sealed node or a leadership election) are retried with
+            exponential backoff for up to this many seconds. Only requests
+            which are safe to repeat are retried. Set to zero to disable
+            retries.
+        required: false
+        default: 60
+        type: float
+    vault_request_stats:
+        description: |-
+            If true, return a summary of the Vault API requests made by this
+            module (counts, bytes transferred and timings per endpoint) under
+            the 'vault_request_stats' key of the result.
+        type: bool
+        required: false
+        default: false
 """
 
 EXAMPLES = r"""
@@ -106,21 +149,45 @@ EXAMPLES = r"""
         ttl: 43200
         max_ttl: 43200
     mount: ssh-client-signer
+
+- name: Configure SSH signing engines for several environments
+  bbcrd.vault.vault_ssh_signer
+    mounts:
+      ssh-client-signer-production:
+        ca:
+          generate_signing_key: true
+        roles:
+          admin:
+            key_type: ca
+            allow_user_certificates: true
+            allowed_users: root
+      ssh-client-signer-staging:
+        ca:
+          generate_signing_key: true
+        roles:
+          admin:
+            key_type: ca
+            allow_user_certificates: true
+            allowed_users: root,pdumon
+      ssh-client-signer-obsolete:
+        state: absent
 """
 
 
-def configure_ca(module: AnsibleModule, result: dict) -> None:
-    ca = module.params["ca"]
-    state = module.params["state"]
-    mount = module.params["mount"]
-    
-    existing_ca = vault_api_request(
-        module,
-        f"/v1/{mount}/config/ca",
-        method="GET",
-        expected_status=[200, 400],
-    ).get("data")
-    
+MOUNT_PARAMETERS = ("ca", "roles", "state")
+
+STATES = ("present", "replaced", "absent")
+
+
+def ca_requests(mount: str, config: dict, existing_ca: Optional[dict]) -> list:
+    """
+    Return the (method, api_path[, data]) requests needed to bring the CA
+    configuration of an SSH secrets engine mount into the desired state,
+    given its existing CA configuration (None if not configured).
+    """
+    ca = config["ca"]
+    state = config["state"]
+
     if state in ("present", "replaced"):
         if (
             existing_ca is None
@@ -129,46 +196,38 @@ def configure_ca(module: AnsibleModule, result: dict) -> None:
                 and ca.get("public_key") != existing_ca["public_key"]
             )
         ):
-            result["changed"] = True
-            vault_api_request(
-                module,
-                f"/v1/{mount}/config/ca",
-                method="POST",
-                data=ca,
-            )
+            return [("POST", f"/v1/{mount}/config/ca", ca)]
     elif state == "absent":
         if existing_ca is not None:
-            result["changed"] = True
-            vault_api_request(module, f"/v1/{mount}/config/ca", method="DELETE")
+            return [("DELETE", f"/v1/{mount}/config/ca")]
+    return []
 
 
-def configure_roles(module: AnsibleModule, result: dict) -> None:
-    roles = module.params["roles"]
-    state = module.params["state"]
-    mount = module.params["mount"]
-    
-    if state == "absent":
+def role_requests(
+    mount: str,
+    config: dict,
+    existing_role_names: List[str],
+    existing_roles: Dict[str, Optional[dict]],
+) -> list:
+    """
+    Return the (method, api_path[, data]) requests needed to bring the roles
+    of an SSH secrets engine mount into the desired state, given the names
+    of its existing roles and the existing configuration of the (desired)
+    roles (None for missing roles).
+    """
+    roles = config["roles"]
+    if config["state"] == "absent":
         roles = {}
-    
-    existing_roles = vault_api_request(
-        module,
-        f"/v1/{mount}/roles",
-        method="LIST",
-        expected_status=[200, 404],
-    ).get("data", {}).get("keys", [])
-    
+
+    requests = []
+
     # Delete extra roles
-    for role_name in set(existing_roles) - set(roles):
-        result["changed"] = True
-        vault_api_request(module, f"/v1/{mount}/roles/{role_name}", method="DELETE")
-    
+    for role_name in sorted(set(existing_role_names) - set(roles)):
+        requests.append(("DELETE", f"/v1/{mount}/roles/{role_name}"))
+
     # Create/update roles
     for role_name, params in roles.items():
-        existing_params = vault_api_request(
-            module,
-            f"/v1/{mount}/roles/{role_name}",
-            expected_status=[200, 404],
-        ).get("data")
+        existing_params = existing_roles.get(role_name)
         if (
             existing_params is None
             or any(
@@ -176,13 +235,9 @@ def configure_roles(module: AnsibleModule, result: dict) -> None:
                 for key, value in params.items()
             )
         ):
-            result["changed"] = True
-            vault_api_request(
-                module,
-                f"/v1/{mount}/roles/{role_name}",
-                method="POST",
-                data=params
-            )
+            requests.append(("POST", f"/v1/{mount}/roles/{role_name}", params))
+
+    return requests
 
 
 def run_module():
@@ -191,24 +246,87 @@ def run_module():
         roles=dict(type="dict", default={}),
         state=dict(
             type="str",
-            choices=[
-                "present",
-                "replaced",
-                "absent",
-            ],
+            choices=list(STATES),
             default="present",
         ),
         mount=dict(type="str", default="ssh"),
+        mounts=dict(type="dict", required=False),
         **get_vault_api_request_argument_spec(),
     )
 
-    module = AnsibleModule(argument_spec=module_args)
+    module = AnsibleModule(
+        argument_spec=module_args,
+        mutually_exclusive=[
+            ("mounts", "ca"),
+            ("mounts", "roles"),
+            ("mounts", "state"),
+            ("mounts", "mount"),
+        ],
+    )
     result = {"changed": False}
 
-    configure_ca(module, result)
-    configure_roles(module, result)
+    if module.params["mounts"] is None:
+        mounts = {
+            module.params["mount"]: {
+                "ca": module.params["ca"],
+                "roles": module.params["roles"],
+                "state": module.params["state"],
+            }
+        }
+    else:
+        mounts = {}
+        for mount, parameters in module.params["mounts"].items():
+            # To allow lazy YAML specification
+            parameters = parameters or {}
+            unknown = set(parameters) - set(MOUNT_PARAMETERS)
+            if unknown:
+                module.fail_json(
+                    msg=f"Unsupported parameters for mount {mount}: {', '.join(sorted(unknown))}"
+                )
+            state = parameters.get("state") or "present"
+            if state not in STATES:
+                module.fail_json(
+                    msg=f"state for mount {mount} must be one of: {', '.join(STATES)}"
+                )
+            mounts[mount] = {
+                "ca": parameters.get("ca") or {},
+                "roles": parameters.get("roles") or {},
+                "state": state,
+            }
+
+    # Read the CA configuration, role listing and configuration of every
+    # desired role of every mount in a single concurrent round
+    read_requests = []
+    for mount, config in mounts.items():
+        read_requests.append(("GET", f"/v1/{mount}/config/ca", None, (200, 400)))
+        read_requests.append(("LIST", f"/v1/{mount}/roles", None, (200, 404)))
+        if config["state"] != "absent":
+            for role_name in config["roles"]:
+                read_requests.append(
+                    ("GET", f"/v1/{mount}/roles/{role_name}", None, (200, 404))
+                )
+    responses = iter(vault_api_request_many(module, read_requests))
+
+    write_requests = []
+    for mount, config in mounts.items():
+        existing_ca = next(responses).get("data")
+        existing_role_names = next(responses).get("data", {}).get("keys", [])
+        existing_roles = {}
+        if config["state"] != "absent":
+            for role_name in config["roles"]:
+                existing_roles[role_name] = next(responses).get("data")
+
+        write_requests.extend(ca_requests(mount, config, existing_ca))
+        write_requests.extend(
+            role_requests(mount, config, existing_role_names, existing_roles)
+        )
+
+    # Apply all changes concurrently
+    if write_requests:
+        result["changed"] = True
+        vault_api_request_many(module, write_requests)
 
-    module.exit_json(**result)
+    module.exit_json(**result, **vault_api_request_stats(module))
 
 
 def main():
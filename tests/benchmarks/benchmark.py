@@ -0,0 +1,558 @@
+#!/usr/bin/env python3
+
+"""
+Scale benchmarks for the reconciling modules in this collection.
+
+Each benchmarked module is run with 10, 1,000 and 10,000 objects (e.g.
+roles, aliases or group members) in two cases:
+
+* no_change: Vault already matches the requested state.
+* all_change: every object differs from the requested state.
+
+For each run the number of Vault API requests, the median (p50) and 99th
+percentile (p99) request latency and the total wall-clock time are reported.
+
+By default, modules are run against the in-process mock Vault server in
+tests/mock_vault/ (with optional artificial latency) with a fresh server for
+every run. Alternatively a real Vault server may be used, for example::
+
+    $ vault server -dev -dev-root-token-id=root &
+    $ python tests/benchmarks/benchmark.py --vault-url http://127.0.0.1:8200 --vault-token root
+
+When using a real server, each run creates its objects under unique names
+and mount points and nothing is cleaned up afterwards, so use a throwaway
+(e.g. dev mode) server.
+
+Modules are run in-process (but with fresh Vault clients for every module
+invocation, as if run in a separate process by Ansible). Request latencies are
+collected using the BBCRD_VAULT_API_TRACE_FILE mechanism of the vault
+module_utils.
+
+Results may be saved as a JSON baseline (--output) and later runs compared
+against it (--compare)::
+
+    $ python tests/benchmarks/benchmark.py --output baseline.json
+    ... make changes ...
+    $ python tests/benchmarks/benchmark.py --compare baseline.json
+"""
+
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple
+
+import io
+import os
+import sys
+import json
+import time
+import platform
+import tempfile
+import contextlib
+import importlib
+from datetime import datetime, timezone
+from argparse import ArgumentParser
+from pathlib import Path
+
+
+TESTS_DIR = Path(__file__).resolve().parent.parent
+COLLECTION_DIR = TESTS_DIR.parent
+
+sys.path.insert(0, str(TESTS_DIR / "mock_vault"))
+
+from mock_vault import MockVaultServer  # noqa: E402
+
+try:
+    import ansible_collections.bbcrd.vault  # noqa: F401
+except ImportError:
+    # Running from a checkout located at .../ansible_collections/bbcrd/vault
+    if COLLECTION_DIR.parent.parent.name == "ansible_collections":
+        sys.path.insert(0, str(COLLECTION_DIR.parent.parent.parent))
+    else:
+        sys.exit(
+            "The bbcrd.vault collection must be importable: install it or add the "
+            "directory containing 'ansible_collections/bbcrd/vault' to PYTHONPATH."
+        )
+
+from ansible_collections.bbcrd.vault.plugins.module_utils import vault  # noqa: E402
+
+try:
+    from ansible.module_utils.testing import patch_module_args
+except ImportError:  # ansible-core < 2.19
+
+    @contextlib.contextmanager
+    def patch_module_args(args: dict) -> Iterator[None]:
+        from ansible.module_utils import basic
+
+        old_args = basic._ANSIBLE_ARGS
+        basic._ANSIBLE_ARGS = json.dumps({"ANSIBLE_MODULE_ARGS": args}).encode()
+        try:
+            yield
+        finally:
+            basic._ANSIBLE_ARGS = old_args
+
+
+DEFAULT_SIZES = [10, 1000, 10000]
+
+CASES = ["no_change", "all_change"]
+
+
+Invocation = Tuple[str, dict]
+"""A (module_name, module_args) pair."""
+
+
+class Scenario(NamedTuple):
+    """
+    A benchmark for a module. The functions take the number of objects and a
+    unique prefix (for names and mount points) and return a list of module
+    invocations.
+    """
+
+    module: str
+
+    # Create any mounts etc. required
+    setup: Callable[[int, str], List[Invocation]]
+
+    # The invocations to measure. Called with changed=True to produce the
+    # 'before' state for the all_change case.
+    run: Callable[..., List[Invocation]]
+
+
+def _setup_auth_method(type: str):
+    return lambda n, prefix: [
+        ("vault_auth_method", {"type": type, "mount": f"{prefix}{type}"})
+    ]
+
+
+def _no_setup(n: int, prefix: str) -> List[Invocation]:
+    return []
+
+
+def _group_run(n: int, prefix: str, changed: bool = False) -> List[Invocation]:
+    variant = "old" if changed else "new"
+    return [
+        (
+            "vault_group",
+            {
+                "name": f"{prefix}group",
+                "policies": [f"{prefix}{variant}-policy"],
+                "metadata": {"variant": variant},
+                "members": [f"{prefix}{variant}-entity-{i}" for i in range(n)],
+            },
+        )
+    ]
+
+
+def _groups_run(n: int, prefix: str, changed: bool = False) -> List[Invocation]:
+    variant = "old" if changed else "new"
+    return [
+        (
+            "vault_groups",
+            {
+                "groups": {
+                    f"{prefix}group-{i}": {
+                        "policies": [f"{prefix}{variant}-policy"],
+                        "members": [f"{prefix}{variant}-entity-{i}"],
+                    }
+                    for i in range(n)
+                },
+            },
+        )
+    ]
+
+
+def _entities_run(n: int, prefix: str, changed: bool = False) -> List[Invocation]:
+    return [
+        (
+            "vault_entities",
+            {
+                "entities": {
+                    f"{prefix}entity-{i}": {
+                        "metadata": {"variant": "old" if changed else "new"},
+                        "policies": [f"policy-{i}"],
+                    }
+                    for i in range(n)
+                },
+            },
+        )
+    ]
+
+
+def _approles_run(n: int, prefix: str, changed: bool = False) -> List[Invocation]:
+    return [
+        (
+            "vault_approles",
+            {
+                "mount": f"{prefix}approle",
+                "approles": {
+                    f"role-{i}": {
+                        "token_ttl": 120 if changed else 60,
+                        "token_policies": [f"policy-{i}"],
+                    }
+                    for i in range(n)
+                },
+            },
+        )
+    ]
+
+
+def _entity_aliases_run(n: int, prefix: str, changed: bool = False) -> List[Invocation]:
+    variant = "old" if changed else "new"
+    return [
+        (
+            "vault_auth_method_entity_aliases",
+            {
+                "mount": f"{prefix}userpass",
+                "entity_aliases": {
+                    f"user-{i}": f"{prefix}{variant}-entity-{i}" for i in range(n)
+                },
+            },
+        )
+    ]
+
+
+def _ssh_signer_setup(n: int, prefix: str) -> List[Invocation]:
+    return [("vault_secrets_engine", {"type": "ssh", "mount": f"{prefix}ssh"})]
+
+
+def _ssh_signer_run(n: int, prefix: str, changed: bool = False) -> List[Invocation]:
+    return [
+        (
+            "vault_ssh_signer",
+            {
+                "mount": f"{prefix}ssh",
+                "ca": {"generate_signing_key": True},
+                "roles": {
+                    f"role-{i}": {
+                        "key_type": "ca",
+                        "allow_user_certificates": True,
+                        "allowed_users": f"user-{i}",
+                        "ttl": 7200 if changed else 3600,
+                    }
+                    for i in range(n)
+                },
+            },
+        )
+    ]
+
+
+def _oidc_roles_run(n: int, prefix: str, changed: bool = False) -> List[Invocation]:
+    return [
+        (
+            "vault_oidc_roles",
+            {
+                "mount": f"{prefix}oidc",
+                "roles": {
+                    f"role-{i}": {
+                        "user_claim": "email",
+                        "allowed_redirect_uris": [
+                            "http://localhost:8250/oidc/callback"
+                        ],
+                        "token_ttl": 7200 if changed else 3600,
+                    }
+                    for i in range(n)
+                },
+            },
+        )
+    ]
+
+
+def _policy_run(n: int, prefix: str, changed: bool = False) -> List[Invocation]:
+    capabilities = '["read", "list"]' if changed else '["read"]'
+    return [
+        (
+            "vault_policy",
+            {
+                "name": f"{prefix}policy-{i}",
+                "policy": f'path "secret/{i}/*" {{\n  capabilities = {capabilities}\n}}\n',
+            },
+        )
+        for i in range(n)
+    ]
+
+
+def _policies_run(n: int, prefix: str, changed: bool = False) -> List[Invocation]:
+    return [
+        (
+            "vault_policies",
+            {
+                "policies": {
+                    args["name"]: args["policy"]
+                    for _, args in _policy_run(n, prefix, changed)
+                },
+            },
+        )
+    ]
+
+
+def _secrets_engines_run(n: int, prefix: str, changed: bool = False) -> List[Invocation]:
+    return [
+        (
+            "vault_secrets_engines",
+            {
+                "secrets_engines": {
+                    f"{prefix}kv-{i}": {
+                        "type": "kv",
+                        "description": f"KV store {i}{' (changed)' if changed else ''}",
+                        "options": {"version": "2"},
+                    }
+                    for i in range(n)
+                },
+            },
+        )
+    ]
+
+
+def _auth_methods_run(n: int, prefix: str, changed: bool = False) -> List[Invocation]:
+    return [
+        (
+            "vault_auth_methods",
+            {
+                "auth_methods": {
+                    f"{prefix}approle-{i}": {
+                        "type": "approle",
+                        "description": f"AppRole {i}{' (changed)' if changed else ''}",
+                    }
+                    for i in range(n)
+                },
+            },
+        )
+    ]
+
+
+SCENARIOS = {
+    scenario.module: scenario
+    for scenario in [
+        Scenario("vault_group", _no_setup, _group_run),
+        Scenario("vault_groups", _no_setup, _groups_run),
+        Scenario("vault_entities", _no_setup, _entities_run),
+        Scenario("vault_approles", _setup_auth_method("approle"), _approles_run),
+        Scenario(
+            "vault_auth_method_entity_aliases",
+            _setup_auth_method("userpass"),
+            _entity_aliases_run,
+        ),
+        Scenario("vault_ssh_signer", _ssh_signer_setup, _ssh_signer_run),
+        Scenario("vault_oidc_roles", _setup_auth_method("oidc"), _oidc_roles_run),
+        Scenario("vault_policy", _no_setup, _policy_run),
+        Scenario("vault_policies", _no_setup, _policies_run),
+        Scenario("vault_secrets_engines", _no_setup, _secrets_engines_run),
+        Scenario("vault_auth_methods", _no_setup, _auth_methods_run),
+    ]
+}
+
+
+def run_module(module_name: str, args: dict) -> dict:
+    """
+    Run a module in-process, returning its result. Raises an exception if
+    the module fails.
+    """
+    # Start with fresh Vault clients (and connections), as each module
+    # invocation would when run by Ansible
+    with vault._vault_clients_lock:
+        clients = list(vault._vault_clients.values())
+        vault._vault_clients.clear()
+    for client in clients:
+        client.close()
+
+    module = importlib.import_module(
+        f"ansible_collections.bbcrd.vault.plugins.modules.{module_name}"
+    )
+    stdout = io.StringIO()
+    with patch_module_args(args), contextlib.redirect_stdout(stdout):
+        try:
+            module.main()
+        except SystemExit:
+            pass
+    result = json.loads(stdout.getvalue())
+    if result.get("failed"):
+        raise RuntimeError(f"{module_name} failed: {result.get('msg')}")
+    return result
+
+
+def percentile(values: List[float], percent: float) -> Optional[float]:
+    """Return the given percentile of values (nearest-rank method)."""
+    if not values:
+        return None
+    values = sorted(values)
+    rank = max(1, round(percent / 100 * len(values) + 0.5))
+    return values[min(rank, len(values)) - 1]
+
+
+class TraceReader:
+    """Reads new events from a BBCRD_VAULT_API_TRACE_FILE as they appear."""
+
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+        self.offset = 0
+
+    def read_new(self) -> List[dict]:
+        with open(self.filename) as f:
+            f.seek(self.offset)
+            events = [json.loads(line) for line in f]
+            self.offset = f.tell()
+        return events
+
+
+def benchmark(
+    scenario: Scenario,
+    n: int,
+    case: str,
+    vault_args: dict,
+    trace: TraceReader,
+    prefix: str,
+) -> dict:
+    """Run a single benchmark, returning the results."""
+    invocations = scenario.setup(n, prefix)
+    invocations += scenario.run(n, prefix, changed=case == "all_change")
+    for module_name, args in invocations:
+        run_module(module_name, dict(args, **vault_args))
+
+    trace.read_new()
+    start = time.monotonic()
+    changed = False
+    for module_name, args in scenario.run(n, prefix):
+        changed |= run_module(module_name, dict(args, **vault_args))["changed"]
+    total_time = time.monotonic() - start
+    events = trace.read_new()
+
+    if changed != (case == "all_change"):
+        raise RuntimeError(
+            f"{scenario.module} ({n} objects, {case}) unexpectedly "
+            f"reported changed={changed}"
+        )
+
+    latencies = [event["latency"] for event in events if not event["cached"]]
+    return {
+        "module": scenario.module,
+        "objects": n,
+        "case": case,
+        "requests": len(latencies),
+        "cached_requests": len(events) - len(latencies),
+        "p50_latency": percentile(latencies, 50),
+        "p99_latency": percentile(latencies, 99),
+        "total_time": total_time,
+    }
+
+
+def format_seconds(value: Optional[float]) -> str:
+    if value is None:
+        return "-"
+    elif value < 1:
+        return f"{value * 1000:.2f}ms"
+    else:
+        return f"{value:.2f}s"
+
+
+def format_change(value: Optional[float], baseline: Optional[float]) -> str:
+    if value is None or not baseline:
+        return ""
+    return f" ({(value - baseline) / baseline:+.0%})"
+
+
+def print_result(result: dict, baseline: Optional[dict]) -> None:
+    baseline = baseline or {}
+    print(
+        f"{result['module']:<34} {result['objects']:>6} {result['case']:<10} "
+        f"{result['requests']:>7}{format_change(result['requests'], baseline.get('requests')):<8} "
+        f"{format_seconds(result['p50_latency']):>9} "
+        f"{format_seconds(result['p99_latency']):>9} "
+        f"{format_seconds(result['total_time']):>9}"
+        f"{format_change(result['total_time'], baseline.get('total_time'))}",
+        flush=True,
+    )
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--module",
+        "-m",
+        action="append",
+        choices=sorted(SCENARIOS),
+        help="Module to benchmark (may be given several times; default: all).",
+    )
+    parser.add_argument(
+        "--sizes",
+        type=lambda value: [int(n) for n in value.split(",")],
+        default=DEFAULT_SIZES,
+        help="Comma separated numbers of objects (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--case",
+        action="append",
+        choices=CASES,
+        help="Case to benchmark (may be given several times; default: all).",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="Artificial latency (seconds) added by the mock Vault server.",
+    )
+    parser.add_argument(
+        "--vault-url",
+        help="Benchmark against this (throwaway) Vault server, not the mock.",
+    )
+    parser.add_argument("--vault-token", help="Token for --vault-url.")
+    parser.add_argument("--output", "-o", help="Write the results to this JSON file.")
+    parser.add_argument(
+        "--compare", "-c", help="Compare against results from a previous --output."
+    )
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            for result in json.load(f)["results"]:
+                baseline[(result["module"], result["objects"], result["case"])] = result
+
+    trace_file = tempfile.NamedTemporaryFile(suffix=".jsonl", delete=False)
+    trace_file.close()
+    os.environ[vault.TRACE_FILE_ENVIRONMENT_VARIABLE] = trace_file.name
+    trace = TraceReader(trace_file.name)
+
+    print(
+        f"{'module':<34} {'objects':>6} {'case':<10} {'requests':>15} "
+        f"{'p50':>9} {'p99':>9} {'total':>9}"
+    )
+    results = []
+    run_id = f"bench-{int(time.time())}-"
+    try:
+        for module_name in args.module or list(SCENARIOS):
+            for n in args.sizes:
+                for case in args.case or CASES:
+                    prefix = f"{run_id}{len(results)}-"
+                    if args.vault_url:
+                        vault_args = {
+                            "vault_url": args.vault_url,
+                            "vault_token": args.vault_token,
+                        }
+                        server = contextlib.nullcontext()
+                    else:
+                        server = MockVaultServer(latency=args.latency)
+                        vault_args = {"vault_url": server.url}
+                    with server:
+                        result = benchmark(
+                            SCENARIOS[module_name], n, case, vault_args, trace, prefix
+                        )
+                    results.append(result)
+                    print_result(result, baseline.get((module_name, n, case)))
+    finally:
+        os.unlink(trace_file.name)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "date": datetime.now(timezone.utc).isoformat(),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "vault": args.vault_url or f"mock (latency={args.latency}s)",
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
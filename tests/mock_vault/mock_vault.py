@@ -0,0 +1,1217 @@
+#!/usr/bin/env python3
+
+"""
+An in-process, pure-Python stand-in for the subset of the Vault HTTP API used
+by the modules in this collection.
+
+This is intended for benchmarking and offline testing of the modules without
+a real Vault (or OpenBao) server. It is not a faithful reimplementation of
+Vault: it implements just enough of the behaviour of each endpoint for the
+modules to work against it. All state is held in memory.
+
+Usage from Python::
+
+    with MockVaultServer(latency=0.001) as server:
+        # server.url is e.g. "http://127.0.0.1:41234"
+        ...
+        print(server.vault.request_counts)
+
+Or as a standalone server::
+
+    $ python tests/mock_vault/mock_vault.py --port 8200 --latency 0.005
+
+The following endpoints are implemented (paths relative to /v1/):
+
+* sys/auth, sys/auth/:path, sys/auth/:path/tune
+* sys/mounts, sys/mounts/:path, sys/mounts/:path/tune
+* sys/audit, sys/audit/:path
+* sys/policy/:name, sys/policies/acl, sys/policies/acl/:name
+* sys/namespaces, sys/namespaces/:path (namespaces may also be given as a
+  prefix of the API path)
+* sys/leader, sys/health
+* auth/token/lookup-self
+* identity/entity (name/:name, id, id/:id, batch-delete)
+* identity/group (name/:name, id, id/:id)
+* identity/entity-alias (id, id/:id)
+* AppRole auth methods: role, role/:name, role/:name/role-id,
+  role/:name/secret-id, role/:name/custom-secret-id,
+  role/:name/secret-id-accessor/{lookup,destroy}
+* OIDC/JWT auth methods: config, role, role/:name
+* SSH secrets engines: config/ca, roles, roles/:name
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import re
+import sys
+import json
+import time
+import random
+import threading
+from uuid import uuid4
+from collections import Counter, deque
+from argparse import ArgumentParser
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class VaultError(Exception):
+    """Raised by endpoint handlers to produce a Vault-style error response."""
+
+    def __init__(self, status: int, *errors: str) -> None:
+        super().__init__(status, errors)
+        self.status = status
+        self.errors = list(errors)
+
+
+Response = Tuple[int, Any]
+"""A (status, json_body) pair. A json_body of None produces an empty body."""
+
+Headers = Dict[str, str]
+
+
+class NamespaceState:
+    """The in-memory state of a single Vault namespace."""
+
+    def __init__(self, path: str = "") -> None:
+        self.path = path
+
+        self.auth: Dict[str, dict] = {
+            "token/": _new_mount("token", "token based credentials"),
+        }
+        self.mounts: Dict[str, dict] = {
+            "cubbyhole/": _new_mount("cubbyhole", "per-token private secret storage"),
+            "identity/": _new_mount("identity", "identity store"),
+            "sys/": _new_mount("system", "system endpoints used for control, policy and debugging"),
+        }
+        self.audit: Dict[str, dict] = {}
+        self.policies: Dict[str, str] = {
+            "default": '# Allow tokens to look up their own properties\npath "auth/token/lookup-self" {\n    capabilities = ["read"]\n}\n',
+            "root": "",
+        }
+
+        # Child namespaces {name: {"id": ..., "custom_metadata": {...}}}
+        self.namespaces: Dict[str, dict] = {}
+
+        self.entities: Dict[str, dict] = {}  # {id: entity}
+        self.groups: Dict[str, dict] = {}  # {id: group}
+        self.entity_aliases: Dict[str, dict] = {}  # {id: alias}
+
+        # Indices into the above, so that the mock stays fast with many
+        # thousands of identities. Use the add_*/remove_* methods to keep
+        # these up to date. (NB: Like Vault, entity and group names are
+        # case-insensitive so these are indexed by lowercased name.)
+        self._entity_ids_by_name: Dict[str, str] = {}
+        self._group_ids_by_name: Dict[str, str] = {}
+        self._alias_ids_by_entity: Dict[str, Dict[str, None]] = {}
+        self._alias_ids_by_name: Dict[Tuple[str, str], str] = {}
+
+        # {group_id: [parent_group_id, ...]}, rebuilt on demand after any
+        # group membership change (see parent_group_ids)
+        self._parent_group_ids: Optional[Dict[str, List[str]]] = None
+
+        # Per-mount backend state {mount_path/: {...}}
+        self.backends: Dict[str, dict] = {}
+
+    def entity_by_name(self, name: str) -> Optional[dict]:
+        return self.entities.get(self._entity_ids_by_name.get(name.lower()))
+
+    def group_by_name(self, name: str) -> Optional[dict]:
+        return self.groups.get(self._group_ids_by_name.get(name.lower()))
+
+    def alias_by_name(self, mount_accessor: str, name: str) -> Optional[dict]:
+        return self.entity_aliases.get(self._alias_ids_by_name.get((mount_accessor, name)))
+
+    def aliases_of_entity(self, entity_id: str) -> List[dict]:
+        return [
+            self.entity_aliases[alias_id]
+            for alias_id in self._alias_ids_by_entity.get(entity_id, ())
+        ]
+
+    def parent_group_ids(self, group_id: str) -> List[str]:
+        if self._parent_group_ids is None:
+            self._parent_group_ids = {}
+            for parent in self.groups.values():
+                for member_group_id in parent["member_group_ids"]:
+                    self._parent_group_ids.setdefault(member_group_id, []).append(
+                        parent["id"]
+                    )
+        return self._parent_group_ids.get(group_id, [])
+
+    def group_members_changed(self) -> None:
+        self._parent_group_ids = None
+
+    def add_entity(self, entity: dict) -> None:
+        self.entities[entity["id"]] = entity
+        self._entity_ids_by_name[entity["name"].lower()] = entity["id"]
+
+    def remove_entity(self, entity_id: str) -> Optional[dict]:
+        entity = self.entities.pop(entity_id, None)
+        if entity is not None:
+            del self._entity_ids_by_name[entity["name"].lower()]
+        return entity
+
+    def add_group(self, group: dict) -> None:
+        self.groups[group["id"]] = group
+        self._group_ids_by_name[group["name"].lower()] = group["id"]
+        self.group_members_changed()
+
+    def remove_group(self, group_id: str) -> Optional[dict]:
+        group = self.groups.pop(group_id, None)
+        if group is not None:
+            del self._group_ids_by_name[group["name"].lower()]
+            self.group_members_changed()
+        return group
+
+    def add_alias(self, alias: dict) -> None:
+        self.entity_aliases[alias["id"]] = alias
+        self._alias_ids_by_entity.setdefault(alias["canonical_id"], {})[alias["id"]] = None
+        self._alias_ids_by_name[(alias["mount_accessor"], alias["name"])] = alias["id"]
+
+    def remove_alias(self, alias_id: str) -> Optional[dict]:
+        alias = self.entity_aliases.pop(alias_id, None)
+        if alias is not None:
+            self._alias_ids_by_entity[alias["canonical_id"]].pop(alias_id)
+            del self._alias_ids_by_name[(alias["mount_accessor"], alias["name"])]
+        return alias
+
+
+def _new_mount(type: str, description: str = "", config: Optional[dict] = None, options: Optional[dict] = None) -> dict:
+    return {
+        "type": type,
+        "description": description,
+        "accessor": f"{type}_{uuid4().hex[:8]}",
+        "uuid": str(uuid4()),
+        "config": dict(
+            {"default_lease_ttl": 0, "max_lease_ttl": 0, "force_no_cache": False},
+            **(config or {}),
+        ),
+        "options": options,
+        "local": False,
+        "seal_wrap": False,
+        "external_entropy_access": False,
+    }
+
+
+class MockVault:
+    """
+    The request handling logic (and state) of the mock Vault server,
+    independent of any HTTP server.
+
+    Parameters
+    ==========
+    token : str or None
+        If given, requests must carry this token in the X-Vault-Token header.
+    latency : float
+        Seconds of artificial latency to add to every request.
+    jitter : float
+        Additional uniformly distributed random latency (seconds) to add to
+        every request.
+    leader_address : str or None
+        If given, this server behaves as a standby node of a cluster whose
+        active node has this address: sys/leader reports it and all write
+        requests are redirected (307) to it.
+    """
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        leader_address: Optional[str] = None,
+    ) -> None:
+        self.token = token
+        self.latency = latency
+        self.jitter = jitter
+        self.leader_address = leader_address
+
+        self.address = "http://127.0.0.1:8200"
+
+        self.namespaces: Dict[str, NamespaceState] = {"": NamespaceState()}
+
+        self._lock = threading.RLock()
+
+        # Counts of requests made by (method, path template)
+        self.request_counts: Counter = Counter()
+
+        # Canned (status, json_body, headers) responses (see inject_responses)
+        self._injected_responses: deque = deque()
+
+        self._routes: List[Tuple[str, "re.Pattern", str, Callable]] = []
+        self._add_routes()
+
+    # ------------------------------------------------------------------------
+    # Request counting
+    # ------------------------------------------------------------------------
+
+    @property
+    def total_requests(self) -> int:
+        return sum(self.request_counts.values())
+
+    def reset_counts(self) -> None:
+        with self._lock:
+            self.request_counts.clear()
+
+    # ------------------------------------------------------------------------
+    # Fault injection
+    # ------------------------------------------------------------------------
+
+    def inject_responses(self, *responses: Tuple[int, Any, Headers]) -> None:
+        """
+        Respond to the next requests (whatever they are, in order) with the
+        given (status, json_body, headers) tuples without handling them, e.g.
+        to simulate failures. Such requests are counted under the
+        "<injected>" path template.
+        """
+        with self._lock:
+            self._injected_responses.extend(responses)
+
+    # ------------------------------------------------------------------------
+    # Routing
+    # ------------------------------------------------------------------------
+
+    def route(self, methods: str, template: str) -> Callable:
+        """
+        Decorator registering a handler for the given (space separated)
+        methods and path template. Templates use {name} for single path
+        segments and {name*} for paths which may include slashes.
+        """
+        pattern = re.sub(
+            r"\{(\w+)(\*?)\}",
+            lambda m: f"(?P<{m.group(1)}>.+?)" if m.group(2) else f"(?P<{m.group(1)}>[^/]+)",
+            template,
+        )
+        regex = re.compile(f"^{pattern}/?$")
+
+        def decorator(handler: Callable) -> Callable:
+            for method in methods.split():
+                self._routes.append((method, regex, template, handler))
+            return handler
+
+        return decorator
+
+    def handle(
+        self,
+        method: str,
+        path: str,
+        headers: Dict[str, str],
+        body: bytes,
+    ) -> Tuple[int, Any, Headers]:
+        """
+        Handle a request, returning a (status, json_body, headers) tuple.
+        """
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+
+        path, _, query = path.partition("?")
+        if method == "GET" and "list=true" in query.split("&"):
+            method = "LIST"
+
+        with self._lock:
+            if self._injected_responses:
+                self.request_counts[(method, "<injected>")] += 1
+                return self._injected_responses.popleft()
+
+        headers = {k.lower(): v for k, v in headers.items()}
+        try:
+            data = json.loads(body) if body else {}
+        except ValueError:
+            return (400, {"errors": ["failed to parse JSON input"]}, {})
+
+        # Namespaces may be given in the X-Vault-Namespace header and/or as a
+        # prefix of the API path (e.g. /v1/ns1/ns2/sys/namespaces)
+        namespace = headers.get("x-vault-namespace", "").strip("/")
+        route_path = path
+        if path.startswith("/v1/"):
+            segments = path[len("/v1/"):].split("/")
+            with self._lock:
+                for i in range(len(segments) - 1, 0, -1):
+                    prefix = "/".join(filter(None, [namespace] + segments[:i]))
+                    if prefix in self.namespaces:
+                        namespace = prefix
+                        route_path = "/v1/" + "/".join(segments[i:])
+                        break
+
+        for route_method, regex, template, handler in self._routes:
+            if route_method != method:
+                continue
+            match = regex.match(route_path)
+            if match is None:
+                continue
+
+            with self._lock:
+                self.request_counts[(method, template)] += 1
+                if (
+                    self.leader_address is not None
+                    and method not in ("GET", "LIST")
+                ):
+                    return (307, None, {"Location": f"{self.leader_address}{path}"})
+                try:
+                    if self.token is not None and template not in ("/v1/sys/health", "/v1/sys/leader"):
+                        if headers.get("x-vault-token") != self.token:
+                            raise VaultError(403, "permission denied")
+                    if namespace not in self.namespaces:
+                        raise VaultError(404, f"namespace not found: {namespace}")
+                    status, response = handler(
+                        self.namespaces[namespace], data, **match.groupdict()
+                    )
+                    return (status, response, {})
+                except VaultError as exc:
+                    return (exc.status, {"errors": exc.errors}, {})
+
+        with self._lock:
+            self.request_counts[(method, "<unrouted>")] += 1
+        return (404, {"errors": []}, {})
+
+    # ------------------------------------------------------------------------
+    # Endpoints
+    # ------------------------------------------------------------------------
+
+    def _add_routes(self) -> None:  # noqa: C901 (a long list of endpoints)
+        route = self.route
+
+        # --------------------------------------------------------------------
+        # sys/health, sys/leader and tokens
+        # --------------------------------------------------------------------
+
+        @route("GET", "/v1/sys/health")
+        def health(ns, data):
+            return (200, {"initialized": True, "sealed": False, "standby": False})
+
+        @route("GET", "/v1/sys/leader")
+        def leader(ns, data):
+            return (
+                200,
+                {
+                    "ha_enabled": True,
+                    "is_self": self.leader_address is None,
+                    "leader_address": self.leader_address or self.address,
+                    "leader_cluster_address": "",
+                },
+            )
+
+        @route("GET", "/v1/auth/token/lookup-self")
+        def token_lookup_self(ns, data):
+            return (200, {"data": {"policies": ["root"], "display_name": "root", "ttl": 0}})
+
+        # --------------------------------------------------------------------
+        # sys/auth
+        # --------------------------------------------------------------------
+
+        @route("GET", "/v1/sys/auth")
+        def auth_list(ns, data):
+            return (200, dict(ns.auth, data=ns.auth))
+
+        @route("GET", "/v1/sys/auth/{path*}")
+        def auth_read(ns, data, path):
+            if path + "/" not in ns.auth:
+                raise VaultError(400, f"No auth engine at {path}/")
+            return (200, {"data": ns.auth[path + "/"]})
+
+        @route("POST", "/v1/sys/auth/{path*}/tune")
+        def auth_tune(ns, data, path):
+            if path + "/" not in ns.auth:
+                raise VaultError(400, f"cannot tune '{path}/'")
+            _tune(ns.auth[path + "/"], data)
+            return (204, None)
+
+        @route("POST", "/v1/sys/auth/{path*}")
+        def auth_enable(ns, data, path):
+            if path + "/" in ns.auth:
+                raise VaultError(400, f"path is already in use at {path}/")
+            if "type" not in data:
+                raise VaultError(400, "missing type")
+            ns.auth[path + "/"] = _new_mount(
+                data["type"], data.get("description", ""), data.get("config"), data.get("options")
+            )
+            ns.backends[f"auth/{path}/"] = {"roles": {}, "config": None}
+            return (204, None)
+
+        @route("DELETE", "/v1/sys/auth/{path*}")
+        def auth_disable(ns, data, path):
+            mount = ns.auth.pop(path + "/", None)
+            ns.backends.pop(f"auth/{path}/", None)
+            if mount is not None:
+                for alias_id, alias in list(ns.entity_aliases.items()):
+                    if alias["mount_accessor"] == mount["accessor"]:
+                        ns.remove_alias(alias_id)
+            return (204, None)
+
+        # --------------------------------------------------------------------
+        # sys/mounts
+        # --------------------------------------------------------------------
+
+        @route("GET", "/v1/sys/mounts")
+        def mounts_list(ns, data):
+            return (200, dict(ns.mounts, data=ns.mounts))
+
+        @route("GET", "/v1/sys/mounts/{path*}/tune")
+        def mount_read_tune(ns, data, path):
+            if path + "/" not in ns.mounts:
+                raise VaultError(400, f"cannot fetch sysview for path {path}/")
+            mount = ns.mounts[path + "/"]
+            return (200, {"data": dict(mount["config"], description=mount["description"])})
+
+        @route("GET", "/v1/sys/mounts/{path*}")
+        def mount_read(ns, data, path):
+            if path + "/" not in ns.mounts:
+                raise VaultError(400, f"No secret engine mount at {path}/")
+            return (200, {"data": ns.mounts[path + "/"]})
+
+        @route("POST", "/v1/sys/mounts/{path*}/tune")
+        def mount_tune(ns, data, path):
+            if path + "/" not in ns.mounts:
+                raise VaultError(400, f"cannot tune '{path}/'")
+            _tune(ns.mounts[path + "/"], data)
+            return (204, None)
+
+        @route("POST", "/v1/sys/mounts/{path*}")
+        def mount_enable(ns, data, path):
+            if path + "/" in ns.mounts:
+                raise VaultError(400, f"path is already in use at {path}/")
+            if "type" not in data:
+                raise VaultError(400, "missing type")
+            ns.mounts[path + "/"] = _new_mount(
+                data["type"], data.get("description", ""), data.get("config"), data.get("options") or {}
+            )
+            ns.backends[f"{path}/"] = {"roles": {}, "ca": None}
+            return (204, None)
+
+        @route("DELETE", "/v1/sys/mounts/{path*}")
+        def mount_disable(ns, data, path):
+            ns.mounts.pop(path + "/", None)
+            ns.backends.pop(f"{path}/", None)
+            return (204, None)
+
+        # --------------------------------------------------------------------
+        # sys/audit
+        # --------------------------------------------------------------------
+
+        @route("GET", "/v1/sys/audit")
+        def audit_list(ns, data):
+            return (200, dict(ns.audit, data=ns.audit))
+
+        @route("POST", "/v1/sys/audit/{path*}")
+        def audit_enable(ns, data, path):
+            if path + "/" in ns.audit:
+                raise VaultError(400, f"path already in use")
+            ns.audit[path + "/"] = {
+                "type": data.get("type"),
+                "description": data.get("description", ""),
+                "options": {k: str(v) for k, v in (data.get("options") or {}).items()},
+                "path": path + "/",
+                "local": bool(data.get("local", False)),
+            }
+            return (204, None)
+
+        @route("DELETE", "/v1/sys/audit/{path*}")
+        def audit_disable(ns, data, path):
+            ns.audit.pop(path + "/", None)
+            return (204, None)
+
+        # --------------------------------------------------------------------
+        # Policies
+        # --------------------------------------------------------------------
+
+        # NB: Like Vault, policy names are case-insensitive and stored
+        # lowercased
+
+        @route("GET", "/v1/sys/policy/{name}")
+        def policy_read(ns, data, name):
+            name = name.lower()
+            if name not in ns.policies:
+                raise VaultError(404)
+            rules = ns.policies[name]
+            return (200, {"name": name, "rules": rules, "data": {"name": name, "rules": rules}})
+
+        @route("LIST", "/v1/sys/policies/acl")
+        def policy_list(ns, data):
+            return (200, {"data": {"keys": sorted(ns.policies)}})
+
+        @route("GET", "/v1/sys/policies/acl/{name}")
+        def policy_acl_read(ns, data, name):
+            name = name.lower()
+            if name not in ns.policies:
+                raise VaultError(404)
+            return (200, {"data": {"name": name, "policy": ns.policies[name]}})
+
+        @route("POST", "/v1/sys/policy/{name}")
+        @route("POST", "/v1/sys/policies/acl/{name}")
+        def policy_write(ns, data, name):
+            name = name.lower()
+            if name == "root":
+                raise VaultError(400, "cannot update \"root\" policy")
+            policy = data.get("policy", data.get("rules"))
+            if policy is None:
+                raise VaultError(400, "'policy' parameter not supplied or empty")
+            ns.policies[name] = policy
+            return (204, None)
+
+        @route("DELETE", "/v1/sys/policy/{name}")
+        @route("DELETE", "/v1/sys/policies/acl/{name}")
+        def policy_delete(ns, data, name):
+            name = name.lower()
+            if name in ("root", "default"):
+                raise VaultError(400, f"cannot delete \"{name}\" policy")
+            ns.policies.pop(name, None)
+            return (204, None)
+
+        # --------------------------------------------------------------------
+        # Namespaces
+        # --------------------------------------------------------------------
+
+        def namespace_info(ns, name):
+            child = ns.namespaces[name]
+            return {
+                "id": child["id"],
+                "path": f"{ns.path}{name}/",
+                "custom_metadata": dict(child["custom_metadata"]),
+            }
+
+        @route("LIST", "/v1/sys/namespaces")
+        def namespace_list(ns, data):
+            if not ns.namespaces:
+                raise VaultError(404)
+            keys = sorted(f"{name}/" for name in ns.namespaces)
+            return (
+                200,
+                {
+                    "data": {
+                        "keys": keys,
+                        "key_info": {
+                            f"{name}/": namespace_info(ns, name) for name in ns.namespaces
+                        },
+                    }
+                },
+            )
+
+        @route("GET", "/v1/sys/namespaces/{name}")
+        def namespace_read(ns, data, name):
+            if name not in ns.namespaces:
+                raise VaultError(404)
+            return (200, {"data": namespace_info(ns, name)})
+
+        @route("POST", "/v1/sys/namespaces/{name}")
+        def namespace_create(ns, data, name):
+            if name in ns.namespaces:
+                raise VaultError(400, "namespace already exists")
+            ns.namespaces[name] = {
+                "id": uuid4().hex[:5],
+                "custom_metadata": dict(data.get("custom_metadata") or {}),
+            }
+            path = f"{ns.path}{name}/"
+            self.namespaces[path.strip("/")] = NamespaceState(path)
+            return (200, {"data": namespace_info(ns, name)})
+
+        @route("PATCH", "/v1/sys/namespaces/{name}")
+        def namespace_patch(ns, data, name):
+            if name not in ns.namespaces:
+                raise VaultError(404)
+            custom_metadata = ns.namespaces[name]["custom_metadata"]
+            for key, value in (data.get("custom_metadata") or {}).items():
+                if value is None:
+                    custom_metadata.pop(key, None)
+                else:
+                    custom_metadata[key] = value
+            return (200, {"data": namespace_info(ns, name)})
+
+        @route("DELETE", "/v1/sys/namespaces/{name}")
+        def namespace_delete(ns, data, name):
+            if name in ns.namespaces:
+                path = f"{ns.path}{name}/".strip("/")
+                if self.namespaces[path].namespaces:
+                    raise VaultError(400, "cannot delete namespace containing child namespaces")
+                del ns.namespaces[name]
+                del self.namespaces[path]
+            return (204, None)
+
+        # --------------------------------------------------------------------
+        # Identity: entities
+        # --------------------------------------------------------------------
+
+        def entity_data(ns, entity):
+            return dict(
+                entity,
+                aliases=ns.aliases_of_entity(entity["id"]),
+                direct_group_ids=[
+                    group["id"]
+                    for group in ns.groups.values()
+                    if entity["id"] in group["member_entity_ids"]
+                ],
+            )
+
+        def entity_write(ns, entity, data):
+            for key in ("metadata", "policies", "disabled"):
+                if key in data:
+                    entity[key] = data[key]
+            if entity["metadata"] is None:
+                entity["metadata"] = {}
+
+        @route("LIST", "/v1/identity/entity/id")
+        def entity_list_id(ns, data):
+            if not ns.entities:
+                raise VaultError(404)
+            return (
+                200,
+                {
+                    "data": {
+                        "keys": list(ns.entities),
+                        "key_info": {
+                            entity_id: {
+                                "name": entity["name"],
+                                "aliases": ns.aliases_of_entity(entity_id),
+                            }
+                            for entity_id, entity in ns.entities.items()
+                        },
+                    }
+                },
+            )
+
+        @route("LIST", "/v1/identity/entity/name")
+        def entity_list_name(ns, data):
+            if not ns.entities:
+                raise VaultError(404)
+            return (200, {"data": {"keys": [e["name"] for e in ns.entities.values()]}})
+
+        @route("GET", "/v1/identity/entity/name/{name}")
+        def entity_read_name(ns, data, name):
+            entity = ns.entity_by_name(name)
+            if entity is None:
+                raise VaultError(404)
+            return (200, {"data": entity_data(ns, entity)})
+
+        @route("GET", "/v1/identity/entity/id/{entity_id}")
+        def entity_read_id(ns, data, entity_id):
+            if entity_id not in ns.entities:
+                raise VaultError(404)
+            return (200, {"data": entity_data(ns, ns.entities[entity_id])})
+
+        def entity_create(ns, name):
+            entity = {
+                "id": str(uuid4()),
+                "name": name or f"entity_{uuid4().hex[:8]}",
+                "metadata": {},
+                "policies": [],
+                "disabled": False,
+                "namespace_id": "root",
+            }
+            ns.add_entity(entity)
+            return entity
+
+        @route("POST", "/v1/identity/entity/name/{name}")
+        def entity_write_name(ns, data, name):
+            entity = ns.entity_by_name(name)
+            if entity is None:
+                entity = entity_create(ns, name)
+                entity_write(ns, entity, data)
+                return (200, {"data": {"id": entity["id"], "name": entity["name"], "aliases": None}})
+            entity_write(ns, entity, data)
+            return (204, None)
+
+        @route("POST", "/v1/identity/entity")
+        def entity_create_endpoint(ns, data):
+            if data.get("name") and ns.entity_by_name(data["name"]) is not None:
+                raise VaultError(400, "entity name is already in use")
+            entity = entity_create(ns, data.get("name"))
+            entity_write(ns, entity, data)
+            return (200, {"data": {"id": entity["id"], "name": entity["name"], "aliases": None}})
+
+        @route("POST", "/v1/identity/entity/id/{entity_id}")
+        def entity_write_id(ns, data, entity_id):
+            if entity_id not in ns.entities:
+                raise VaultError(404)
+            entity_write(ns, ns.entities[entity_id], data)
+            return (204, None)
+
+        def entity_delete(ns, entity_id):
+            if ns.remove_entity(entity_id) is not None:
+                for alias in ns.aliases_of_entity(entity_id):
+                    ns.remove_alias(alias["id"])
+                for group in ns.groups.values():
+                    if entity_id in group["member_entity_ids"]:
+                        group["member_entity_ids"].remove(entity_id)
+
+        @route("DELETE", "/v1/identity/entity/name/{name}")
+        def entity_delete_name(ns, data, name):
+            entity = ns.entity_by_name(name)
+            if entity is not None:
+                entity_delete(ns, entity["id"])
+            return (204, None)
+
+        @route("DELETE", "/v1/identity/entity/id/{entity_id}")
+        def entity_delete_id(ns, data, entity_id):
+            entity_delete(ns, entity_id)
+            return (204, None)
+
+        @route("POST", "/v1/identity/entity/batch-delete")
+        def entity_batch_delete(ns, data):
+            for entity_id in data.get("entity_ids") or []:
+                entity_delete(ns, entity_id)
+            return (204, None)
+
+        # --------------------------------------------------------------------
+        # Identity: groups
+        # --------------------------------------------------------------------
+
+        def group_data(ns, group):
+            return dict(
+                group,
+                member_entity_ids=list(group["member_entity_ids"]),
+                member_group_ids=list(group["member_group_ids"]) or None,
+                parent_group_ids=list(ns.parent_group_ids(group["id"])) or None,
+            )
+
+        def group_write(ns, group, data):
+            for entity_id in data.get("member_entity_ids") or []:
+                if entity_id not in ns.entities:
+                    raise VaultError(400, f"invalid entity ID {entity_id}")
+            for group_id in data.get("member_group_ids") or []:
+                if group_id not in ns.groups:
+                    raise VaultError(400, f"invalid group ID {group_id}")
+                if group_id == group["id"]:
+                    raise VaultError(400, "group cannot be a member of itself")
+            for key in ("metadata", "policies", "member_entity_ids", "member_group_ids"):
+                if key in data:
+                    group[key] = list(data[key] or []) if key != "metadata" else dict(data[key] or {})
+            ns.group_members_changed()
+
+        @route("LIST", "/v1/identity/group/id")
+        def group_list_id(ns, data):
+            if not ns.groups:
+                raise VaultError(404)
+            num_parent_groups = Counter(
+                group_id
+                for group in ns.groups.values()
+                for group_id in group["member_group_ids"]
+            )
+            return (
+                200,
+                {
+                    "data": {
+                        "keys": list(ns.groups),
+                        "key_info": {
+                            group_id: {
+                                "name": group["name"],
+                                "num_member_entities": len(group["member_entity_ids"]),
+                                "num_parent_groups": num_parent_groups[group_id],
+                            }
+                            for group_id, group in ns.groups.items()
+                        },
+                    }
+                },
+            )
+
+        @route("LIST", "/v1/identity/group/name")
+        def group_list_name(ns, data):
+            if not ns.groups:
+                raise VaultError(404)
+            return (200, {"data": {"keys": [g["name"] for g in ns.groups.values()]}})
+
+        @route("GET", "/v1/identity/group/name/{name}")
+        def group_read_name(ns, data, name):
+            group = ns.group_by_name(name)
+            if group is None:
+                raise VaultError(404)
+            return (200, {"data": group_data(ns, group)})
+
+        @route("GET", "/v1/identity/group/id/{group_id}")
+        def group_read_id(ns, data, group_id):
+            if group_id not in ns.groups:
+                raise VaultError(404)
+            return (200, {"data": group_data(ns, ns.groups[group_id])})
+
+        @route("POST", "/v1/identity/group/name/{name}")
+        def group_write_name(ns, data, name):
+            group = ns.group_by_name(name)
+            if group is None:
+                group = {
+                    "id": str(uuid4()),
+                    "name": name,
+                    "type": data.get("type", "internal"),
+                    "metadata": {},
+                    "policies": [],
+                    "member_entity_ids": [],
+                    "member_group_ids": [],
+                    "namespace_id": "root",
+                }
+                group_write(ns, group, data)
+                ns.add_group(group)
+                return (200, {"data": {"id": group["id"], "name": name}})
+            group_write(ns, group, data)
+            return (204, None)
+
+        @route("POST", "/v1/identity/group/id/{group_id}")
+        def group_write_id(ns, data, group_id):
+            if group_id not in ns.groups:
+                raise VaultError(404)
+            group_write(ns, ns.groups[group_id], data)
+            return (204, None)
+
+        def group_delete(ns, group_id):
+            if ns.remove_group(group_id) is not None:
+                for group in ns.groups.values():
+                    if group_id in group["member_group_ids"]:
+                        group["member_group_ids"].remove(group_id)
+                ns.group_members_changed()
+
+        @route("DELETE", "/v1/identity/group/name/{name}")
+        def group_delete_name(ns, data, name):
+            group = ns.group_by_name(name)
+            if group is not None:
+                group_delete(ns, group["id"])
+            return (204, None)
+
+        @route("DELETE", "/v1/identity/group/id/{group_id}")
+        def group_delete_id(ns, data, group_id):
+            group_delete(ns, group_id)
+            return (204, None)
+
+        # --------------------------------------------------------------------
+        # Identity: entity aliases
+        # --------------------------------------------------------------------
+
+        def mount_by_accessor(ns, accessor):
+            for path, mount in ns.auth.items():
+                if mount["accessor"] == accessor:
+                    return path, mount
+            raise VaultError(400, "invalid mount accessor")
+
+        def alias_write(ns, alias, data):
+            if "canonical_id" in data and data["canonical_id"] not in ns.entities:
+                raise VaultError(400, "invalid canonical ID")
+            ns.remove_alias(alias["id"])
+            for key in ("canonical_id", "custom_metadata", "name"):
+                if key in data:
+                    alias[key] = data[key]
+            ns.add_alias(alias)
+
+        @route("POST", "/v1/identity/entity-alias")
+        def alias_create(ns, data):
+            path, mount = mount_by_accessor(ns, data.get("mount_accessor"))
+            alias = ns.alias_by_name(mount["accessor"], data.get("name"))
+            if alias is not None:
+                alias_write(ns, alias, data)
+                return (200, {"data": {"id": alias["id"], "canonical_id": alias["canonical_id"]}})
+            if data.get("canonical_id") not in ns.entities:
+                raise VaultError(400, "invalid canonical ID")
+            alias = {
+                "id": str(uuid4()),
+                "name": data["name"],
+                "canonical_id": data["canonical_id"],
+                "mount_accessor": mount["accessor"],
+                "mount_path": f"auth/{path}",
+                "mount_type": mount["type"],
+                "custom_metadata": data.get("custom_metadata"),
+                "local": False,
+                "metadata": None,
+            }
+            ns.add_alias(alias)
+            return (200, {"data": {"id": alias["id"], "canonical_id": alias["canonical_id"]}})
+
+        @route("LIST", "/v1/identity/entity-alias/id")
+        def alias_list(ns, data):
+            if not ns.entity_aliases:
+                raise VaultError(404)
+            return (
+                200,
+                {
+                    "data": {
+                        "keys": list(ns.entity_aliases),
+                        "key_info": {
+                            alias_id: {
+                                key: alias[key]
+                                for key in (
+                                    "canonical_id",
+                                    "custom_metadata",
+                                    "local",
+                                    "mount_accessor",
+                                    "mount_path",
+                                    "mount_type",
+                                    "name",
+                                )
+                            }
+                            for alias_id, alias in ns.entity_aliases.items()
+                        },
+                    }
+                },
+            )
+
+        @route("GET", "/v1/identity/entity-alias/id/{alias_id}")
+        def alias_read(ns, data, alias_id):
+            if alias_id not in ns.entity_aliases:
+                raise VaultError(404)
+            return (200, {"data": ns.entity_aliases[alias_id]})
+
+        @route("POST", "/v1/identity/entity-alias/id/{alias_id}")
+        def alias_update(ns, data, alias_id):
+            if alias_id not in ns.entity_aliases:
+                raise VaultError(404)
+            alias_write(ns, ns.entity_aliases[alias_id], data)
+            return (200, {"data": {"id": alias_id}})
+
+        @route("DELETE", "/v1/identity/entity-alias/id/{alias_id}")
+        def alias_delete(ns, data, alias_id):
+            ns.remove_alias(alias_id)
+            return (204, None)
+
+        # --------------------------------------------------------------------
+        # Auth methods (AppRole and OIDC/JWT)
+        # --------------------------------------------------------------------
+
+        def auth_backend(ns, mount, *types):
+            if f"{mount}/" not in ns.auth or ns.auth[f"{mount}/"]["type"] not in types:
+                raise VaultError(404, f"no handler for route \"auth/{mount}\"")
+            return ns.backends[f"auth/{mount}/"]
+
+        @route("LIST", "/v1/auth/{mount*}/role")
+        def role_list(ns, data, mount):
+            roles = auth_backend(ns, mount, "approle", "oidc", "jwt")["roles"]
+            if not roles:
+                raise VaultError(404)
+            return (200, {"data": {"keys": sorted(roles)}})
+
+        @route("GET", "/v1/auth/{mount*}/role/{name}/role-id")
+        def approle_role_id(ns, data, mount, name):
+            roles = auth_backend(ns, mount, "approle")["roles"]
+            if name not in roles:
+                raise VaultError(404)
+            return (200, {"data": {"role_id": roles[name]["role_id"]}})
+
+        @route("LIST", "/v1/auth/{mount*}/role/{name}/secret-id")
+        def approle_secret_id_list(ns, data, mount, name):
+            roles = auth_backend(ns, mount, "approle")["roles"]
+            if name not in roles or not roles[name]["secret_ids"]:
+                raise VaultError(404)
+            return (200, {"data": {"keys": sorted(roles[name]["secret_ids"])}})
+
+        def approle_secret_id_create(ns, mount, name, data, secret_id):
+            roles = auth_backend(ns, mount, "approle")["roles"]
+            if name not in roles:
+                raise VaultError(400, f"role \"{name}\" does not exist")
+            accessor = str(uuid4())
+            roles[name]["secret_ids"][accessor] = {
+                "secret_id": secret_id,
+                "metadata": data.get("metadata"),
+            }
+            return (
+                200,
+                {"data": {"secret_id": secret_id, "secret_id_accessor": accessor, "secret_id_ttl": 0}},
+            )
+
+        @route("POST", "/v1/auth/{mount*}/role/{name}/secret-id")
+        def approle_secret_id(ns, data, mount, name):
+            return approle_secret_id_create(ns, mount, name, data, str(uuid4()))
+
+        @route("POST", "/v1/auth/{mount*}/role/{name}/custom-secret-id")
+        def approle_custom_secret_id(ns, data, mount, name):
+            return approle_secret_id_create(ns, mount, name, data, data["secret_id"])
+
+        @route("POST", "/v1/auth/{mount*}/role/{name}/secret-id-accessor/lookup")
+        def approle_secret_id_lookup(ns, data, mount, name):
+            roles = auth_backend(ns, mount, "approle")["roles"]
+            accessor = data.get("secret_id_accessor")
+            if name not in roles or accessor not in roles[name]["secret_ids"]:
+                raise VaultError(404)
+            return (200, {"data": {"secret_id_accessor": accessor}})
+
+        @route("POST", "/v1/auth/{mount*}/role/{name}/secret-id-accessor/destroy")
+        def approle_secret_id_destroy(ns, data, mount, name):
+            roles = auth_backend(ns, mount, "approle")["roles"]
+            if name in roles:
+                roles[name]["secret_ids"].pop(data.get("secret_id_accessor"), None)
+            return (204, None)
+
+        @route("GET", "/v1/auth/{mount*}/role/{name}")
+        def role_read(ns, data, mount, name):
+            backend = auth_backend(ns, mount, "approle", "oidc", "jwt")
+            if name not in backend["roles"]:
+                raise VaultError(404)
+            return (200, {"data": dict(backend["roles"][name]["params"])})
+
+        @route("POST", "/v1/auth/{mount*}/role/{name}")
+        def role_write(ns, data, mount, name):
+            backend = auth_backend(ns, mount, "approle", "oidc", "jwt")
+            role = backend["roles"].setdefault(
+                name,
+                {"params": {}, "role_id": str(uuid4()), "secret_ids": {}},
+            )
+            role["params"].update(data)
+            return (204, None)
+
+        @route("DELETE", "/v1/auth/{mount*}/role/{name}")
+        def role_delete(ns, data, mount, name):
+            backend = auth_backend(ns, mount, "approle", "oidc", "jwt")
+            backend["roles"].pop(name, None)
+            return (204, None)
+
+        @route("GET", "/v1/auth/{mount*}/config")
+        def oidc_config_read(ns, data, mount):
+            backend = auth_backend(ns, mount, "oidc", "jwt")
+            return (200, {"data": dict(backend["config"] or {})})
+
+        @route("POST", "/v1/auth/{mount*}/config")
+        def oidc_config_write(ns, data, mount):
+            backend = auth_backend(ns, mount, "oidc", "jwt")
+            backend["config"] = dict(backend["config"] or {}, **data)
+            return (204, None)
+
+        # --------------------------------------------------------------------
+        # SSH secrets engines
+        # --------------------------------------------------------------------
+
+        def ssh_backend(ns, mount):
+            if f"{mount}/" not in ns.mounts or ns.mounts[f"{mount}/"]["type"] != "ssh":
+                raise VaultError(404, f"no handler for route \"{mount}\"")
+            return ns.backends[f"{mount}/"]
+
+        @route("GET", "/v1/{mount*}/config/ca")
+        def ssh_ca_read(ns, data, mount):
+            backend = ssh_backend(ns, mount)
+            if backend["ca"] is None:
+                raise VaultError(400, "keys haven't been configured yet")
+            return (200, {"data": {"public_key": backend["ca"]}})
+
+        @route("POST", "/v1/{mount*}/config/ca")
+        def ssh_ca_write(ns, data, mount):
+            backend = ssh_backend(ns, mount)
+            if data.get("generate_signing_key", True) and "public_key" not in data:
+                backend["ca"] = f"ssh-rsa {uuid4().hex}\n"
+            else:
+                backend["ca"] = data.get("public_key")
+            return (200, {"data": {"public_key": backend["ca"]}})
+
+        @route("DELETE", "/v1/{mount*}/config/ca")
+        def ssh_ca_delete(ns, data, mount):
+            ssh_backend(ns, mount)["ca"] = None
+            return (204, None)
+
+        @route("LIST", "/v1/{mount*}/roles")
+        def ssh_roles_list(ns, data, mount):
+            roles = ssh_backend(ns, mount)["roles"]
+            if not roles:
+                raise VaultError(404)
+            return (200, {"data": {"keys": sorted(roles)}})
+
+        @route("GET", "/v1/{mount*}/roles/{name}")
+        def ssh_role_read(ns, data, mount, name):
+            roles = ssh_backend(ns, mount)["roles"]
+            if name not in roles:
+                raise VaultError(404)
+            return (200, {"data": dict(roles[name])})
+
+        @route("POST", "/v1/{mount*}/roles/{name}")
+        def ssh_role_write(ns, data, mount, name):
+            ssh_backend(ns, mount)["roles"][name] = dict(data)
+            return (204, None)
+
+        @route("DELETE", "/v1/{mount*}/roles/{name}")
+        def ssh_role_delete(ns, data, mount, name):
+            ssh_backend(ns, mount)["roles"].pop(name, None)
+            return (204, None)
+
+
+def _tune(mount: dict, data: dict) -> None:
+    """Apply a sys/mounts or sys/auth tune request to a mount."""
+    if "description" in data:
+        mount["description"] = data["description"]
+    for key, value in data.items():
+        if key not in ("description", "options"):
+            mount["config"][key] = value
+    if data.get("options"):
+        mount["options"] = dict(mount["options"] or {}, **data["options"])
+
+
+class MockVaultServer:
+    """
+    Serve a MockVault over HTTP on localhost from a background thread.
+
+    Use as a context manager, or call start() and stop(). Keyword arguments
+    are passed to MockVault.
+    """
+
+    def __init__(self, port: int = 0, **kwargs) -> None:
+        self.vault = MockVault(**kwargs)
+
+        vault = self.vault
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            # NB: As in Vault (Go's net/http), otherwise the separately
+            # written headers and body interact badly with delayed ACKs
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def _handle(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                status, response, headers = vault.handle(
+                    self.command, self.path, dict(self.headers), body
+                )
+                # NB: Vault (Go) always produces object keys in sorted order
+                response_body = (
+                    b"" if response is None else json.dumps(response, sort_keys=True).encode()
+                )
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                if response is not None:
+                    self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(response_body)))
+                self.end_headers()
+                self.wfile.write(response_body)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_LIST = _handle
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._server.daemon_threads = True
+        self._thread = None
+        self.vault.address = self.url
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockVaultServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockVaultServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Run a mock Vault API server.")
+    parser.add_argument("--port", type=int, default=8200)
+    parser.add_argument("--token", default=None, help="Require this Vault token.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of latency to add to each request.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Maximum additional random latency (seconds).")
+    args = parser.parse_args()
+
+    server = MockVaultServer(
+        port=args.port,
+        token=args.token,
+        latency=args.latency,
+        jitter=args.jitter,
+    )
+    print(f"Mock Vault listening on {server.url}", file=sys.stderr)
+    server.start()
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,467 @@
+import io
+import sys
+import json
+import time
+import threading
+from email.utils import formatdate
+from http.client import HTTPException
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from ansible_collections.bbcrd.vault.plugins.module_utils.vault import (
+    VaultApiError,
+    VaultClient,
+    _ConnectionPool,
+    _StreamingJsonDecoder,
+    _parse_retry_after,
+)
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[4] / "tests" / "mock_vault"))
+
+from mock_vault import MockVaultServer  # noqa: E402
+
+
+DOCUMENTS = [
+    {"data": {"x": -2.5e10}},
+    {"data": {"x": 12, "y": 1.0e-3, "z": 0.25}},
+    {"data": {"keys": ["a", "bé", 'c"\\'], "flag": True, "none": None}},
+    {"data": {"key_info": {"a": {"n": 1}, "b": {"n": -22.75}, "c": {"n": 3e2}}}},
+    123456789,
+    [1.5, -2, 3e4],
+]
+
+
+def keep_all(key, value):
+    return True
+
+
+# Filters under which entries are decoded individually (rather than by decoding
+# the whole document in one go), exercising values cut at chunk boundaries
+FILTERS = [
+    {},
+    {(): keep_all},
+    {("data", "key_info"): keep_all, ("data", "keys"): keep_all},
+]
+
+
+def decode(document, chunk_size, filters=None, monkeypatch=None):
+    monkeypatch.setattr(_StreamingJsonDecoder, "CHUNK_SIZE", chunk_size)
+    raw = document if isinstance(document, bytes) else json.dumps(document).encode()
+    return _StreamingJsonDecoder(io.BytesIO(raw).read).decode(filters or {})
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 64 * 1024])
+@pytest.mark.parametrize("filters", FILTERS)
+@pytest.mark.parametrize("document", DOCUMENTS)
+def test_decode_across_chunk_boundaries(monkeypatch, document, filters, chunk_size):
+    assert decode(document, chunk_size, filters, monkeypatch) == document
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5])
+def test_number_split_at_fraction_or_exponent(monkeypatch, chunk_size):
+    document = b'{"data": {"x": -2.5e10, "y": 1E+2}}'
+    filters = {("data", "key_info"): keep_all}
+    assert decode(document, chunk_size, filters, monkeypatch) == {
+        "data": {"x": -2.5e10, "y": 100.0}
+    }
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 64 * 1024])
+def test_filtered_entries(monkeypatch, chunk_size):
+    document = DOCUMENTS[3]
+    filters = {("data", "key_info"): lambda key, value: value["n"] < 0}
+    assert decode(document, chunk_size, filters, monkeypatch) == {
+        "data": {"key_info": {"b": {"n": -22.75}}}
+    }
+
+
+@pytest.mark.parametrize("chunk_size", [1, 64 * 1024])
+def test_truncated_document(monkeypatch, chunk_size):
+    with pytest.raises(ValueError):
+        decode(b'{"data": {"x": -2.5', chunk_size, monkeypatch=monkeypatch)
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    """
+    Responds to requests on a keep-alive connection, then behaves according
+    to the server's 'mode' once a connection has handled one request:
+    'close-idle' closes the connection (without telling the client) after
+    responding and 'drop' reads the next request but closes the connection
+    without responding.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.handled = 0
+
+    def log_message(self, *args):
+        pass
+
+    def handle_one_request(self):
+        super().handle_one_request()
+        self.handled += 1
+
+    def _respond(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.requests.append(self.command)
+        if self.server.mode == "drop" and self.handled >= 1:
+            self.close_connection = True
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+        if self.server.mode == "close-idle":
+            self.close_connection = True
+
+    do_GET = do_POST = _respond
+
+
+@pytest.fixture
+def keep_alive_server(no_proxy):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    server.daemon_threads = True
+    server.requests = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_pool(server):
+    host, port = server.server_address
+    return _ConnectionPool(f"http://{host}:{port}", lambda: None, timeout=5)
+
+
+@pytest.mark.parametrize("method", ["GET", "POST"])
+def test_connection_closed_whilst_idle(keep_alive_server, method):
+    keep_alive_server.mode = "close-idle"
+    pool = make_pool(keep_alive_server)
+    assert pool.send(method, "/", b"{}", {}).status == 200
+    time.sleep(0.1)  # Let the close reach the client
+    response = pool.send(method, "/", b"{}", {})
+    assert response.status == 200
+    assert not response.reused
+    assert keep_alive_server.requests == [method, method]
+
+
+def test_idempotent_request_resent_after_dropped_connection(keep_alive_server):
+    keep_alive_server.mode = "drop"
+    pool = make_pool(keep_alive_server)
+    assert pool.send("GET", "/", None, {}).status == 200
+    assert pool.send("GET", "/", None, {}).status == 200
+    assert keep_alive_server.requests == ["GET", "GET", "GET"]
+
+
+def test_non_idempotent_request_not_resent_after_dropped_connection(
+    keep_alive_server,
+):
+    keep_alive_server.mode = "drop"
+    pool = make_pool(keep_alive_server)
+    assert pool.send("POST", "/", b"{}", {}).status == 200
+    with pytest.raises((ConnectionError, HTTPException)):
+        pool.send("POST", "/", b"{}", {})
+    assert keep_alive_server.requests == ["POST", "POST"]
+
+
+@pytest.fixture
+def no_proxy(monkeypatch):
+    for name in ("http_proxy", "HTTP_PROXY", "all_proxy", "ALL_PROXY"):
+        monkeypatch.delenv(name, raising=False)
+
+
+@pytest.fixture
+def vault_server(no_proxy):
+    with MockVaultServer(token="root") as server:
+        yield server
+
+
+@pytest.fixture
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(VaultClient, "RETRY_INITIAL_DELAY", 0.01)
+    monkeypatch.setattr(VaultClient, "RETRY_MAX_DELAY", 0.05)
+
+
+def make_client(server, **kwargs):
+    return VaultClient(server.url, vault_token="root", **kwargs)
+
+
+def injected_count(server, method):
+    return server.vault.request_counts[(method, "<injected>")]
+
+
+POLICY_PATH = "/v1/sys/policies/acl/foo"
+POLICY = {"policy": 'path "secret/*" {}'}
+
+
+def test_non_idempotent_request_not_retried_after_server_error(
+    vault_server, fast_retries
+):
+    vault_server.vault.inject_responses((500, {"errors": ["oops"]}, {}))
+    client = make_client(vault_server)
+    with pytest.raises(VaultApiError) as exc_info:
+        client.request(POLICY_PATH, "POST", POLICY)
+    assert exc_info.value.status == 500
+    assert injected_count(vault_server, "POST") == 1
+    assert "foo" not in vault_server.vault.namespaces[""].policies
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_non_idempotent_request_retried_when_rejected(
+    vault_server, fast_retries, status
+):
+    vault_server.vault.inject_responses((status, {"errors": []}, {}))
+    client = make_client(vault_server)
+    assert client.request(POLICY_PATH, "POST", POLICY) is None
+    assert injected_count(vault_server, "POST") == 1
+    assert vault_server.vault.namespaces[""].policies["foo"] == POLICY["policy"]
+
+
+def test_idempotent_request_retried(vault_server, fast_retries):
+    vault_server.vault.inject_responses(
+        (500, {"errors": []}, {}),
+        (502, {"errors": []}, {}),
+    )
+    client = make_client(vault_server)
+    assert client.request("/v1/sys/policies/acl/default")["data"]["name"] == "default"
+    assert injected_count(vault_server, "GET") == 2
+
+
+def test_retries_stop_at_deadline(vault_server, fast_retries):
+    vault_server.vault.inject_responses(
+        (500, {"errors": []}, {}), *[(502, {"errors": []}, {})] * 1000
+    )
+    client = make_client(vault_server, retry_timeout=0.3)
+    start = time.monotonic()
+    with pytest.raises(VaultApiError) as exc_info:
+        client.request("/v1/sys/policies/acl/default")
+    assert time.monotonic() - start < 1.0
+    # The last failure is the one reported
+    assert exc_info.value.status == 502
+    assert 2 < injected_count(vault_server, "GET") < 1000
+
+
+def test_connection_failures_retried_until_deadline(no_proxy, fast_retries):
+    # Nothing listens on this port once the server has stopped
+    with MockVaultServer() as server:
+        url = server.url
+    client = VaultClient(url, retry_timeout=0.3)
+    start = time.monotonic()
+    with pytest.raises(VaultApiError) as exc_info:
+        client.request("/v1/sys/policies/acl/default")
+    assert 0.3 - 0.1 < time.monotonic() - start < 2.0
+    assert isinstance(exc_info.value.__cause__, ConnectionRefusedError)
+
+
+def test_retries_disabled(vault_server, fast_retries):
+    vault_server.vault.inject_responses((502, {"errors": []}, {}))
+    client = make_client(vault_server, retry_timeout=0)
+    with pytest.raises(VaultApiError):
+        client.request("/v1/sys/policies/acl/default")
+    assert injected_count(vault_server, "GET") == 1
+
+
+def test_expected_status_not_retried(vault_server, fast_retries):
+    vault_server.vault.inject_responses((503, {"errors": ["sealed"]}, {}))
+    client = make_client(vault_server)
+    response = client.request("/v1/sys/health", expected_status=(200, 503))
+    assert response == {"errors": ["sealed"]}
+    assert injected_count(vault_server, "GET") == 1
+
+
+def test_retry_after_honoured(vault_server, fast_retries):
+    vault_server.vault.inject_responses(
+        (429, {"errors": []}, {"Retry-After": "0.5"})
+    )
+    client = make_client(vault_server)
+    start = time.monotonic()
+    client.request("/v1/sys/policies/acl/default")
+    assert time.monotonic() - start >= 0.5
+    assert injected_count(vault_server, "GET") == 1
+
+
+def test_retry_after_beyond_deadline(vault_server, fast_retries):
+    vault_server.vault.inject_responses(
+        (429, {"errors": []}, {"Retry-After": "10"})
+    )
+    client = make_client(vault_server, retry_timeout=1)
+    start = time.monotonic()
+    with pytest.raises(VaultApiError) as exc_info:
+        client.request("/v1/sys/policies/acl/default")
+    assert time.monotonic() - start < 1.0
+    assert exc_info.value.status == 429
+
+
+def test_parse_retry_after():
+    assert _parse_retry_after(None) is None
+    assert _parse_retry_after("") is None
+    assert _parse_retry_after("nonsense") is None
+    assert _parse_retry_after("3") == 3.0
+    assert _parse_retry_after("-3") == 0.0
+    assert 55 < _parse_retry_after(formatdate(time.time() + 60, usegmt=True)) <= 60
+    assert _parse_retry_after(formatdate(time.time() - 60, usegmt=True)) == 0.0
+
+
+@pytest.fixture
+def cluster(no_proxy):
+    """An active node and a standby node (whose leader is the active node)."""
+    with MockVaultServer(token="root") as active:
+        with MockVaultServer(token="root", leader_address=active.url) as standby:
+            yield active, standby
+
+
+def request_count(server, method, template):
+    return server.vault.request_counts[(method, template)]
+
+
+def test_leader_routing_writes_sent_to_active_node(cluster):
+    active, standby = cluster
+    client = make_client(standby, leader_routing=True)
+    client.request(POLICY_PATH, "POST", POLICY)
+    assert "foo" in active.vault.namespaces[""].policies
+    assert "foo" not in standby.vault.namespaces[""].policies
+    assert request_count(standby, "GET", "/v1/sys/leader") == 1
+    assert request_count(standby, "POST", "/v1/sys/policies/acl/{name}") == 0
+
+    # The discovered leader is reused
+    client.request(POLICY_PATH, "DELETE")
+    assert "foo" not in active.vault.namespaces[""].policies
+    assert request_count(standby, "GET", "/v1/sys/leader") == 1
+
+
+def test_leader_routing_reads_sent_to_vault_url(cluster):
+    active, standby = cluster
+    client = make_client(standby, leader_routing=True)
+    client.request("/v1/sys/policies/acl/default")
+    client.request("/v1/sys/policies/acl", "LIST")
+    assert active.vault.total_requests == 0
+    assert request_count(standby, "GET", "/v1/sys/leader") == 0
+
+
+def test_leader_routing_rediscovers_leader_after_redirect(cluster):
+    active, standby = cluster
+    client = make_client(standby, leader_routing=True)
+    client.request(POLICY_PATH, "POST", POLICY)
+
+    # Leadership changes: the old active node becomes a standby
+    with MockVaultServer(token="root") as new_active:
+        active.vault.leader_address = new_active.url
+        standby.vault.leader_address = new_active.url
+
+        client.request(POLICY_PATH, "POST", {"policy": "new"})
+        assert new_active.vault.namespaces[""].policies["foo"] == "new"
+        assert active.vault.namespaces[""].policies["foo"] == POLICY["policy"]
+        assert request_count(standby, "GET", "/v1/sys/leader") == 2
+
+
+def test_leader_routing_rediscovers_leader_after_connection_refused(cluster):
+    active, standby = cluster
+    client = make_client(standby, leader_routing=True)
+    client.request(POLICY_PATH, "POST", POLICY)
+
+    # The active node goes away (and a new one takes over)
+    with MockVaultServer(token="root") as new_active:
+        standby.vault.leader_address = new_active.url
+        client.close()
+        active.stop()
+
+        client.request(POLICY_PATH, "POST", {"policy": "new"})
+        assert new_active.vault.namespaces[""].policies["foo"] == "new"
+        assert request_count(standby, "GET", "/v1/sys/leader") == 2
+
+
+def test_redirects_followed(no_proxy):
+    with MockVaultServer(token="root") as target, MockVaultServer() as origin:
+        origin.vault.inject_responses(
+            (307, None, {"Location": f"{target.url}/v1/sys/policies/acl/default"})
+        )
+        client = VaultClient(origin.url, vault_token="root")
+        response = client.request("/v1/sys/policies/acl/default")
+        assert response["data"]["name"] == "default"
+        assert request_count(target, "GET", "/v1/sys/policies/acl/{name}") == 1
+
+
+def test_cache(vault_server):
+    client = make_client(vault_server)
+    first = client.request("/v1/sys/auth", cache=True)
+    assert client.request("/v1/sys/auth", cache=True) == first
+    assert client.request("/v1/sys/auth/", cache=True) == first
+    assert request_count(vault_server, "GET", "/v1/sys/auth") == 1
+
+    # Uncached requests always go to the server
+    client.request("/v1/sys/auth")
+    assert request_count(vault_server, "GET", "/v1/sys/auth") == 2
+
+
+def test_cache_invalidated_by_writes(vault_server):
+    client = make_client(vault_server)
+    client.request("/v1/sys/auth/approle", "POST", {"type": "approle"})
+
+    def read_all():
+        client.request_many(
+            [
+                # The parent, the path itself and a child of the path written
+                # (NB: The mock Vault rejects the last, but that is cached too)
+                ("GET", "/v1/sys/auth"),
+                ("GET", "/v1/sys/auth/approle"),
+                ("GET", "/v1/sys/auth/approle/tune", None, (200, 400)),
+                # Unrelated paths
+                ("GET", "/v1/sys/auth/token"),
+                ("GET", "/v1/sys/mounts"),
+            ],
+            cache=True,
+        )
+
+    read_all()
+    read_all()
+    assert vault_server.vault.request_counts[("GET", "/v1/sys/auth")] == 1
+    assert vault_server.vault.request_counts[("GET", "/v1/sys/auth/{path*}")] == 3
+
+    client.request("/v1/sys/auth/approle/tune", "POST", {"description": "x"})
+    read_all()
+    assert vault_server.vault.request_counts[("GET", "/v1/sys/auth")] == 2
+    assert vault_server.vault.request_counts[("GET", "/v1/sys/auth/{path*}")] == 5
+    assert vault_server.vault.request_counts[("GET", "/v1/sys/mounts")] == 1
+
+    client.request("/v1/sys/auth/approle", "DELETE")
+    read_all()
+    assert vault_server.vault.request_counts[("GET", "/v1/sys/auth")] == 3
+    assert vault_server.vault.request_counts[("GET", "/v1/sys/auth/{path*}")] == 7
+    assert vault_server.vault.request_counts[("GET", "/v1/sys/mounts")] == 1
+
+
+def test_cache_not_populated_by_concurrent_read_and_write(vault_server):
+    client = make_client(vault_server)
+    client.request_many(
+        [("POST", POLICY_PATH, POLICY), ("GET", POLICY_PATH, None, (200, 404))],
+        cache=True,
+    )
+    assert client.request(POLICY_PATH, cache=True)["data"]["policy"] == POLICY["policy"]
+    assert request_count(vault_server, "GET", "/v1/sys/policies/acl/{name}") == 2
+
+
+def test_cache_not_populated_by_read_during_write(no_proxy):
+    # NB: Latency is added to the read below so that the write is made (and
+    # completes) whilst the read is still in flight
+    with MockVaultServer(token="root", latency=0.3) as server:
+        client = make_client(server)
+        reader = threading.Thread(
+            target=client.request,
+            args=(POLICY_PATH,),
+            kwargs=dict(expected_status=(200, 404), cache=True),
+        )
+        reader.start()
+        time.sleep(0.1)
+        server.vault.latency = 0
+        client.request(POLICY_PATH, "POST", POLICY)
+        assert reader.is_alive()
+        reader.join()
+
+        response = client.request(POLICY_PATH, cache=True)
+        assert response["data"]["policy"] == POLICY["policy"]
+        assert request_count(server, "GET", "/v1/sys/policies/acl/{name}") == 2
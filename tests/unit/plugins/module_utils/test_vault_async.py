@@ -0,0 +1,91 @@
+import sys
+import asyncio
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+COLLECTION_DIR = Path(__file__).resolve().parents[4]
+
+sys.path.insert(0, str(COLLECTION_DIR / "tests" / "mock_vault"))
+
+from mock_vault import MockVaultServer  # noqa: E402
+
+# NB: Loaded from its file (as a standalone script would) rather than via
+# ansible_collections to check it doesn't depend on Ansible or the collection
+_spec = importlib.util.spec_from_file_location(
+    "vault_async", COLLECTION_DIR / "plugins" / "module_utils" / "vault_async.py"
+)
+vault_async = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(vault_async)
+
+
+@pytest.fixture
+def server():
+    with MockVaultServer(token="root") as server:
+        yield server
+
+
+def run(server, coroutine_function, **kwargs):
+    async def main():
+        async with vault_async.AsyncVaultClient(
+            server.url, vault_token="root", **kwargs
+        ) as client:
+            return await coroutine_function(client)
+
+    return asyncio.run(main())
+
+
+def test_no_ansible_imports():
+    source = Path(vault_async.__file__).read_text()
+    assert "import ansible" not in source and "from ansible" not in source
+
+
+def test_request(server):
+    async def main(client):
+        await client.post("/v1/sys/policies/acl/foo", {"policy": 'path "a" {}'})
+        return await client.get("/v1/sys/policies/acl/foo")
+
+    assert run(server, main)["data"]["policy"] == 'path "a" {}'
+
+
+@pytest.mark.parametrize("max_connections", [1, 4])
+def test_gather(server, max_connections):
+    names = [f"policy-{i}" for i in range(50)]
+
+    async def main(client):
+        await client.gather(
+            ("POST", f"/v1/sys/policies/acl/{name}", {"policy": name})
+            for name in names
+        )
+        listing = await client.list("/v1/sys/policies/acl")
+        responses = await client.gather(
+            ("GET", f"/v1/sys/policies/acl/{name}") for name in names
+        )
+        return listing, responses
+
+    listing, responses = run(server, main, max_connections=max_connections)
+    assert set(names) <= set(listing["data"]["keys"])
+    assert [response["data"]["policy"] for response in responses] == names
+    assert server.vault.namespaces[""].policies["policy-0"] == "policy-0"
+
+
+def test_unexpected_status(server):
+    async def main(client):
+        with pytest.raises(vault_async.VaultApiError) as exc_info:
+            await client.get("/v1/sys/policies/acl/missing")
+        assert exc_info.value.status == 404
+
+        return await client.gather(
+            [
+                ("GET", "/v1/sys/policies/acl/default"),
+                ("GET", "/v1/sys/policies/acl/missing"),
+                ("GET", "/v1/sys/policies/acl/missing", None, (200, 404)),
+            ],
+            return_exceptions=True,
+        )
+
+    found, missing, allowed_missing = run(server, main)
+    assert found["data"]["name"] == "default"
+    assert isinstance(missing, vault_async.VaultApiError)
+    assert allowed_missing["errors"] == []